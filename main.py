@@ -1,6 +1,5 @@
 import argparse
 
-from src.pipelines import train_pipeline
 from src.utils import parsing
 from src.logger import logging
 from src.config import command_config as command, ingestion_config as ingestion, hyperparameter_tuning_config, finetuning_config
@@ -20,6 +19,19 @@ def parse_args():
 
     # Ingestion
     parser.add_argument('--ingest-augmented-data', action='store_true', required=False, default=False)
+    parser.add_argument('--dedup-augmented-data', action='store_true', required=False, default=False, help='Remove repeated pairs from the augmented data with an external sort')
+    parser.add_argument('--dedup-memory-mb', type=int, required=False, default=512, help='Memory budget in MB of the augmented data deduplication')
+    parser.add_argument('--force-ingest', action='store_true', required=False, default=False, help='Ingest data even if its inputs did not change since the last ingestion')
+    parser.add_argument('--encode-corpora', action='store_true', required=False, default=False, help='Also save the split corpora as token id arrays (.ids.npy and .offsets.npy)')
+    parser.add_argument('--min-length', type=int, required=False, default=None, help='Remove train pairs with a sentence shorter than this number of tokens')
+    parser.add_argument('--max-length', type=int, required=False, default=None, help='Remove train pairs with a sentence longer than this number of tokens')
+    parser.add_argument('--max-length-ratio', type=float, required=False, default=None, help='Remove train pairs whose longest sentence has more than this ratio of tokens over the shortest one')
+    parser.add_argument('--compress-outputs', type=str, required=False, default=None, choices=['gz', 'bz2', 'xz', 'zst'], help='Also write compressed copies of the ingested corpora (e.g. to archive or transfer them) once the ingestion is complete. The plain corpora used for training and the vocabularies are kept, so this uses more disk space instead of saving it')
+    parser.add_argument('--tokenization-cache', type=str, required=False, default=None, help='SQLite file where tokenized sentences are cached across ingestions')
+    parser.add_argument('--ingest-processes', type=int, required=False, default=None, help='Number of processes used to split the raw data (sequential if not set)')
+    parser.add_argument('--vocab-min-count', type=int, required=False, default=1, help='Minimum frequency of a token to be included in the vocabulary')
+    parser.add_argument('--vocab-max-size', type=int, required=False, default=None, help='Maximum vocabulary size, default vocabulary included')
+    parser.add_argument('--vocab-format', type=str, required=False, default='text', choices=['text', 'counts', 'yaml'], help="Vocabulary file format: 'text', 'counts' (token and frequency) or 'yaml' (Marian)")
 
     # Finetuning
     parser.add_argument('--finetuning-epochs', type=str, required=False, default=None, help='Whitespace separated list of training sets')
@@ -33,6 +45,7 @@ def parse_args():
     parser.add_argument('--validate-each-epochs', type=int, required=False, default=None, help='Number of epochs between validations')
     parser.add_argument('--validation-metrics', type=str, required=False, default=None, help='Whitespace separated list of metrics to use for validation')
     parser.add_argument('--save-checkpoints', action='store_true', required=False, default=False, help='Save a copy of the model after each validation')
+    parser.add_argument('--reference-cache-dir', type=str, required=False, default=None, help='Directory where the validation reference statistics are persisted across runs (kept in memory only if not set)')
     parser.add_argument('--not-delete-model-after', action='store_true', required=False, default=False, help='Do not delete the model after training')
 
     # Hyperparameter tuning
@@ -60,6 +73,7 @@ if __name__ == '__main__':
     validation_metrics = args.get('validation_metrics')
     save_checkpoints = args.get('save_checkpoints')
     not_delete_model_after = args.get('not_delete_model_after')
+    reference_cache_dir = args.get('reference_cache_dir')
 
     # Steps
     ingest = args.get('ingest')
@@ -68,6 +82,19 @@ if __name__ == '__main__':
 
     # Ingestion
     ingest_augmented_data = args.get('ingest_augmented_data')
+    dedup_augmented_data = args.get('dedup_augmented_data')
+    dedup_memory_mb = args.get('dedup_memory_mb')
+    force_ingest = args.get('force_ingest')
+    encode_corpora = args.get('encode_corpora')
+    ingest_processes = args.get('ingest_processes')
+    compress_outputs = args.get('compress_outputs')
+    tokenization_cache = args.get('tokenization_cache')
+    min_length = args.get('min_length')
+    max_length = args.get('max_length')
+    max_length_ratio = args.get('max_length_ratio')
+    vocab_min_count = args.get('vocab_min_count')
+    vocab_max_size = args.get('vocab_max_size')
+    vocab_format = args.get('vocab_format')
 
     # Finetuning
     finetuning_epochs = args.get('finetuning_epochs')
@@ -101,7 +128,20 @@ if __name__ == '__main__':
                                                                val_dirs, 
                                                                vocab_dirs, 
                                                                ingest_augmented_data, 
-                                                               persist_each=1000)
+                                                               persist_each=1000,
+                                                               processes_n=ingest_processes,
+                                                               vocabulary_min_count=vocab_min_count,
+                                                               vocabulary_max_size=vocab_max_size,
+                                                               vocabulary_format=vocab_format,
+                                                               force_ingest=force_ingest,
+                                                               encode_corpora=encode_corpora,
+                                                               deduplicate_augmented_data=dedup_augmented_data,
+                                                               dedup_memory_mb=dedup_memory_mb,
+                                                               min_length=min_length,
+                                                               max_length=max_length,
+                                                               max_length_ratio=max_length_ratio,
+                                                               output_compression='.' + compress_outputs if compress_outputs else None,
+                                                               tokenization_cache_path=tokenization_cache)
         logging.info('Ingesting data with config {}'.format(ingestion_config))
 
     if train:
@@ -113,7 +153,8 @@ if __name__ == '__main__':
                                                     validation_metrics=validation_metrics, 
                                                     save_checkpoints=save_checkpoints, 
                                                     not_delete_model_after=not_delete_model_after,
-                                                    run_id=run_id)
+                                                    run_id=run_id,
+                                                    reference_cache_dir=reference_cache_dir)
         logging.info('Training model with config {}'.format(command_config))
 
         if finetune:
@@ -135,6 +176,8 @@ if __name__ == '__main__':
                                                                                           max_iters=max_iters)
             logging.info('Hyperparameter tuning with config {}'.format(tuning_config))
 
+    from src.pipelines import train_pipeline # Imported after parsing the arguments to keep --help and argument errors fast
+
     try:
         train_pipeline.train(command_config=command_config, 
                              data_ingestion_config=ingestion_config,
@@ -0,0 +1,120 @@
+import argparse
+import datetime
+import glob
+import multiprocessing
+import sys
+import os
+
+# This is a trick (not the most clean) to import from the root folder
+current_dir = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(1, os.path.join(current_dir, '..', '..'))
+
+from src.utils import parsing
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reference_file', type=str, required=True)
+    parser.add_argument('--translation_files', type=str, required=True, help='Glob or valid-translation-output template (e.g. valid_output_{E}.txt) of the translations')
+    parser.add_argument('--score', type=str, default='sacrebleu_corpus_bleu', help='Whitespace separated list of metrics')
+    parser.add_argument('--results_file', type=str, default=None, help='CSV where the rows are appended with the save_results schema. '
+                                                                       'The parameters column holds the validation flags of save_results '
+                                                                       '(valid-sets, valid-translation-output, after-epochs and update), '
+                                                                       'the rest of the training flags are not known here')
+    parser.add_argument('--model_name', type=str, default='')
+    parser.add_argument('--source_file', type=str, default='', help='Source side of the validation set, only its name is saved')
+    parser.add_argument('--processes', type=int, default=None, help='Number of scoring processes (all cores if not set)')
+    parser.add_argument('--reference_cache_dir', type=str, default=None, help='Directory where the reference statistics are persisted')
+    args = parser.parse_args()
+    return vars(args)
+
+# Translations matched by the glob with their template parameters, sorted by epoch
+def get_translation_files(translation_files):
+    # type: (str) -> list[tuple[str, dict[str, str]]]
+    translation_paths = glob.glob(parsing.get_output_filename_glob(translation_files))
+    translation_files = [(translation_path, parsing.get_output_filename_parameters(translation_files, translation_path)) \
+                         for translation_path in translation_paths]
+    return sorted(translation_files, key=lambda translation_file: (int(translation_file[1].get('epoch', 0)),
+                                                                   int(translation_file[1].get('updates', 0)),
+                                                                   translation_file[0]))
+
+def init_worker(reference_file, score_types, reference_cache_dir):
+    # type: (str, list[str], str) -> None
+    from src.domain.evaluation import reference_cache
+
+    # The reference is loaded once per worker, every translation it scores reuses its statistics
+    cache = reference_cache.get_reference_cache(reference_cache_dir)
+    for score_type in score_types:
+        cache.get_metric(score_type, reference_file)
+
+def score_translation_file(reference_file, translation_path, score_types, reference_cache_dir=None):
+    # type: (str, str, list[str], str) -> dict[str, float]
+    from src.domain.evaluation import scoring
+    from src.utils import file_manager
+
+    translation_lines = file_manager.get_file_lines(translation_path)
+    return scoring.score_translation(reference_file, translation_lines, score_types,
+                                     reference_cache_dir=reference_cache_dir)
+
+def __score_task(task):
+    # type: (tuple) -> dict[str, float]
+    return score_translation_file(*task)
+
+# Rows of save_results, whose parameters are the Marian flags of the run. Only the validation flags are known here.
+def get_score_rows(translation_files, scores, model_name, source_file, reference_file, translation_template):
+    # type: (list[tuple[str, dict[str, str]]], list[dict[str, float]], str, str, str, str) -> list[list]
+    date = datetime.datetime.now()
+    source, target = os.path.basename(source_file), os.path.basename(reference_file)
+    score_rows = []
+    for (translation_path, parameters), translation_scores in zip(translation_files, scores):
+        epoch = parameters.get('epoch', '')
+        row_parameters = {'valid-sets': [source_file, reference_file],
+                          'valid-translation-output': [translation_template],
+                          'after-epochs': [epoch]}
+        if 'updates' in parameters:
+            row_parameters['update'] = [parameters['updates']]
+
+        for score_type, score in translation_scores.items():
+            score_rows.append([date,
+                               model_name,
+                               source, target,
+                               score_type, score,
+                               epoch,
+                               row_parameters])
+    return score_rows
+
+def main(reference_file, translation_files, score_types, results_file=None, model_name='', source_file='', processes=None, reference_cache_dir=None):
+    # type: (str, str, list[str], str, str, str, int, str) -> list[list]
+    from src.domain.evaluation import metrics
+
+    translation_template = translation_files
+    translation_files = get_translation_files(translation_template)
+    tasks = [(reference_file, translation_path, score_types, reference_cache_dir) \
+             for translation_path, _ in translation_files]
+    processes = min(processes or os.cpu_count() or 1, max(1, len(tasks)))
+
+    with multiprocessing.Pool(processes,
+                              initializer=init_worker,
+                              initargs=(reference_file, score_types, reference_cache_dir)) as pool:
+        scores = pool.map(__score_task, tasks, chunksize=1)
+
+    score_rows = get_score_rows(translation_files, scores, model_name,
+                                source_file, reference_file, translation_template)
+    if results_file is not None:
+        metrics.write_results(results_file, score_rows)
+
+    for (translation_path, _), translation_scores in zip(translation_files, scores):
+        rounded_scores = ['{:g}'.format(float('{:.6g}'.format(score))) for score in translation_scores.values()]
+        print(translation_path, *rounded_scores)
+    return score_rows
+
+# Example: python scripts/validate/batch_score.py --reference_file artifacts/data/validation/valid.es --translation_files "logs/marian/valid_output_{E}.txt" --score "sacrebleu_corpus_bleu sacrebleu_corpus_chrf" --results_file artifacts/results/rescored.csv
+if __name__ == '__main__':
+    args = parse_args()
+    main(args['reference_file'],
+         args['translation_files'],
+         args['score'].split(),
+         results_file=args['results_file'],
+         model_name=args['model_name'],
+         source_file=args['source_file'],
+         processes=args['processes'],
+         reference_cache_dir=args['reference_cache_dir'])
@@ -0,0 +1,56 @@
+import argparse
+import glob
+import sys
+import os
+
+# This is a trick (not the most clean) to import from the root folder
+current_dir = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(1, os.path.join(current_dir, '..', '..'))
+
+from src.utils import parsing
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reference_file', type=str, required=True)
+    parser.add_argument('--baseline_file', type=str, required=True)
+    parser.add_argument('--translation_files', type=str, required=True, help='Glob or valid-translation-output template (e.g. valid_output_{E}.txt) of the compared translations')
+    parser.add_argument('--score', type=str, default='sacrebleu_corpus_bleu sacrebleu_corpus_chrf', help='Whitespace separated list of metrics')
+    parser.add_argument('--samples', type=int, default=1000, help='Number of bootstrap resamples')
+    parser.add_argument('--seed', type=int, default=12345)
+    parser.add_argument('--reference_cache_dir', type=str, default=None, help='Directory where the reference statistics are persisted')
+    args = parser.parse_args()
+    return vars(args)
+
+def main(reference_file, baseline_file, translation_files, score_types, samples=1000, seed=12345, reference_cache_dir=None):
+    # type: (str, str, str, list[str], int, int, str) -> dict[str, dict[str, dict]]
+    from src.domain.evaluation import significance
+    from src.utils import file_manager
+
+    translation_paths = sorted(glob.glob(parsing.get_output_filename_glob(translation_files)))
+    systems = {path: file_manager.get_file_lines(path) for path in [baseline_file] + translation_paths}
+    results = significance.paired_bootstrap_test(reference_file,
+                                                 systems,
+                                                 score_types,
+                                                 baseline=baseline_file,
+                                                 n_samples=samples,
+                                                 seed=seed,
+                                                 reference_cache_dir=reference_cache_dir)
+
+    for path, system_results in results.items():
+        columns = []
+        for result in system_results.values():
+            p_value = '(baseline)' if result['p_value'] is None else 'p={:.4f}{}'.format(result['p_value'], '*' if result['p_value'] < 0.05 else '')
+            columns.append('{:.4f} ({:.4f} +- {:.4f}) {}'.format(result['score'], result['mean'], result['ci'], p_value))
+        print(path, *columns, sep='\t')
+    return results
+
+# Example: python scripts/validate/paired_bootstrap.py --reference_file artifacts/data/validation/valid.es --baseline_file logs/marian/valid_output_1.txt --translation_files "logs/marian/valid_output_{E}.txt"
+if __name__ == '__main__':
+    args = parse_args()
+    main(args['reference_file'],
+         args['baseline_file'],
+         args['translation_files'],
+         args['score'].split(),
+         samples=args['samples'],
+         seed=args['seed'],
+         reference_cache_dir=args['reference_cache_dir'])
@@ -6,7 +6,6 @@ import os
 current_dir = os.path.dirname(os.path.realpath(__file__))
 sys.path.insert(1, os.path.join(current_dir, '..', '..'))
 
-from src.domain.evaluation import metrics
 from src.utils import wrappers
 
 def parse_args():
@@ -19,6 +18,7 @@ def parse_args():
 
 @wrappers.warning_filter(logger='spacy') # This is done to avoid warnings from spacy
 def main(reference_file, translation_file, metric='sacrebleu_corpus_bleu'):
+    from src.domain.evaluation import metrics # Imported after parsing the arguments, the scorer is started on every validation
 
     with open(reference_file, 'r', encoding='utf-8') as f:
         reference_lines = f.readlines()
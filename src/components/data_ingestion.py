@@ -1,11 +1,25 @@
 import csv
+import io
+import json
 import os
+import shutil
+import tempfile
+import contextlib
+import multiprocessing
+import collections
+from typing import Callable
 
 from src.config.ingestion_config import DataIngestionConfig
 from src.logger import logging
-from src.domain.processing import tokenization
+from src.domain.processing import tokenization, encoded_corpus, external_dedup, length_filter
+from src.utils import file_manager
+
+INGESTION_MANIFEST_VERSION = 1
+WRITE_BUFFER_SIZE = 1 << 20
 
 def __persist_split_data(splits, split):
+        if len(splits[split]['data']) == 0:
+            return
         splits[split]['file'].write('\n'.join(splits[split]['data']) + '\n')
         splits[split]['data'] = []
 
@@ -22,48 +36,66 @@ def split_dataset(raw_data_file_path,
                   test_output,
                   persist_each=10000):
     # type: (str, list, str, str, str, str, str, int) -> None
+    split_dataset_languages(raw_data_file_path,
+                            raw_data_columns,
+                            raw_data_split_column,
+                            [column_to_clean],
+                            [train_output],
+                            [validation_output],
+                            [test_output],
+                            persist_each=persist_each)
+
+# Reads the raw dataset once and writes every language column at the same time.
+# Outputs are named <split_output>.<language>, as in split_dataset.
+def split_dataset_languages(raw_data_file_path,
+                            raw_data_columns,
+                            raw_data_split_column,
+                            columns_to_clean,
+                            train_outputs,
+                            validation_outputs,
+                            test_outputs,
+                            persist_each=10000):
+    # type: (str, list, str, list, list, list, list, int) -> None
     logging.info("Splitting data from {}...".format(raw_data_file_path))
-    train_output_path = train_output + '.' + column_to_clean
-    validation_output_path = validation_output + '.' + column_to_clean
-    test_output_path = test_output + '.' + column_to_clean
-
-    logging.info("Writing train data to {}...".format(train_output_path))
-    logging.info("Writing validation data to {}...".format(validation_output_path))
-    logging.info("Writing test data to {}...".format(test_output_path))
-
-    with open(raw_data_file_path, 'r', encoding='utf-8') as raw_f, \
-         open(train_output_path, 'w', encoding='utf-8') as train_f, \
-         open(validation_output_path, 'w', encoding='utf-8') as validation_f, \
-         open(test_output_path, 'w', encoding='utf-8') as test_f:
-        
-        train_column, validation_column, test_column = raw_data_columns
-        splits = {
-            train_column:      {'data': [], 'file': train_f,      'count': 0},
-            validation_column: {'data': [], 'file': validation_f, 'count': 0},
-            test_column:       {'data': [], 'file': test_f,       'count': 0},
-        }
+    train_column, validation_column, test_column = raw_data_columns
+    split_outputs = {train_column:      train_outputs,
+                     validation_column: validation_outputs,
+                     test_column:       test_outputs}
+
+    with contextlib.ExitStack() as stack:
+        raw_f = stack.enter_context(file_manager.open_file(raw_data_file_path, 'r', encoding='utf-8'))
+        splits = {}
+
+        for split, outputs in split_outputs.items():
+            for output, language in zip(outputs, columns_to_clean):
+                output_path = rename_file(output, language)
+                logging.info("Writing {} data to {}...".format(split, output_path))
+                output_f = stack.enter_context(open(output_path, 'w', encoding='utf-8'))
+                splits[(split, language)] = {'data': [], 'file': output_f, 'count': 0}
 
         reader = csv.reader(raw_f)
         columns = next(reader)
-        column_to_clean_index = columns.index(column_to_clean)
+        columns_to_clean_indices = [(language, columns.index(language)) 
+                                    for language in columns_to_clean]
         split_column_index = columns.index(raw_data_split_column)
 
         for row in reader:
             split = row[split_column_index]
-            splits[split]['count'] += 1
 
-            text = row[column_to_clean_index]
-            splits[split]['data'].append(text)
+            for language, column_index in columns_to_clean_indices:
+                split_language = (split, language)
+                splits[split_language]['count'] += 1
+                splits[split_language]['data'].append(row[column_index])
 
-            if len(splits[split]['data']) % persist_each == 0:
-                __persist_split_data(splits, split)
+                if len(splits[split_language]['data']) % persist_each == 0:
+                    __persist_split_data(splits, split_language)
 
-        for split in splits:
-            __persist_split_data(splits, split)
-                    
-        logging.info("Train data count: {}".format(splits[train_column]['count']))
-        logging.info("Validation data count: {}".format(splits[validation_column]['count']))
-        logging.info("Test data count: {}".format(splits[test_column]['count']))
+        for split_language in splits:
+            __persist_split_data(splits, split_language)
+
+        for split in split_outputs:
+            logging.info("{} data count: {}".format(split.capitalize(), 
+                                                     splits[(split, columns_to_clean[0])]['count']))
     logging.info("Ingestion complete.")
 
 def split_augmented_data(raw_augmented_data_file_path,
@@ -77,90 +109,449 @@ def split_augmented_data(raw_augmented_data_file_path,
                                      for extension in language_extensions[::-1]]
     logging.info("Writing train set to {}...".format(raw_augmented_data_file_paths))
 
-    with open(raw_augmented_data_file_path, 'r', encoding='utf-8') as raw_f, \
-         open(raw_augmented_data_file_paths[0], 'w', encoding='utf-8') as augmented_data1_f, \
-         open(raw_augmented_data_file_paths[1], 'w', encoding='utf-8') as augmented_data2_f:
+    with file_manager.open_file(raw_augmented_data_file_path, 'r', encoding='utf-8') as raw_f, \
+         open(raw_augmented_data_file_paths[0], 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as augmented_data1_f, \
+         open(raw_augmented_data_file_paths[1], 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as augmented_data2_f:
         
-        splits = {extension: {'data': [], 'file': file, 'count': 0} \
-                  for extension, file in 
-                  zip(language_extensions, [augmented_data1_f, augmented_data2_f])}
+        output_files = [augmented_data1_f, augmented_data2_f]
+        count = 0
 
         for line in raw_f:
             splitted_line = line.split(separated_by)
-            for ext, data in zip(language_extensions, splitted_line):
-                splits[ext]['count'] += 1
-                splits[ext]['data'].append(data.replace('\n', ''))
-            
-                if splits[ext]['count'] % persist_each == 0:
-                    __persist_split_data(splits, ext)
-                    logging.info("Vocabulary count for {}: {}"
-                                 .format(ext, splits[ext]['count']))
+            for output_f, data in zip(output_files, splitted_line):
+                output_f.write(data.replace('\n', '') + '\n')
+
+            count += 1
+            if count % persist_each == 0:
+                logging.info("Augmented data count: {}".format(count))
 
     logging.info("Vocabulary creation complete.")
 
+# Opens a shard of the raw file as a text stream with the same newline handling as open()
+def __read_shard(file_path, start, end):
+    # type: (str, int, int) -> io.TextIOWrapper
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        shard = f.read(end - start)
+    return io.TextIOWrapper(io.BytesIO(shard), encoding='utf-8')
+
+def __split_dataset_shard(raw_data_file_path, start, end,
+                          columns_to_clean_indices,
+                          split_column_index,
+                          output_paths):
+    # type: (str, int, int, list, int, dict) -> dict
+    counts = {split_language: 0 for split_language in output_paths}
+
+    with contextlib.ExitStack() as stack:
+        output_files = {split_language: stack.enter_context(open(output_path, 'w', encoding='utf-8'))
+                        for split_language, output_path in output_paths.items()}
+
+        for row in csv.reader(__read_shard(raw_data_file_path, start, end)):
+            split = row[split_column_index]
+
+            for language, column_index in columns_to_clean_indices:
+                counts[(split, language)] += 1
+                output_files[(split, language)].write(row[column_index] + '\n')
+
+    return counts
+
+def __split_augmented_data_shard(raw_augmented_data_file_path, start, end,
+                                 output_paths,
+                                 separated_by):
+    # type: (str, int, int, list, str) -> list
+    counts = [0 for _ in output_paths]
+
+    with contextlib.ExitStack() as stack:
+        output_files = [stack.enter_context(open(output_path, 'w', encoding='utf-8'))
+                        for output_path in output_paths]
+
+        for line in __read_shard(raw_augmented_data_file_path, start, end):
+            splitted_line = line.split(separated_by)
+            for idx, data in enumerate(splitted_line[:len(output_files)]):
+                counts[idx] += 1
+                output_files[idx].write(data.replace('\n', '') + '\n')
+
+    return counts
+
+def __run_shards(shard_function, shards_args, processes_n):
+    # type: (Callable, list, int) -> list
+    with multiprocessing.Pool(processes_n) as pool:
+        return pool.starmap(shard_function, shards_args)
+
+# Parallel version of split_dataset_languages. The raw file is cut into byte ranges 
+# aligned on CSV records, each range is split by a worker and the shards are merged in order.
+def split_dataset_languages_parallel(raw_data_file_path,
+                                     raw_data_columns,
+                                     raw_data_split_column,
+                                     columns_to_clean,
+                                     train_outputs,
+                                     validation_outputs,
+                                     test_outputs,
+                                     processes_n=None,
+                                     persist_each=10000):
+    # type: (str, list, str, list, list, list, list, int, int) -> None
+    if file_manager.is_compressed(raw_data_file_path): # Compressed streams can not be sharded by offset
+        return split_dataset_languages(raw_data_file_path, raw_data_columns, raw_data_split_column, 
+                                       columns_to_clean, train_outputs, validation_outputs, test_outputs,
+                                       persist_each=persist_each)
+
+    processes_n = processes_n or os.cpu_count()
+    logging.info("Splitting data from {} with {} processes...".format(raw_data_file_path, 
+                                                                     processes_n))
+    train_column, validation_column, test_column = raw_data_columns
+    split_outputs = {train_column:      train_outputs,
+                     validation_column: validation_outputs,
+                     test_column:       test_outputs}
+    output_paths = {(split, language): rename_file(output, language)
+                    for split, outputs in split_outputs.items()
+                    for output, language in zip(outputs, columns_to_clean)}
+
+    with open(raw_data_file_path, 'rb') as raw_f:
+        header = raw_f.readline()
+
+    columns = next(csv.reader([header.decode('utf-8')]))
+    columns_to_clean_indices = [(language, columns.index(language)) 
+                                for language in columns_to_clean]
+    split_column_index = columns.index(raw_data_split_column)
+    boundaries = file_manager.get_record_boundaries(raw_data_file_path, 
+                                                    processes_n, 
+                                                    start=len(header), 
+                                                    quotechar=b'"')
+    shards_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(train_outputs[0])))
+
+    try:
+        shards_output_paths = [{split_language: os.path.join(shards_dir, '{}.{}.{}'.format(idx, *split_language))
+                                for split_language in output_paths}
+                               for idx in range(len(boundaries) - 1)]
+        shards_args = [(raw_data_file_path, start, end, 
+                        columns_to_clean_indices, split_column_index, shard_output_paths)
+                       for start, end, shard_output_paths in 
+                       zip(boundaries[:-1], boundaries[1:], shards_output_paths)]
+        shards_counts = __run_shards(__split_dataset_shard, shards_args, processes_n)
+
+        for split_language, output_path in output_paths.items():
+            logging.info("Writing {} data to {}...".format(split_language[0], output_path))
+            file_manager.concatenate_files([shard_output_paths[split_language] 
+                                            for shard_output_paths in shards_output_paths], 
+                                           output_path)
+
+        for split in split_outputs:
+            split_count = sum(shard_counts[(split, columns_to_clean[0])] 
+                              for shard_counts in shards_counts)
+            logging.info("{} data count: {}".format(split.capitalize(), split_count))
+    finally:
+        shutil.rmtree(shards_dir)
+    logging.info("Ingestion complete.")
+
+# Parallel version of split_augmented_data, sharded on line boundaries.
+def split_augmented_data_parallel(raw_augmented_data_file_path,
+                                  augmented_data_output_path,
+                                  language_extensions,
+                                  separated_by='\t',
+                                  processes_n=None,
+                                  persist_each=10000):
+    # type: (str, str, list, str, int, int) -> None
+    if file_manager.is_compressed(raw_augmented_data_file_path): # Compressed streams can not be sharded by offset
+        return split_augmented_data(raw_augmented_data_file_path, augmented_data_output_path, 
+                                    language_extensions, persist_each=persist_each, separated_by=separated_by)
+
+    processes_n = processes_n or os.cpu_count()
+    logging.info("Creating augmented set from {} with {} processes...".format(raw_augmented_data_file_path, 
+                                                                             processes_n))
+    raw_augmented_data_file_paths = [augmented_data_output_path + '.' + extension 
+                                     for extension in language_extensions[::-1]]
+    logging.info("Writing train set to {}...".format(raw_augmented_data_file_paths))
+
+    boundaries = file_manager.get_record_boundaries(raw_augmented_data_file_path, processes_n)
+    shards_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(augmented_data_output_path)))
+
+    try:
+        shards_output_paths = [[os.path.join(shards_dir, '{}.{}'.format(idx, extension)) 
+                                for extension in language_extensions[::-1]]
+                               for idx in range(len(boundaries) - 1)]
+        shards_args = [(raw_augmented_data_file_path, start, end, shard_output_paths, separated_by)
+                       for start, end, shard_output_paths in 
+                       zip(boundaries[:-1], boundaries[1:], shards_output_paths)]
+        shards_counts = __run_shards(__split_augmented_data_shard, shards_args, processes_n)
+
+        for idx, (ext, output_path) in enumerate(zip(language_extensions, raw_augmented_data_file_paths)):
+            file_manager.concatenate_files([shard_output_paths[idx] for shard_output_paths in shards_output_paths], 
+                                           output_path)
+            logging.info("Vocabulary count for {}: {}".format(ext, sum(shard_counts[idx] 
+                                                                       for shard_counts in shards_counts)))
+    finally:
+        shutil.rmtree(shards_dir)
+    logging.info("Vocabulary creation complete.")
+
+def count_tokens(input_path, tokenizer, batch_size=1000, processes_n=1):
+    # type: (str, tokenization.Tokenizer, int, int) -> collections.Counter
+    token_counts = collections.Counter()
+
+    with file_manager.open_file(input_path, 'r', encoding='utf-8') as f:
+        for tokens in tokenizer.tokenize_many(f, batch_size=batch_size, n_process=processes_n):
+            token_counts.update(tokens)
+
+    return token_counts
+
+# Tokens sorted by descending frequency (ties broken alphabetically) after the default vocabulary.
+# max_size includes the default vocabulary.
+def get_vocabulary(token_counts, default_vocabulary=[], min_count=1, max_size=None):
+    # type: (collections.Counter, list, int, int) -> list[tuple[str, int]]
+    vocabulary = [(token, token_counts.get(token, 0)) for token in default_vocabulary]
+    default_tokens = set(default_vocabulary)
+    sorted_tokens = sorted(((token, count) for token, count in token_counts.items() 
+                            if count >= min_count and token not in default_tokens),
+                           key=lambda token_count: (-token_count[1], token_count[0]))
+    vocabulary.extend(sorted_tokens)
+
+    if max_size is not None:
+        vocabulary = vocabulary[:max(max_size, len(default_vocabulary))]
+    return vocabulary
+
+# Formats: 'text' (one token per line), 'counts' (token<TAB>count) and 'yaml' (Marian token: id)
+def save_vocabulary(vocabulary, output_path, vocabulary_format='text'):
+    # type: (list[tuple[str, int]], str, str) -> None
+    line_formats = {'text':   lambda idx, token, count: token,
+                    'counts': lambda idx, token, count: '{}\t{}'.format(token, count),
+                    'yaml':   lambda idx, token, count: '{}: {}'.format(json.dumps(token, ensure_ascii=False), idx)}
+    line_format = line_formats[vocabulary_format]
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for idx, (token, count) in enumerate(vocabulary):
+            f.write(line_format(idx, token, count) + '\n')
+
 def create_vocabulary(input_path, 
                       output_path, 
                       tokenizer_type='spacy', 
-                      default_vocabulary=[]):
-    # type: (str, str, str, list) -> None
-    sentences = list()
+                      default_vocabulary=[],
+                      min_count=1,
+                      max_size=None,
+                      vocabulary_format='text',
+                      processes_n=1,
+                      tokenization_cache_path=None):
+    # type: (str, str, str, list, int, int, str, int, str) -> None
+    logging.info("Creating vocabulary from {}...".format(input_path))
+    with tokenization.get_tokenizer(tokenizer=tokenizer_type, cache_path=tokenization_cache_path) as tokenizer:
+        token_counts = count_tokens(input_path, tokenizer, processes_n=processes_n)
+    vocabulary = get_vocabulary(token_counts, 
+                                default_vocabulary=default_vocabulary, 
+                                min_count=min_count, 
+                                max_size=max_size)
+    save_vocabulary(vocabulary, output_path, vocabulary_format=vocabulary_format)
+    logging.info("Vocabulary of size {} ({} distinct tokens) written to {}".format(len(vocabulary), 
+                                                                                   len(token_counts), 
+                                                                                   output_path))
+    
+# Writes <corpus_path>.ids.npy and <corpus_path>.offsets.npy with the token ids of the corpus
+def encode_corpus(corpus_path, 
+                  vocabulary_path, 
+                  tokenizer_type='spacy', 
+                  vocabulary_format='text',
+                  processes_n=1,
+                  tokenization_cache_path=None):
+    # type: (str, str, str, str, int, str) -> None
+    logging.info("Encoding {} with vocabulary {}...".format(corpus_path, vocabulary_path))
+    vocabulary = encoded_corpus.load_vocabulary(vocabulary_path, vocabulary_format=vocabulary_format)
+    with tokenization.get_tokenizer(tokenizer=tokenizer_type, cache_path=tokenization_cache_path) as tokenizer:
+        sentences_n, tokens_n = encoded_corpus.encode_corpus(corpus_path, corpus_path, 
+                                                             vocabulary, tokenizer, 
+                                                             processes_n=processes_n)
+    logging.info("Encoded {} sentences and {} tokens".format(sentences_n, tokens_n))
 
-    with open(input_path, 'r', encoding='utf-8') as f:
-        sentences = f.readlines()
+# Repeated augmented pairs are removed with an external sort bounded by memory_mb
+def deduplicate_augmented_data(augmented_data_output_path, 
+                               language_extensions, 
+                               memory_mb=512):
+    # type: (str, list, int) -> None
+    src_path, tgt_path = [augmented_data_output_path + '.' + extension 
+                          for extension in language_extensions]
 
-    tokenizer = tokenization.get_tokenizer(tokenizer=tokenizer_type)
-    tokens = [token for sentence in sentences 
-                    for token in tokenizer.tokenize(sentence)]
-    tokens = list(set(tokens))
+    logging.info("Deduplicating augmented set {} with {} MB...".format(augmented_data_output_path, memory_mb))
+    lines_n, kept_n = external_dedup.deduplicate_corpus_inplace(src_path, tgt_path, 
+                                                                memory_budget=memory_mb * (1 << 20))
+    logging.info("Removed {} duplicates out of {} augmented pairs".format(lines_n - kept_n, lines_n))
 
-    with open(output_path, 'w', encoding='utf-8') as f:
-        if len(default_vocabulary) > 0:
-            f.write('\n'.join(default_vocabulary))
-            f.write('\n')
-        f.write('\n'.join(tokens))
-    
+def is_length_filter_enabled(data_ingestion_config):
+    # type: (DataIngestionConfig) -> bool
+    return any(limit is not None for limit in [data_ingestion_config.min_length,
+                                               data_ingestion_config.max_length,
+                                               data_ingestion_config.max_length_ratio])
+
+# Removes the pairs out of the configured token lengths and ratio, validation and test sets are never filtered
+def filter_pair_lengths(outputs, language_extensions, data_ingestion_config):
+    # type: (list, list, DataIngestionConfig) -> dict
+    src_path, tgt_path = [rename_file(output, extension) for output, extension in zip(outputs, language_extensions)]
+
+    logging.info("Filtering pair lengths of {} and {}...".format(src_path, tgt_path))
+    report = length_filter.filter_corpus_inplace(src_path, tgt_path, 
+                                                 min_length=data_ingestion_config.min_length,
+                                                 max_length=data_ingestion_config.max_length,
+                                                 max_ratio=data_ingestion_config.max_length_ratio)
+    logging.info("Kept {} out of {} pairs, removed {}".format(report['kept'], report['pairs'], report['removed']))
+    return report
+
+# Train and augmented files are copied in blocks, only adding a newline where a file does not end with one
 def append_augmented_data(augmented_filename,
                          train_files,
                          language_extensions,
-                         output_filename,
-                         persist_each):
-    # type: (str, list, list, str, int) -> None
-    augmented_files = [augmented_filename + '.' + extension 
+                         output_filename):
+    # type: (str, list, list, str) -> None
+    augmented_files = [file_manager.find_file(augmented_filename + '.' + extension)
                        for extension in language_extensions[::-1]]
-    train_files     = [train_file + '.' + extension 
+    train_files     = [file_manager.find_file(train_file + '.' + extension)
                        for train_file, extension in 
                        zip(train_files, language_extensions)][::-1]
     output_files    = [output_filename + '.' + extension 
                        for extension in language_extensions[::-1]]
 
     logging.info("Writing augmented and train data to {}...".format(output_filename))
-    with open(augmented_files[0], 'r', encoding='utf-8') as augmented_data1_f, \
-         open(augmented_files[1], 'r', encoding='utf-8') as augmented_data2_f, \
-         open(train_files[0], 'r', encoding='utf-8') as train_data1_f, \
-         open(train_files[1], 'r', encoding='utf-8') as train_data2_f, \
-         open(output_files[0], 'w', encoding='utf-8') as full_data1_f, \
-         open(output_files[1], 'w', encoding='utf-8') as full_data2_f:
-        
-        splits = {extension: {'data': [], 'file': file, 'count': 0} \
-                  for extension, file in 
-                  zip(language_extensions, [full_data1_f, full_data2_f])}
-
-        for ext, train_f, aug_f in zip(language_extensions, 
-                                       [train_data1_f, train_data2_f], 
-                                       [augmented_data1_f, augmented_data2_f]):
-            for file in [train_f, aug_f]:
-                for line in file:
-                    splits[ext]['count'] += 1
-                    splits[ext]['data'].append(line.replace('\n', ''))
-        
-                    if splits[ext]['count'] % persist_each == 0:
-                        __persist_split_data(splits, ext)
-            logging.info("Vocabulary count for {}: {}".format(ext, splits[ext]['count']))
+    for train_file, augmented_file, output_file in zip(train_files, augmented_files, output_files):
+        file_manager.concatenate_files([train_file, augmented_file], output_file)
+        logging.info("Written {} bytes to {}".format(os.path.getsize(output_file), output_file))
+
+# Source and target paths of every parallel corpus written by the ingestion
+def get_ingestion_corpora(data_ingestion_config):
+    # type: (DataIngestionConfig) -> list[list[str]]
+    outputs = [[data_ingestion_config.train_data_src_dir, data_ingestion_config.train_data_tgt_dir],
+               [data_ingestion_config.validation_data_src_dir, data_ingestion_config.validation_data_tgt_dir],
+               [data_ingestion_config.test_data_src_dir, data_ingestion_config.test_data_tgt_dir]]
+
+    if data_ingestion_config.ingest_augmented_data:
+        outputs.extend([2*[data_ingestion_config.augmented_data_output_path],
+                        2*[data_ingestion_config.full_augmented_data_output_path]])
+
+    return [[rename_file(output, language) for output, language in 
+             zip(language_outputs, data_ingestion_config.raw_data_columns_to_clean)]
+            for language_outputs in outputs]
+
+def get_ingestion_outputs(data_ingestion_config):
+    # type: (DataIngestionConfig) -> list[str]
+    languages = data_ingestion_config.raw_data_columns_to_clean
+    corpora = get_ingestion_corpora(data_ingestion_config)
+    vocab_paths = [data_ingestion_config.vocab_src_dir, data_ingestion_config.vocab_tgt_dir]
+    vocabularies = [vocab_paths]
+
+    if data_ingestion_config.ingest_augmented_data:
+        vocabularies.append([os.path.join(os.path.dirname(vocab_path), 'full_augmented_vocab')
+                             for vocab_path in vocab_paths])
+
+    output_paths = [path for corpus_paths in corpora for path in corpus_paths]
+    if data_ingestion_config.output_compression is not None:
+        output_paths.extend([path + data_ingestion_config.output_compression for path in output_paths])
+    output_paths.extend([rename_file(vocab_path, language) for language_vocab_paths in vocabularies 
+                         for vocab_path, language in zip(language_vocab_paths, languages)])
 
-    return
+    if data_ingestion_config.encode_corpora:
+        split_paths = [path for corpus_paths in corpora[:3] for path in corpus_paths]
+        output_paths.extend([split_path + suffix for split_path in split_paths 
+                             for suffix in [encoded_corpus.IDS_SUFFIX, encoded_corpus.OFFSETS_SUFFIX]])
+    return output_paths
 
-# TODO: Check that length of src and target are equal.
+# Compares the line counts of a source and target corpus. 
+# Returns the first line (1-based) that has no counterpart in the other file, or None if they are aligned.
+def check_alignment(src_path, tgt_path):
+    # type: (str, str) -> int
+    src_lines_n = file_manager.count_lines(src_path)
+    tgt_lines_n = file_manager.count_lines(tgt_path)
+
+    if src_lines_n == tgt_lines_n:
+        return None
+
+    first_misaligned_line = min(src_lines_n, tgt_lines_n) + 1
+    longer_path = src_path if src_lines_n > tgt_lines_n else tgt_path
+    logging.error("Misaligned corpora: {} has {} lines and {} has {} lines. "
+                  "Line {} of {} has no counterpart".format(src_path, src_lines_n, 
+                                                            tgt_path, tgt_lines_n, 
+                                                            first_misaligned_line, longer_path))
+    return first_misaligned_line
+
+def check_ingestion_alignment(data_ingestion_config):
+    # type: (DataIngestionConfig) -> None
+    misaligned_corpora = [(src_path, tgt_path) for src_path, tgt_path in 
+                          get_ingestion_corpora(data_ingestion_config)
+                          if check_alignment(src_path, tgt_path) is not None]
+
+    if len(misaligned_corpora) > 0:
+        raise ValueError("Ingestion produced misaligned corpora: {}".format(misaligned_corpora))
+    logging.info("All ingested corpora are aligned")
+
+# Corpora are processed uncompressed and only compressed once the ingestion is complete, vocabularies are kept as is.
+# The plain corpora are kept: the train-sets and valid-sets flags of Marian point to them.
+def compress_ingestion_corpora(data_ingestion_config):
+    # type: (DataIngestionConfig) -> None
+    for corpus_paths in get_ingestion_corpora(data_ingestion_config):
+        for corpus_path in corpus_paths:
+            compressed_path = file_manager.compress_file(corpus_path, data_ingestion_config.output_compression, 
+                                                         remove=False)
+            logging.info("Compressed {} to {}".format(corpus_path, compressed_path))
+
+# Content hashes of the ingestion inputs and the configuration fields that change its outputs
+def get_ingestion_manifest(data_ingestion_config):
+    # type: (DataIngestionConfig) -> dict
+    raw_data_file_paths = [data_ingestion_config.raw_data_file_path]
+    if data_ingestion_config.ingest_augmented_data:
+        raw_data_file_paths.append(data_ingestion_config.raw_augmented_data_file_path)
+
+    return {'manifest_version': INGESTION_MANIFEST_VERSION,
+            'inputs': {path: file_manager.get_file_hash(path) for path in raw_data_file_paths},
+            'outputs': get_ingestion_outputs(data_ingestion_config),
+            'config': {'raw_data_columns_to_clean': data_ingestion_config.raw_data_columns_to_clean,
+                       'raw_data_split_column': data_ingestion_config.raw_data_split_column,
+                       'raw_data_train_column': data_ingestion_config.raw_data_train_column,
+                       'raw_data_validation_column': data_ingestion_config.raw_data_validation_column,
+                       'raw_data_test_column': data_ingestion_config.raw_data_test_column,
+                       'ingest_augmented_data': data_ingestion_config.ingest_augmented_data,
+                       'default_vocabulary': data_ingestion_config.default_vocabulary,
+                       'vocabulary_min_count': data_ingestion_config.vocabulary_min_count,
+                       'vocabulary_max_size': data_ingestion_config.vocabulary_max_size,
+                       'vocabulary_format': data_ingestion_config.vocabulary_format,
+                       'encode_corpora': data_ingestion_config.encode_corpora,
+                       'output_compression': data_ingestion_config.output_compression,
+                       'deduplicate_augmented_data': data_ingestion_config.deduplicate_augmented_data,
+                       'min_length': data_ingestion_config.min_length,
+                       'max_length': data_ingestion_config.max_length,
+                       'max_length_ratio': data_ingestion_config.max_length_ratio}}
+
+def load_ingestion_manifest(manifest_path):
+    # type: (str) -> dict
+    if not os.path.isfile(manifest_path):
+        return None
+
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_ingestion_manifest(manifest, manifest_path):
+    # type: (dict, str) -> None
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=4)
+
+def is_ingestion_up_to_date(manifest, manifest_path):
+    # type: (dict, str) -> bool
+    previous_manifest = load_ingestion_manifest(manifest_path)
+    outputs_exist = all(os.path.isfile(output) for output in manifest['outputs'])
+    return previous_manifest == manifest and outputs_exist
+
+# Ingestion is skipped when the inputs and the configuration did not change since the last run
 def ingest_data(data_ingestion_config):
+    # type: (DataIngestionConfig,) -> None
+    manifest_path = data_ingestion_config.manifest_path
+    manifest = get_ingestion_manifest(data_ingestion_config)
+
+    if not data_ingestion_config.force_ingest and \
+       is_ingestion_up_to_date(manifest, manifest_path):
+        logging.info("Ingestion skipped, inputs are unchanged since {}".format(manifest_path))
+        return
+
+    if os.path.isfile(manifest_path):
+        os.remove(manifest_path)
+
+    run_ingestion(data_ingestion_config)
+    check_ingestion_alignment(data_ingestion_config)
+    if data_ingestion_config.output_compression is not None:
+        compress_ingestion_corpora(data_ingestion_config)
+    save_ingestion_manifest(manifest, manifest_path)
+
+def run_ingestion(data_ingestion_config):
         # type: (DataIngestionConfig,) -> None
         columns_to_ingest = data_ingestion_config.raw_data_columns_to_clean
         ingest_augmented_data = data_ingestion_config.ingest_augmented_data
@@ -168,6 +559,7 @@ def ingest_data(data_ingestion_config):
         augmented_data_output_path = data_ingestion_config.augmented_data_output_path
         full_augmented_data_output_path = data_ingestion_config.full_augmented_data_output_path
         persist_each = data_ingestion_config.persist_each
+        processes_n = data_ingestion_config.processes_n
         
         train_split_outputs = [data_ingestion_config.train_data_src_dir, 
                                data_ingestion_config.train_data_tgt_dir]
@@ -181,15 +573,31 @@ def ingest_data(data_ingestion_config):
                             data_ingestion_config.raw_data_validation_column, 
                             data_ingestion_config.raw_data_test_column]
 
-        zipped_splits = zip(train_split_outputs, validation_split_outputs, 
-                            test_split_outputs, columns_to_ingest)
-        for train_dir, validation_dir, test_dir, column_to_ingest in zipped_splits:
-            split_dataset(data_ingestion_config.raw_data_file_path,
-                          raw_data_columns,
-                          data_ingestion_config.raw_data_split_column,
-                          column_to_ingest,
-                          train_dir, validation_dir, test_dir,
-                          persist_each=persist_each)
+        if processes_n is not None and processes_n > 1:
+            split_dataset_languages_parallel(data_ingestion_config.raw_data_file_path,
+                                             raw_data_columns,
+                                             data_ingestion_config.raw_data_split_column,
+                                             columns_to_ingest,
+                                             train_split_outputs, 
+                                             validation_split_outputs, 
+                                             test_split_outputs,
+                                             processes_n=processes_n,
+                                             persist_each=persist_each)
+        else:
+            split_dataset_languages(data_ingestion_config.raw_data_file_path,
+                                    raw_data_columns,
+                                    data_ingestion_config.raw_data_split_column,
+                                    columns_to_ingest,
+                                    train_split_outputs, 
+                                    validation_split_outputs, 
+                                    test_split_outputs,
+                                    persist_each=persist_each)
+
+        length_filter_reports = []
+        if is_length_filter_enabled(data_ingestion_config):
+            length_filter_reports.append(filter_pair_lengths(train_split_outputs, 
+                                                             columns_to_ingest, 
+                                                             data_ingestion_config))
 
         for train_dir, vocab_output, language in zip(train_split_outputs, 
                                                      vocab_outputs, 
@@ -197,18 +605,49 @@ def ingest_data(data_ingestion_config):
             train_file = rename_file(train_dir, language)
             vocab_file = rename_file(vocab_output, language)
             create_vocabulary(train_file, vocab_file, 
-                default_vocabulary=data_ingestion_config.default_vocabulary)
+                default_vocabulary=data_ingestion_config.default_vocabulary,
+                min_count=data_ingestion_config.vocabulary_min_count,
+                max_size=data_ingestion_config.vocabulary_max_size,
+                vocabulary_format=data_ingestion_config.vocabulary_format,
+                processes_n=processes_n or 1,
+                tokenization_cache_path=data_ingestion_config.tokenization_cache_path)
+
+        if data_ingestion_config.encode_corpora:
+            split_outputs = [train_split_outputs, validation_split_outputs, test_split_outputs]
+            for language_outputs in split_outputs:
+                for split_output, vocab_output, language in zip(language_outputs, 
+                                                                vocab_outputs, 
+                                                                columns_to_ingest):
+                    encode_corpus(rename_file(split_output, language), 
+                                  rename_file(vocab_output, language),
+                                  vocabulary_format=data_ingestion_config.vocabulary_format,
+                                  processes_n=processes_n or 1,
+                                  tokenization_cache_path=data_ingestion_config.tokenization_cache_path)
 
         if ingest_augmented_data:
-            split_augmented_data(raw_augmented_data_file_path, 
-                                 augmented_data_output_path, 
-                                 columns_to_ingest,
-                                 persist_each=persist_each)
+            if processes_n is not None and processes_n > 1:
+                split_augmented_data_parallel(raw_augmented_data_file_path, 
+                                              augmented_data_output_path, 
+                                              columns_to_ingest,
+                                              processes_n=processes_n,
+                                              persist_each=persist_each)
+            else:
+                split_augmented_data(raw_augmented_data_file_path, 
+                                     augmented_data_output_path, 
+                                     columns_to_ingest,
+                                     persist_each=persist_each)
+            if data_ingestion_config.deduplicate_augmented_data:
+                deduplicate_augmented_data(augmented_data_output_path, 
+                                           columns_to_ingest, 
+                                           memory_mb=data_ingestion_config.dedup_memory_mb)
+            if is_length_filter_enabled(data_ingestion_config):
+                length_filter_reports.append(filter_pair_lengths(2*[augmented_data_output_path], 
+                                                                 columns_to_ingest, 
+                                                                 data_ingestion_config))
             append_augmented_data(augmented_data_output_path, 
                                   train_split_outputs, 
                                   columns_to_ingest, 
-                                  full_augmented_data_output_path, 
-                                  persist_each=persist_each)
+                                  full_augmented_data_output_path)
 
             for vocab_path, language in zip(vocab_outputs, columns_to_ingest):
                 vocabulary_dir = os.path.dirname(vocab_path)
@@ -219,4 +658,13 @@ def ingest_data(data_ingestion_config):
                 vocab_output_path = rename_file(full_augmented_vocab_path, 
                                                 language)
                 create_vocabulary(input_corpus_path, vocab_output_path, 
-                    default_vocabulary=data_ingestion_config.default_vocabulary)
\ No newline at end of file
+                    default_vocabulary=data_ingestion_config.default_vocabulary,
+                    min_count=data_ingestion_config.vocabulary_min_count,
+                    max_size=data_ingestion_config.vocabulary_max_size,
+                    vocabulary_format=data_ingestion_config.vocabulary_format,
+                    processes_n=processes_n or 1,
+                    tokenization_cache_path=data_ingestion_config.tokenization_cache_path)
+
+        if len(length_filter_reports) > 0:
+            length_filter.save_report(length_filter_reports, data_ingestion_config.length_filter_report_path)
+            logging.info("Length filter report saved to {}".format(data_ingestion_config.length_filter_report_path))
\ No newline at end of file
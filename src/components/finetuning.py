@@ -1,6 +1,8 @@
 import os
 
 from src.config.command_config import CommandConfig
+from src.domain.processing import subword_vocabulary
+from src.utils import parsing
 
 VALIDATION_FLAGS = ['valid-sets', 'valid-translation-output', 'valid-metrics']
 
@@ -35,6 +37,33 @@ def create_finetuning_vocabulary_train_config(command_config):
         
     return finetuning_vocabulary_command_config
 
+# The vocabularies can be trained without Marian when the flags give their corpora and sizes
+def can_create_finetuning_vocabularies(command_config):
+    # type: (CommandConfig) -> bool
+    flags = command_config.flags
+    return len(flags.get('train-sets', [])) >= 2 and len(flags.get('dim-vocabs', [])) > 0
+
+# Trains the sentencepiece vocabularies in process instead of running Marian for an epoch to create them
+def create_finetuning_vocabularies(command_config, use_sentencepiece=True):
+    # type: (CommandConfig, bool) -> list[str]
+    src_vocab, trg_vocab = command_config.flags['vocabs']
+    src_train_set, trg_train_set = command_config.flags['train-sets'][:2]
+    src_dim_vocab, trg_dim_vocab = parsing.get_vocabulary_sizes(command_config.flags)
+    max_lines = int(command_config.flags.get('sentencepiece-max-lines',
+                                             [subword_vocabulary.DEFAULT_MAX_LINES])[0])
+    options = ' '.join(command_config.flags.get('sentencepiece-options', [])).strip('"\'')
+
+    # Marian trains a joint vocabulary on both sides when they share the same file
+    vocabularies = [(src_vocab, [src_train_set, trg_train_set], src_dim_vocab)] if src_vocab == trg_vocab \
+        else [(src_vocab, [src_train_set], src_dim_vocab), (trg_vocab, [trg_train_set], trg_dim_vocab)]
+
+    for vocab, train_sets, dim_vocab in vocabularies:
+        subword_vocabulary.train_subword_vocabulary(train_sets, vocab, dim_vocab,
+                                                    max_lines=max_lines,
+                                                    options=options,
+                                                    use_sentencepiece=use_sentencepiece)
+    return [vocab for vocab, _, _ in vocabularies]
+
 def create_finetuning_train_config(command_config, augmented_sets, finetuning_epochs):
     # type: (CommandConfig, list, int) -> CommandConfig
     finetuning_command_config = command_config.copy(deep=True)
@@ -2,8 +2,6 @@ import json
 import itertools
 import random
 
-import scipy.stats as stats
-
 from src.utils.parsing import deep_copy_flags, \
     handle_boolean_flags, \
     rename_model_file, \
@@ -27,6 +25,8 @@ def get_hyperparameters_flags(default_flags,
 
 def get_random_flags(default_flags, hyperparameters_file, max_iters, seed=None):
     # type: (dict[str, list], str, int, int) -> list[dict[str, list[str]]]
+    import scipy.stats as stats # Imported here as it takes more than a second to load
+
     random_flags = []
     random_instance = random.Random(); 
     random_instance.seed(seed) # random.seed is not enough to ensure reproducibility
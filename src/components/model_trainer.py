@@ -25,8 +25,9 @@ def validate(flags,
              after_epochs=None,
              validation_log=None,
              valid_tgt=None,
-             validation_translation_output=None,):
-    # type: (dict[str, list[str]], str, str, list[str], str, str, str, str, str, str) -> list
+             validation_translation_output=None,
+             reference_cache_dir=None):
+    # type: (dict[str, list[str]], str, str, list[str], str, str, str, str, str, str, str) -> list
     evaluation_file = os.path.join(base_dir_evaluation, command_name)
     validation_translation_output_path = None
     if validation_translation_output is not None:
@@ -40,7 +41,8 @@ def validate(flags,
                                    metrics=validation_metrics,
                                    validation_log=validation_log,
                                    translation_output=validation_translation_output_path,
-                                   reference=valid_tgt)
+                                   reference=valid_tgt,
+                                   reference_cache_dir=reference_cache_dir)
     return results
 
 def validation_enabled(validation_metrics, 
@@ -101,8 +103,9 @@ def training_with_artificial_epochs(marian_config,
                                     command_name,
                                     save_checkpoints,
                                     validate_each_epochs,
-                                    early_stopping):
-    # type: (command_config.CommandConfig, bool, dict[str, list[str]], str, str, int, str, str, str, str, list[str], str, bool, int, int) -> None
+                                    early_stopping,
+                                    reference_cache_dir=None):
+    # type: (command_config.CommandConfig, bool, dict[str, list[str]], str, str, int, str, str, str, str, list[str], str, bool, int, int, str) -> None
     train_from_epoch, after_epochs, validate_each_epochs = \
         map(int, (train_from_epoch, after_epochs, validate_each_epochs))
     artificial_epochs = after_epochs//validate_each_epochs
@@ -144,7 +147,8 @@ def training_with_artificial_epochs(marian_config,
                                       valid_tgt=valid_tgt,
                                       model_dir=model_dir, 
                                       validation_metrics=validation_metrics, 
-                                      command_name=command_name)
+                                      command_name=command_name,
+                                      reference_cache_dir=reference_cache_dir)
 
             if early_stopping is not None:
                 current_most_important_scores = current_scores[early_stopping_metric_criteria]
@@ -195,6 +199,7 @@ def train(command_config):
     save_checkpoints = marian_config.save_checkpoints
     command_name = marian_config.command_name
     not_delete_model_after = marian_config.not_delete_model_after
+    reference_cache_dir = marian_config.reference_cache_dir
     artificial_epoch_training = validate_each_epochs is not None
     model_base_dir = os.path.dirname(model_dir)
     is_validation_enabled = validation_enabled(validation_metrics, 
@@ -226,7 +231,8 @@ def train(command_config):
                                         command_name=command_name,
                                         save_checkpoints=save_checkpoints,
                                         validate_each_epochs=validate_each_epochs,
-                                        early_stopping=early_stopping)
+                                        early_stopping=early_stopping,
+                                        reference_cache_dir=reference_cache_dir)
 
     if not not_delete_model_after:
         file_manager.delete_files(model_base_dir)
\ No newline at end of file
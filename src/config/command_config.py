@@ -17,8 +17,9 @@ class CommandConfig:
                  results_dir=None, 
                  base_dir_evaluation=None,
                  not_delete_model_after=False,
-                 run_id=None):
-        # type: (str, str, dict, str, str, int, list[str], bool, str, str, bool, str) -> None
+                 run_id=None,
+                 reference_cache_dir=None):
+        # type: (str, str, dict, str, str, int, list[str], bool, str, str, bool, str, str) -> None
         self.command_name = command_name
         self.command_path = command_path
         self.flags = flags
@@ -31,6 +32,7 @@ class CommandConfig:
         self.base_dir_evaluation = base_dir_evaluation
         self.not_delete_model_after = not_delete_model_after
         self.run_id = run_id
+        self.reference_cache_dir = reference_cache_dir
 
     def copy(self, deep=False):
         # type: (bool) -> CommandConfig
@@ -45,11 +47,12 @@ class CommandConfig:
                              results_dir=self.results_dir,
                              base_dir_evaluation=self.base_dir_evaluation,
                              not_delete_model_after=self.not_delete_model_after,
-                             run_id=self.run_id)
+                             run_id=self.run_id,
+                             reference_cache_dir=self.reference_cache_dir)
     
     def __str__(self):
         # type: () -> str
-        return "CommandConfig(command_name={}, command_path={}, flags={}, flag_separator={}, train_from_epoch={} validate_each_epochs={}, validation_metrics={}, save_checkpoints={}, results_dir={}, base_dir_evaluation={}, not_delete_model_after={}, run_id={})".format(
+        return "CommandConfig(command_name={}, command_path={}, flags={}, flag_separator={}, train_from_epoch={} validate_each_epochs={}, validation_metrics={}, save_checkpoints={}, results_dir={}, base_dir_evaluation={}, not_delete_model_after={}, run_id={}, reference_cache_dir={})".format(
             self.command_name,
             self.command_path,
             self.flags,
@@ -61,7 +64,8 @@ class CommandConfig:
             self.results_dir,
             self.base_dir_evaluation,
             self.not_delete_model_after,
-            self.run_id)
+            self.run_id,
+            self.reference_cache_dir)
     
     def __repr__(self):
         # type: () -> str
@@ -74,8 +78,9 @@ def get_command_config(command_path,
                        save_checkpoints=False, 
                        results_dir=None, 
                        not_delete_model_after=False,
-                       run_id=None):
-    # type: (str, dict, int, list[str], bool, str, bool, str) -> CommandConfig
+                       run_id=None,
+                       reference_cache_dir=None):
+    # type: (str, dict, int, list[str], bool, str, bool, str, str) -> CommandConfig
     config_variables = load_config_variables()
     return CommandConfig(command_name=config_variables[COMMAND_NAME],
                          command_path=command_path,
@@ -87,4 +92,5 @@ def get_command_config(command_path,
                          results_dir=results_dir,
                          base_dir_evaluation=config_variables[BASE_DIR_EVALUATION],
                          not_delete_model_after=not_delete_model_after,
-                         run_id=run_id)
\ No newline at end of file
+                         run_id=run_id,
+                         reference_cache_dir=reference_cache_dir)
\ No newline at end of file
@@ -33,14 +33,42 @@ class DataIngestionConfig:
                  validation_column,
                  test_column,
                  default_vocabulary=[],
-                 persist_each=None):
-        # type: (str, str, str, str, str, str, str, str, str, str, str, str, list, str, str, str, str, str, list, int) -> None
+                 persist_each=None,
+                 processes_n=None,
+                 vocabulary_min_count=1,
+                 vocabulary_max_size=None,
+                 vocabulary_format='text',
+                 force_ingest=False,
+                 encode_corpora=False,
+                 deduplicate_augmented_data=False,
+                 dedup_memory_mb=512,
+                 min_length=None,
+                 max_length=None,
+                 max_length_ratio=None,
+                 output_compression=None,
+                 tokenization_cache_path=None):
+        # type: (str, str, str, str, str, str, str, str, str, str, str, str, list, str, str, str, str, str, list, int, int, int, int, str, bool, bool, bool, int, int, int, float, str, str) -> None
         self.default_vocabulary = default_vocabulary
+        self.vocabulary_min_count = vocabulary_min_count
+        self.vocabulary_max_size = vocabulary_max_size
+        self.vocabulary_format = vocabulary_format
+        self.force_ingest = force_ingest
+        self.encode_corpora = encode_corpora
+        self.deduplicate_augmented_data = deduplicate_augmented_data
+        self.dedup_memory_mb = dedup_memory_mb
+        self.min_length = min_length
+        self.max_length = max_length
+        self.max_length_ratio = max_length_ratio
+        self.output_compression = output_compression # Extension of the compressed copies, the plain corpora are kept
+        self.tokenization_cache_path = tokenization_cache_path
         self.persist_each = persist_each
+        self.processes_n = processes_n
         self.artifacts_dir = artifacts_dir
 
         data_dir = os.path.join(artifacts_dir, 'data')
         self.data_dir = data_dir
+        self.manifest_path = os.path.join(data_dir, 'ingestion_manifest.json')
+        self.length_filter_report_path = os.path.join(data_dir, 'length_filter_report.json')
         self.raw_data_dir = os.path.join(data_dir, 'raw')
         self.corpora_dir = os.path.join(data_dir, 'corpora')
         self.vocabulary_dir = os.path.join(data_dir, 'vocabulary')
@@ -75,8 +103,21 @@ class DataIngestionConfig:
 
     def __str__(self):
         # type: () -> str
-        return "DataIngestionConfig(persist_each={}, artifacts_dir={}, data_dir={}, raw_data_dir={}, corpora_dir={}, vocabulary_dir={}, train_data_dir={}, validation_data_dir={}, test_data_dir={}, test_data_src_dir={}, test_data_tgt_dir={}, raw_data_file_path={}, raw_data_columns_to_clean={}, raw_data_split_column={}, raw_data_train_column={}, raw_data_validation_column={}, raw_data_test_column={})".format(
+        return "DataIngestionConfig(persist_each={}, processes_n={}, vocabulary_min_count={}, vocabulary_max_size={}, vocabulary_format={}, force_ingest={}, encode_corpora={}, deduplicate_augmented_data={}, dedup_memory_mb={}, min_length={}, max_length={}, max_length_ratio={}, output_compression={}, tokenization_cache_path={}, artifacts_dir={}, data_dir={}, raw_data_dir={}, corpora_dir={}, vocabulary_dir={}, train_data_dir={}, validation_data_dir={}, test_data_dir={}, test_data_src_dir={}, test_data_tgt_dir={}, raw_data_file_path={}, raw_data_columns_to_clean={}, raw_data_split_column={}, raw_data_train_column={}, raw_data_validation_column={}, raw_data_test_column={})".format(
             self.persist_each,
+            self.processes_n,
+            self.vocabulary_min_count,
+            self.vocabulary_max_size,
+            self.vocabulary_format,
+            self.force_ingest,
+            self.encode_corpora,
+            self.deduplicate_augmented_data,
+            self.dedup_memory_mb,
+            self.min_length,
+            self.max_length,
+            self.max_length_ratio,
+            self.output_compression,
+            self.tokenization_cache_path,
             self.artifacts_dir,
             self.data_dir,
             self.raw_data_dir,
@@ -103,8 +144,21 @@ def get_data_ingestion_config(config_variables,
                               validation_output_dirs,
                               vocab_dirs,
                               ingest_augmented_data,
-                              persist_each=None):
-    # type: (dict, list, list, list, str, int) -> DataIngestionConfig
+                              persist_each=None,
+                              processes_n=None,
+                              vocabulary_min_count=1,
+                              vocabulary_max_size=None,
+                              vocabulary_format='text',
+                              force_ingest=False,
+                              encode_corpora=False,
+                              deduplicate_augmented_data=False,
+                              dedup_memory_mb=512,
+                              min_length=None,
+                              max_length=None,
+                              max_length_ratio=None,
+                              output_compression=None,
+                              tokenization_cache_path=None):
+    # type: (dict, list, list, list, str, int, int, int, int, str, bool, bool, bool, int, int, int, float, str, str) -> DataIngestionConfig
     train_output_src_dir, train_output_dst_dir = train_output_dirs
     validation_output_src_dir, validation_output_dst_dir = validation_output_dirs
     vocab_src_output_filename, vocab_tgt_output_filename = vocab_dirs
@@ -127,4 +181,17 @@ def get_data_ingestion_config(config_variables,
                                validation_column=config_variables[RAW_DATA_VALIDATION_COLUMN],
                                test_column=config_variables[RAW_DATA_TEST_COLUMN],
                                default_vocabulary=config_variables[DEFAULT_VOCABULARY],
-                               persist_each=persist_each)
\ No newline at end of file
+                               persist_each=persist_each,
+                               processes_n=processes_n,
+                               vocabulary_min_count=vocabulary_min_count,
+                               vocabulary_max_size=vocabulary_max_size,
+                               vocabulary_format=vocabulary_format,
+                               force_ingest=force_ingest,
+                               encode_corpora=encode_corpora,
+                               deduplicate_augmented_data=deduplicate_augmented_data,
+                               dedup_memory_mb=dedup_memory_mb,
+                               min_length=min_length,
+                               max_length=max_length,
+                               max_length_ratio=max_length_ratio,
+                               output_compression=output_compression,
+                               tokenization_cache_path=tokenization_cache_path)
\ No newline at end of file
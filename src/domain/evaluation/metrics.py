@@ -6,8 +6,7 @@ from typing import Callable
 import collections
 
 from src.utils import file_manager, parsing, arrays, wrappers
-
-import sacrebleu
+from src.domain.evaluation import reference_cache
 
 LOG_METRICS_REGEX = r'''\[(\d{4})-(\d{2})-(\d{2})\s(\d{2}):(\d{2}):(\d{2})\]\s
                         \[valid\]\s
@@ -16,6 +15,12 @@ LOG_METRICS_REGEX = r'''\[(\d{4})-(\d{2})-(\d{2})\s(\d{2}):(\d{2}):(\d{2})\]\s
                         (?::\s(\S+)\s:\s(\S+))+\s
                         :\s(.+)'''
 LOG_METRIX_COMPILED_REGEX = re.compile(LOG_METRICS_REGEX, re.VERBOSE)
+RESULTS_COLUMNS = ['date',
+                   'model_name',
+                   'source', 'target',
+                   'score_type', 'score',
+                   'epoch',
+                   'parameters']
 
 """
 https://github.com/mjpost/sacrebleu/blob/e22640/sacrebleu/compat.py#L66-L67
@@ -26,6 +31,8 @@ BLEU is a corpus-level metric.
 def calculate_sacrebleu_sentence(reference, 
                                  translated, 
                                  metric='sacrebleu_sentence_bleu'):
+    import sacrebleu # sacrebleu is only imported when scoring, as it slows down the startup of every entry point
+
     chrf_function = lambda reference, translated: \
         sacrebleu.sentence_chrf(translated, [reference]).score
     sacrebleu_function = lambda reference, translated: \
@@ -37,6 +44,13 @@ def calculate_sacrebleu_sentence(reference,
     bleu_score = score_functions[metric](reference, translated)
     return bleu_score
 
+# Vectorized version of calculate_sacrebleu_sentence: the statistics of every sentence are extracted at once
+# and the scores are computed with numpy. Each hypothesis is scored against the reference in the same line.
+def sentence_scores(references, hypotheses, metric='sacrebleu_sentence_bleu'):
+    # type: (list[str], list[str], str) -> np.ndarray
+    from src.domain.evaluation import scoring
+    return scoring.sentence_scores(references, hypotheses, metric=metric)
+
 """
 https://github.com/mjpost/sacrebleu
 
@@ -51,16 +65,19 @@ BLEU = 48.53 82.4/50.0/45.5/37.5 (BP = 0.943 ratio = 0.944 hyp_len = 17 ref_len
 """
 def calculate_sacrebleu_corpus_bleu(references, translated):
     # type: (list[str], list[str]) -> float
+    import sacrebleu
     bleu_score = sacrebleu.corpus_bleu(translated, references).score
     return bleu_score
 
 def calculate_sacrebleu_corpus_chrf(references, translated):
     # type: (list[str], list[str]) -> float
+    import sacrebleu
     chrf_score = sacrebleu.corpus_chrf(translated, references).score
     return chrf_score
 
 def calculate_sacrebleu_corpus_ter(references, translated):
     # type: (list[str], list[str]) -> float
+    import sacrebleu
     ter_score = sacrebleu.corpus_ter(translated, references).score
     return ter_score
 
@@ -84,22 +101,34 @@ def get_results_filename(file_name):
         file_name += '.csv'
     return file_name
 
+# The reference statistics are cached and every metric is computed in one pass over the translation
 def get_results_from_translation_output(model_name, 
                                         source, target, 
                                         reference, translation_output, 
                                         parameters, 
-                                        metrics=['sacrebleu_corpus_bleu']):
-    # type: (str, str, str, str, str, dict, list[str]) -> list
+                                        metrics=['sacrebleu_corpus_bleu'],
+                                        reference_cache_dir=None):
+    # type: (str, str, str, str, str, dict, list[str], str) -> list
+    from src.domain.evaluation import scoring # numpy is not needed by score.py, which only uses calculate_metric
+
     epoch             = parameters.get('after-epochs', [''])[0]
     date              = datetime.datetime.now()
-    reference_lines   = file_manager.get_file_lines(reference)
     translation_lines = file_manager.get_file_lines(translation_output)
+    cached_metrics    = [score_type for score_type in metrics \
+                         if reference_cache.is_cacheable_metric(score_type)]
+    cached_scores     = scoring.score_translation(reference, 
+                                                  translation_lines, 
+                                                  cached_metrics, 
+                                                  reference_cache_dir=reference_cache_dir)
     score_rows        = []
 
     for score_type in metrics:
-        bleu_score = calculate_metric(reference_lines, 
-                                      translation_lines, 
-                                      bleu_score_type=score_type)
+        if score_type in cached_scores:
+            bleu_score = cached_scores[score_type]
+        else:
+            bleu_score = calculate_metric(file_manager.get_file_lines(reference), 
+                                          translation_lines, 
+                                          bleu_score_type=score_type)
         score_rows.append([date, 
                            model_name, 
                            source, target, 
@@ -139,6 +168,23 @@ def get_results_from_logs(model_name,
         scores.append(score_row)
     return scores
     
+# Appends score rows to the results csv, the header is written when the file is created
+def write_results(file_name, score_rows, columns=RESULTS_COLUMNS):
+    # type: (str, list[list], list[str]) -> str
+    file_name = get_results_filename(file_name)
+    first_time_saving = not os.path.isfile(file_name)
+
+    if first_time_saving:
+        with open(file_name, 'w') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+
+    with open(file_name, 'a') as f:
+        writer = csv.writer(f)
+        for score_row in score_rows:
+            writer.writerow(score_row)
+    return file_name
+
 # Saves results from logs if translation output is not available
 def save_results(file_name,
                  model_dir,
@@ -146,16 +192,9 @@ def save_results(file_name,
                  metrics=['sacrebleu_corpus_bleu'],
                  validation_log=None,
                  translation_output=None,
-                 reference=None):
-    # type: (str, str, dict, list[str], str, str, str) -> dict[str, list[float]]
-    columns = ['date',
-               'model_name',
-               'source', 'target',
-               'score_type', 'score',
-               'epoch',
-               'parameters']
-    file_name = get_results_filename(file_name)
-    first_time_saving = not os.path.isfile(file_name)
+                 reference=None,
+                 reference_cache_dir=None):
+    # type: (str, str, dict, list[str], str, str, str, str) -> dict[str, list[float]]
     parameters = parsing.deep_copy_flags(parameters)
     base_dir = os.path.dirname(model_dir)
     model_name = os.path.basename(model_dir)
@@ -169,7 +208,8 @@ def save_results(file_name,
                                                      reference, 
                                                      translation_output,
                                                      parameters, 
-                                                     metrics=metrics)
+                                                     metrics=metrics,
+                                                     reference_cache_dir=reference_cache_dir)
     elif validation_log is not None:
         scores = get_results_from_logs(model_name, 
                                        source, target, 
@@ -179,15 +219,7 @@ def save_results(file_name,
     if not os.path.isdir(base_dir):
         os.makedirs(base_dir)
 
-    if first_time_saving:
-        with open(file_name, 'w') as f:
-            writer = csv.writer(f)
-            writer.writerow(columns)
-
-    with open(file_name, 'a') as f:
-        writer = csv.writer(f)
-        for score_row in scores:
-            writer.writerow(score_row)
+    write_results(file_name, scores)
 
     returned_scores = collections.defaultdict(list)
     for score in scores:
@@ -0,0 +1,123 @@
+import os
+import pickle
+import hashlib
+import collections
+
+from src.utils import file_manager
+
+# Same configurations as sacrebleu.corpus_bleu, sacrebleu.corpus_chrf and sacrebleu.corpus_ter
+METRIC_CONFIGS = {
+    'sacrebleu_corpus_bleu': ('BLEU', {'lowercase': False, 'force': False, 'tokenize': '13a',
+                                       'smooth_method': 'exp', 'smooth_value': None,
+                                       'effective_order': False}),
+    'sacrebleu_corpus_chrf': ('CHRF', {'char_order': 6, 'word_order': 0, 'beta': 2,
+                                       'whitespace': False, 'eps_smoothing': False}),
+    'sacrebleu_corpus_ter': ('TER', {'normalized': False, 'no_punct': False,
+                                     'asian_support': False, 'case_sensitive': False}),
+}
+DEFAULT_MAX_ENTRIES = 16
+
+def is_cacheable_metric(score_type):
+    # type: (str) -> bool
+    return score_type in METRIC_CONFIGS
+
+def create_metric(score_type):
+    # type: (str) -> object
+    import sacrebleu
+    metric_name, metric_config = METRIC_CONFIGS[score_type]
+    return getattr(sacrebleu, metric_name)(**metric_config)
+
+# Identifies the reference statistics: they change with the reference contents, the metric configuration and sacrebleu itself
+def get_cache_key(reference_hash, score_type):
+    # type: (str, str) -> str
+    import sacrebleu
+    metric_name, metric_config = METRIC_CONFIGS[score_type]
+    metric_id = '{}-{}-{}'.format(metric_name, sorted(metric_config.items()), sacrebleu.__version__)
+    return '{}-{}-{}'.format(reference_hash[:32], score_type, hashlib.sha256(metric_id.encode('utf-8')).hexdigest()[:16])
+
+# Keeps the tokenized references and their (char) n-gram counts of each metric, so only the hypotheses are
+# processed on each validation. The statistics are optionally pickled in cache_dir to reuse them across runs.
+class ReferenceStatisticsCache:
+    def __init__(self, cache_dir=None, max_entries=DEFAULT_MAX_ENTRIES):
+        # type: (str, int) -> None
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.metrics = collections.OrderedDict()
+        self.reference_hashes = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __get_cache_path(self, cache_key):
+        # type: (str) -> str
+        return os.path.join(self.cache_dir, cache_key + '.pkl')
+
+    def __load_statistics(self, cache_key):
+        # type: (str) -> tuple
+        if self.cache_dir is None or not os.path.isfile(self.__get_cache_path(cache_key)):
+            return None
+        with open(self.__get_cache_path(cache_key), 'rb') as f:
+            return pickle.load(f)
+
+    def __save_statistics(self, cache_key, statistics):
+        # type: (str, tuple) -> None
+        if self.cache_dir is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = self.__get_cache_path(cache_key) + '.tmp'
+        with open(temp_path, 'wb') as f:
+            pickle.dump(statistics, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self.__get_cache_path(cache_key)) # Concurrent runs never read a partial file
+
+    # The reference is only hashed again when its modification time or size change
+    def get_reference_hash(self, reference_path):
+        # type: (str) -> str
+        stat = os.stat(reference_path)
+        file_id = (os.path.realpath(reference_path), stat.st_mtime_ns, stat.st_size)
+        if file_id not in self.reference_hashes:
+            self.reference_hashes[file_id] = file_manager.get_file_hash(reference_path)
+        return self.reference_hashes[file_id]
+
+    # sacrebleu metric whose references are already processed, to be scored with metric.corpus_score(hypotheses, None)
+    def get_metric(self, score_type, reference_path, reference_hash=None):
+        # type: (str, str, str) -> object
+        reference_hash = self.get_reference_hash(reference_path) if reference_hash is None else reference_hash
+        cache_key = get_cache_key(reference_hash, score_type)
+
+        if cache_key in self.metrics:
+            self.hits += 1
+            self.metrics.move_to_end(cache_key)
+            return self.metrics[cache_key]
+
+        metric = create_metric(score_type)
+        statistics = self.__load_statistics(cache_key)
+        if statistics is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            reference_lines = file_manager.get_file_lines(reference_path)
+            ref_cache = metric._cache_references([reference_lines])
+            statistics = (ref_cache, metric.num_refs)
+            self.__save_statistics(cache_key, statistics)
+        metric._ref_cache, metric.num_refs = statistics
+
+        self.metrics[cache_key] = metric
+        if len(self.metrics) > self.max_entries:
+            self.metrics.popitem(last=False)
+        return metric
+
+    def corpus_score(self, score_type, reference_path, hypotheses):
+        # type: (str, str, list[str]) -> float
+        metric = self.get_metric(score_type, reference_path)
+        if len(hypotheses) != len(metric._ref_cache):
+            raise ValueError('The translation has {} lines but the reference {} has {}.'.format(
+                len(hypotheses), reference_path, len(metric._ref_cache)))
+        return metric.corpus_score(hypotheses, None).score
+
+__reference_caches = {}
+
+# One cache per cache_dir, shared by every validation of the process
+def get_reference_cache(cache_dir=None):
+    # type: (str) -> ReferenceStatisticsCache
+    if cache_dir not in __reference_caches:
+        __reference_caches[cache_dir] = ReferenceStatisticsCache(cache_dir=cache_dir)
+    return __reference_caches[cache_dir]
@@ -0,0 +1,173 @@
+import numpy as np
+
+from src.domain.evaluation import reference_cache
+
+# Same configurations as sacrebleu.sentence_bleu and sacrebleu.sentence_chrf. force only silences the
+# tokenized periods warning, which sacrebleu never reaches when scoring one sentence per call.
+SENTENCE_METRIC_CONFIGS = {
+    'sacrebleu_sentence_bleu': ('BLEU', {'lowercase': False, 'force': True, 'tokenize': '13a',
+                                         'smooth_method': 'exp', 'smooth_value': None,
+                                         'effective_order': True}),
+    'sacrebleu_sentence_chrf': ('CHRF', {'char_order': 6, 'word_order': 0, 'beta': 2,
+                                         'whitespace': False, 'eps_smoothing': False}),
+}
+BLEU_SMOOTH_DEFAULTS = {'none': None, 'floor': 0.1, 'add-k': 1, 'exp': None}
+MIN_LOG = -9999999999 # Floor of log(0) in sacrebleu
+
+# Sufficient statistics of each sentence for every requested metric, in a single pass over the translation.
+# The reference side comes from the reference cache, so the translation is the only thing processed here.
+def get_sentence_statistics(reference, translation_lines, score_types, reference_cache_dir=None):
+    # type: (str, list[str], list[str], str) -> dict[str, np.ndarray]
+    statistics_cache = reference_cache.get_reference_cache(reference_cache_dir)
+    reference_hash = statistics_cache.get_reference_hash(reference)
+    scored_metrics = {score_type: statistics_cache.get_metric(score_type, reference, reference_hash=reference_hash) \
+                      for score_type in dict.fromkeys(score_types)}
+
+    for metric in scored_metrics.values():
+        if len(metric._ref_cache) != len(translation_lines):
+            raise ValueError('The translation has {} lines but the reference {} has {}.'.format(
+                len(translation_lines), reference, len(metric._ref_cache)))
+
+    sentence_statistics = {score_type: [] for score_type in scored_metrics}
+    for i, hypothesis in enumerate(translation_lines):
+        for score_type, metric in scored_metrics.items():
+            hypothesis_statistics = metric._compute_segment_statistics(metric._preprocess_segment(hypothesis),
+                                                                       metric._ref_cache[i])
+            sentence_statistics[score_type].append(hypothesis_statistics)
+
+    return {score_type: np.array(statistics) for score_type, statistics in sentence_statistics.items()}
+
+# Every sacrebleu corpus metric is computed from the sum of its sentence statistics
+def get_corpus_score(score_type, statistics):
+    # type: (str, np.ndarray) -> float
+    metric = reference_cache.create_metric(score_type)
+    return metric._compute_score_from_stats(statistics.sum(axis=0).tolist()).score
+
+def score_translation(reference, translation_lines, score_types, reference_cache_dir=None):
+    # type: (str, list[str], list[str], str) -> dict[str, float]
+    sentence_statistics = get_sentence_statistics(reference,
+                                                  translation_lines,
+                                                  score_types,
+                                                  reference_cache_dir=reference_cache_dir)
+    return {score_type: get_corpus_score(score_type, statistics) \
+            for score_type, statistics in sentence_statistics.items()}
+
+# BLEU of each row of statistics [hyp_len, ref_len, correct_1..n, total_1..n], as sacrebleu's BLEU.compute_bleu
+def get_bleu_scores(statistics, smooth_method='exp', smooth_value=None, effective_order=False, max_ngram_order=4):
+    # type: (np.ndarray, str, float, bool, int) -> np.ndarray
+    statistics = np.asarray(statistics, dtype=np.float64).reshape(-1, 2 + 2 * max_ngram_order)
+    sys_len, ref_len = statistics[:, 0], statistics[:, 1]
+    correct = statistics[:, 2:2 + max_ngram_order].copy()
+    total = statistics[:, 2 + max_ngram_order:].copy()
+    smooth_value = BLEU_SMOOTH_DEFAULTS[smooth_method] if smooth_value is None else smooth_value
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        brevity_penalty = np.where(sys_len < ref_len,
+                                   np.where(sys_len > 0, np.exp(1 - ref_len / sys_len), 0.0),
+                                   1.0)
+        has_matches = (correct > 0).any(axis=1)
+
+        if smooth_method == 'add-k':
+            correct[:, 1:] += smooth_value
+            total[:, 1:] += smooth_value
+
+        # Orders are used until the first one without n-grams
+        is_used = np.cumprod(total > 0, axis=1).astype(bool)
+        is_unmatched = is_used & (correct == 0)
+        precisions = np.where(is_used, 100. * correct / total, 0.0)
+        if smooth_method == 'exp':
+            smooth_mteval = 2.0 ** np.cumsum(is_unmatched, axis=1)
+            precisions = np.where(is_unmatched, 100. / (smooth_mteval * total), precisions)
+        elif smooth_method == 'floor':
+            precisions = np.where(is_unmatched, 100. * smooth_value / total, precisions)
+
+        log_precisions = np.where(precisions == 0.0, MIN_LOG, np.log(np.where(precisions == 0.0, 1.0, precisions)))
+        if effective_order:
+            orders = is_used.sum(axis=1)
+            orders = np.where(orders == 0, max_ngram_order, orders)
+            log_precisions = np.where(np.arange(max_ngram_order) < orders[:, None], log_precisions, 0.0)
+        else:
+            orders = np.full(len(statistics), max_ngram_order)
+
+        scores = brevity_penalty * np.exp(log_precisions.sum(axis=1) / orders)
+    return np.where(has_matches, scores, 0.0)
+
+# chrF of each row of statistics [hyp, ref, match] * orders, as sacrebleu's CHRF._compute_f_score
+def get_chrf_scores(statistics, beta=2, eps_smoothing=False):
+    # type: (np.ndarray, int, bool) -> np.ndarray
+    eps = 1e-16
+    statistics = np.asarray(statistics, dtype=np.float64)
+    statistics = statistics.reshape(len(statistics), -1, 3)
+    n_hyp, n_ref, n_match = statistics[:, :, 0], statistics[:, :, 1], statistics[:, :, 2]
+    factor = beta ** 2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precisions = np.where(n_hyp > 0, n_match / n_hyp, eps)
+        recalls = np.where(n_ref > 0, n_match / n_ref, eps)
+
+        if eps_smoothing:
+            denominators = factor * precisions + recalls
+            order_scores = np.where(denominators > 0, (1 + factor) * precisions * recalls / denominators, eps)
+            return 100 * order_scores.sum(axis=1) / statistics.shape[1]
+
+        is_effective = (n_hyp > 0) & (n_ref > 0)
+        effective_orders = is_effective.sum(axis=1)
+        avg_precisions = np.where(is_effective, precisions, 0.0).sum(axis=1) / np.maximum(effective_orders, 1)
+        avg_recalls = np.where(is_effective, recalls, 0.0).sum(axis=1) / np.maximum(effective_orders, 1)
+        scores = (1 + factor) * avg_precisions * avg_recalls
+        scores = 100 * (scores / ((factor * avg_precisions) + avg_recalls))
+    return np.where(avg_precisions + avg_recalls > 0, scores, 0.0)
+
+# TER of each row of statistics [edits, ref_len], as sacrebleu's TER._compute_score_from_stats
+def get_ter_scores(statistics):
+    # type: (np.ndarray) -> np.ndarray
+    statistics = np.asarray(statistics, dtype=np.float64).reshape(-1, 2)
+    edits, ref_len = statistics[:, 0], statistics[:, 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 * np.where(ref_len > 0, edits / ref_len, 1.0)
+
+# Corpus score of each row of already summed statistics, e.g. one row per bootstrap resample
+def get_corpus_scores(score_type, statistics):
+    # type: (str, np.ndarray) -> np.ndarray
+    metric_name, metric_config = reference_cache.METRIC_CONFIGS[score_type]
+    if metric_name == 'BLEU':
+        return get_bleu_scores(statistics,
+                               smooth_method=metric_config['smooth_method'],
+                               smooth_value=metric_config['smooth_value'],
+                               effective_order=metric_config['effective_order'])
+    if metric_name == 'CHRF':
+        return get_chrf_scores(statistics,
+                               beta=metric_config['beta'],
+                               eps_smoothing=metric_config['eps_smoothing'])
+    return get_ter_scores(statistics)
+
+def create_sentence_metric(metric):
+    # type: (str) -> object
+    import sacrebleu
+    metric_name, metric_config = SENTENCE_METRIC_CONFIGS[metric]
+    return getattr(sacrebleu, metric_name)(**metric_config)
+
+# Statistics of every sentence at once, each hypothesis is matched with the reference in the same line
+def get_sentence_level_statistics(references, hypotheses, metric='sacrebleu_sentence_bleu'):
+    # type: (list[str], list[str], str) -> np.ndarray
+    if len(references) != len(hypotheses):
+        raise ValueError('There are {} hypotheses but {} references.'.format(len(hypotheses), len(references)))
+    sentence_metric = create_sentence_metric(metric)
+    return np.array(sentence_metric._extract_corpus_statistics(hypotheses, [references]), dtype=np.float64)
+
+def get_sentence_scores_from_statistics(statistics, metric='sacrebleu_sentence_bleu'):
+    # type: (np.ndarray, str) -> np.ndarray
+    metric_name, metric_config = SENTENCE_METRIC_CONFIGS[metric]
+    if metric_name == 'BLEU':
+        return get_bleu_scores(statistics,
+                               smooth_method=metric_config['smooth_method'],
+                               smooth_value=metric_config['smooth_value'],
+                               effective_order=metric_config['effective_order'])
+    return get_chrf_scores(statistics,
+                           beta=metric_config['beta'],
+                           eps_smoothing=metric_config['eps_smoothing'])
+
+def sentence_scores(references, hypotheses, metric='sacrebleu_sentence_bleu'):
+    # type: (list[str], list[str], str) -> np.ndarray
+    statistics = get_sentence_level_statistics(references, hypotheses, metric=metric)
+    return get_sentence_scores_from_statistics(statistics, metric=metric)
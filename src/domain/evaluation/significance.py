@@ -0,0 +1,79 @@
+import numpy as np
+
+from src.domain.evaluation import scoring
+
+DEFAULT_N_SAMPLES = 1000
+DEFAULT_SEED = 12345 # Same as sacrebleu's SACREBLEU_SEED
+DEFAULT_CHUNK_SIZE = 1000 # Resamples whose counts are kept in memory at once
+
+# Sentences drawn by each resample, drawn as sacrebleu's paired bootstrap so the same seed gives the same resamples
+def get_resample_indices(n_sentences, n_samples=DEFAULT_N_SAMPLES, seed=DEFAULT_SEED):
+    # type: (int, int, int) -> np.ndarray
+    rng = np.random.default_rng(seed)
+    return rng.choice(n_sentences, size=(n_samples, n_sentences), replace=True)
+
+# Times each sentence is drawn by each resample (n_samples x n_sentences)
+def get_resample_counts(indices, n_sentences):
+    # type: (np.ndarray, int) -> np.ndarray
+    n_samples = len(indices)
+    offsets = np.arange(n_samples)[:, None] * n_sentences
+    counts = np.bincount((indices + offsets).ravel(), minlength=n_samples * n_sentences)
+    return counts.reshape(n_samples, n_sentences).astype(np.float64)
+
+# Summed statistics of every resample for each system. Instead of indexing the statistics once per resample,
+# the systems are stacked and the resample counts are multiplied with them, a single product per chunk.
+def get_resampled_statistics(systems_statistics, indices, chunk_size=DEFAULT_CHUNK_SIZE):
+    # type: (list[np.ndarray], np.ndarray, int) -> list[np.ndarray]
+    n_sentences = len(systems_statistics[0])
+    stacked_statistics = np.hstack(systems_statistics).astype(np.float64)
+    resampled_statistics = np.vstack([get_resample_counts(indices[start:start + chunk_size], n_sentences) @ stacked_statistics \
+                                      for start in range(0, len(indices), chunk_size)])
+    split_points = np.cumsum([statistics.shape[1] for statistics in systems_statistics])[:-1]
+    return np.hsplit(resampled_statistics, split_points)
+
+# Mean and half width of the 95% confidence interval, as sacrebleu's estimate_ci
+def estimate_ci(scores):
+    # type: (np.ndarray) -> tuple[float, float]
+    scores = np.sort(scores)
+    lower_index = len(scores) // 40
+    upper_index = len(scores) - lower_index - 1
+    return float(scores.mean()), float(0.5 * (scores[upper_index] - scores[lower_index]))
+
+# Probability of a difference at least as large as the real one being due to chance, as sacrebleu's paired bootstrap
+def get_p_value(baseline_scores, system_scores, real_difference):
+    # type: (np.ndarray, np.ndarray, float) -> float
+    sample_differences = np.abs(system_scores - baseline_scores)
+    centered_differences = sample_differences - sample_differences.mean()
+    return float((np.sum(centered_differences > real_difference) + 1) / (len(centered_differences) + 1))
+
+# Paired bootstrap resampling of every system against the baseline. The sentence statistics of each system are
+# extracted once (the references come from the reference cache) and every resample is scored from their sums.
+# Returns system -> score type -> {'score', 'p_value', 'mean', 'ci'}, the p-value of the baseline is None.
+def paired_bootstrap_test(reference, systems, score_types, baseline=None, n_samples=DEFAULT_N_SAMPLES, seed=DEFAULT_SEED, reference_cache_dir=None):
+    # type: (str, dict[str, list[str]], list[str], str, int, int, str) -> dict[str, dict[str, dict]]
+    baseline = next(iter(systems)) if baseline is None else baseline
+    if baseline not in systems:
+        raise ValueError('The baseline {} is not one of the systems.'.format(baseline))
+    system_names = [baseline] + [name for name in systems if name != baseline]
+
+    statistics = {name: scoring.get_sentence_statistics(reference,
+                                                        systems[name],
+                                                        score_types,
+                                                        reference_cache_dir=reference_cache_dir) \
+                  for name in system_names}
+    indices = get_resample_indices(len(systems[baseline]), n_samples=n_samples, seed=seed)
+
+    results = {name: {} for name in system_names}
+    for score_type in statistics[baseline]:
+        systems_statistics = [statistics[name][score_type] for name in system_names]
+        resampled_statistics = get_resampled_statistics(systems_statistics, indices)
+        baseline_scores = scoring.get_corpus_scores(score_type, resampled_statistics[0])
+        baseline_score = scoring.get_corpus_score(score_type, systems_statistics[0])
+
+        for name, system_statistics, system_resampled_statistics in zip(system_names, systems_statistics, resampled_statistics):
+            score = scoring.get_corpus_score(score_type, system_statistics)
+            system_scores = scoring.get_corpus_scores(score_type, system_resampled_statistics)
+            mean, ci = estimate_ci(system_scores)
+            p_value = None if name == baseline else get_p_value(baseline_scores, system_scores, abs(baseline_score - score))
+            results[name][score_type] = {'score': score, 'p_value': p_value, 'mean': mean, 'ci': ci}
+    return results
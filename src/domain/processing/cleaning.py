@@ -7,6 +7,23 @@ URL_REGEX    = r"http\S+"
 NUMBER_REGEX = r"[+-]?([0-9]*[.])?[0-9]+"
 IP_REGEX     = r"\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}"
 
+# Patterns are compiled once, they run for every sentence and token the tokenizers see
+DATE_PATTERN   = re.compile(DATE_REGEX)
+MAIL_PATTERN   = re.compile(MAIL_REGEX)
+URL_PATTERN    = re.compile(URL_REGEX)
+NUMBER_PATTERN = re.compile(r"(?=[+\-.0-9])" + NUMBER_REGEX) # The lookahead lets re skip to the characters a number starts with
+IP_PATTERN     = re.compile(IP_REGEX)
+
+# Every reduce_vocabulary pattern needs a digit, an at sign or an url scheme to match
+DIGIT_PATTERN = re.compile(r"\d")
+
+APOSTROPHE_SYMBOLS_PATTERN = re.compile("[´’`ʼ]")
+ACUTE_APOSTROPHE_PATTERN = re.compile("´[`´]")
+APOSTROPHE_TABLE = str.maketrans({"’": "'", "`": "'", "ʼ": "'"})
+PUNCTUATION_TABLE = str.maketrans('', '', '.,%-{}()') # strings.punctuation could be used too
+SPACES_TABLE = str.maketrans('', '', '\n\t ')
+PUNCTUATION_SPACES_TABLE = str.maketrans('', '', '.,%-{}()\n\t ')
+
 # Normalize raw text
 # Normalize "pusó" symbols (https://es.wikipedia.org/wiki/Alfabeto_guaran%C3%AD) 
 def normalize_text(text, lowercase=False):
@@ -16,20 +33,34 @@ def normalize_text(text, lowercase=False):
     if lowercase:
         cleaned_text = cleaned_text.lower()
 
-    cleaned_text = re.sub("’`^", "'", cleaned_text)
-    cleaned_text = re.sub("´`|´´", "'", cleaned_text)
-    cleaned_text = re.sub("’|`|ʼ", "'", cleaned_text)
+    if APOSTROPHE_SYMBOLS_PATTERN.search(cleaned_text) is None:
+        return cleaned_text
+
+    # Pairs of acute accents and backticks become a single apostrophe before single symbols are translated
+    cleaned_text = ACUTE_APOSTROPHE_PATTERN.sub("'", cleaned_text)
+    cleaned_text = cleaned_text.translate(APOSTROPHE_TABLE)
 
     return cleaned_text
 
+# Patterns are applied in order since removing one match can create another,
+# each pass is skipped when the text lacks the characters it needs.
+# IP addresses keep their own pass: NUMBER_REGEX only removes ASCII digits, IP_REGEX any digit (e.g. ١٢.٣٤.٥٦.٧٨),
+# so it only matches once the number pass left a non-ASCII text.
 def reduce_vocabulary(text):
     # type: (str) -> str
+    has_digits = DIGIT_PATTERN.search(text) is not None
     cleaned_text = text
-    cleaned_text = re.sub(DATE_REGEX,   '', cleaned_text)
-    cleaned_text = re.sub(MAIL_REGEX,   '', cleaned_text)
-    cleaned_text = re.sub(URL_REGEX,    '', cleaned_text)
-    cleaned_text = re.sub(NUMBER_REGEX, '', cleaned_text)
-    cleaned_text = re.sub(IP_REGEX,     '', cleaned_text)
+
+    if has_digits and '/' in cleaned_text:
+        cleaned_text = DATE_PATTERN.sub('', cleaned_text)
+    if '@' in cleaned_text:
+        cleaned_text = MAIL_PATTERN.sub('', cleaned_text)
+    if 'http' in cleaned_text:
+        cleaned_text = URL_PATTERN.sub('', cleaned_text)
+    if has_digits:
+        cleaned_text = NUMBER_PATTERN.sub('', cleaned_text)
+    if has_digits and '.' in cleaned_text and not cleaned_text.isascii():
+        cleaned_text = IP_PATTERN.sub('', cleaned_text)
     return cleaned_text
 
 def clean_text(text, reduce_vocab=True, normalize=False):
@@ -44,15 +75,36 @@ def clean_text(text, reduce_vocab=True, normalize=False):
         
     return cleaned_text
 
+def clean_texts(texts, reduce_vocab=True, normalize=False):
+    # type: (list[str], bool, bool) -> list[str]
+    return [clean_text(text, reduce_vocab=reduce_vocab, normalize=normalize) for text in texts]
+
+def get_token_table(clean_punctuation=True, clean_spaces=True):
+    # type: (bool, bool) -> dict
+    if clean_punctuation and clean_spaces:
+        return PUNCTUATION_SPACES_TABLE
+    if clean_punctuation:
+        return PUNCTUATION_TABLE
+    if clean_spaces:
+        return SPACES_TABLE
+    return None
+
 # Convert non-characters to blank spaces
 def clean_token(token, lowercase=False, clean_punctuation=True, clean_spaces=True):
     # type: (str, bool, bool, bool) -> str
     if lowercase:
         token = token.lower()
 
-    if clean_punctuation:
-        token = re.sub('\.|,|%|-|\{|\}|\(|\)','', token) # strings.punctuation could be used too
+    token_table = get_token_table(clean_punctuation, clean_spaces)
+    if token_table is not None:
+        token = token.translate(token_table)
+    return token
 
-    if clean_spaces:
-        token = re.sub('\n|\t|[ ]','', token)
-    return token
\ No newline at end of file
+def clean_tokens(tokens, lowercase=False, clean_punctuation=True, clean_spaces=True):
+    # type: (list[str], bool, bool, bool) -> list[str]
+    token_table = get_token_table(clean_punctuation, clean_spaces)
+    if lowercase:
+        tokens = [token.lower() for token in tokens]
+    if token_table is not None:
+        tokens = [token.translate(token_table) for token in tokens]
+    return list(tokens)
\ No newline at end of file
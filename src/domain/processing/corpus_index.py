@@ -0,0 +1,159 @@
+import os
+import mmap
+from typing import Iterable, Iterator
+
+import numpy as np
+
+INDEX_SUFFIX = '.idx.npy'
+NEWLINE = ord('\n')
+
+# Start offset of every line plus the file size, so line i is the byte range [offsets[i], offsets[i+1])
+def build_line_offsets(file_path, block_size=1 << 24):
+    # type: (str, int) -> np.ndarray
+    offsets = [np.zeros(1, dtype=np.uint64)]
+    file_size = os.path.getsize(file_path)
+    position = 0
+
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            newlines = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == NEWLINE)
+            offsets.append((newlines + position + 1).astype(np.uint64))
+            position += len(block)
+
+    offsets = np.concatenate(offsets)
+    if offsets[-1] != file_size: # Last line without trailing newline
+        offsets = np.append(offsets, np.uint64(file_size))
+    return offsets
+
+def get_index_path(file_path):
+    # type: (str) -> str
+    return file_path + INDEX_SUFFIX
+
+def is_index_up_to_date(file_path, index_path, offsets=None):
+    # type: (str, str, np.ndarray) -> bool
+    if not os.path.isfile(index_path) or \
+       os.path.getmtime(index_path) < os.path.getmtime(file_path):
+        return False
+    return offsets is None or int(offsets[-1]) == os.path.getsize(file_path)
+
+# The offsets are saved in a .idx.npy sidecar and only rebuilt when the file changes
+def load_line_offsets(file_path, save_index=True):
+    # type: (str, bool) -> np.ndarray
+    index_path = get_index_path(file_path)
+
+    if is_index_up_to_date(file_path, index_path):
+        offsets = np.load(index_path, mmap_mode='r')
+        if is_index_up_to_date(file_path, index_path, offsets):
+            return offsets
+
+    offsets = build_line_offsets(file_path)
+    if save_index:
+        np.save(index_path, offsets)
+    return offsets
+
+class LineIndex:
+    def __init__(self, file_path, save_index=True):
+        # type: (str, bool) -> None
+        self.file_path = file_path
+        self.offsets = load_line_offsets(file_path, save_index=save_index)
+        self.file = open(file_path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) \
+                    if os.path.getsize(file_path) > 0 else b''
+
+    def __len__(self):
+        # type: () -> int
+        return len(self.offsets) - 1
+
+    def get_bytes(self, idx):
+        # type: (int) -> bytes
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError('Line {} out of range for {}'.format(idx, self.file_path))
+        return self.data[int(self.offsets[idx]):int(self.offsets[idx + 1])]
+
+    def __getitem__(self, idx):
+        # type: (int) -> str
+        return self.get_bytes(idx).decode('utf-8').rstrip('\r\n')
+
+    # Length in bytes of every line, newline excluded
+    def get_line_lengths(self):
+        # type: () -> np.ndarray
+        lengths = np.diff(self.offsets).astype(np.int64) - 1
+        if len(self) > 0 and self.data[len(self.data) - 1] != NEWLINE: # Last line without trailing newline
+            lengths[-1] += 1
+        return lengths
+
+    def close(self):
+        # type: () -> None
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+# Random access to the sentence pairs of a parallel corpus (e.g. train.gn/train.es) without loading the text
+class ParallelCorpusIndex:
+    def __init__(self, src_path, tgt_path, save_index=True):
+        # type: (str, str, bool) -> None
+        self.src = LineIndex(src_path, save_index=save_index)
+        self.tgt = LineIndex(tgt_path, save_index=save_index)
+
+        if len(self.src) != len(self.tgt):
+            self.close()
+            raise ValueError('Misaligned corpora: {} has {} lines and {} has {} lines'.format(
+                src_path, len(self.src), tgt_path, len(self.tgt)))
+
+    def __len__(self):
+        # type: () -> int
+        return len(self.src)
+
+    def __getitem__(self, idx):
+        # type: (int) -> tuple[str, str]
+        return self.src[idx], self.tgt[idx]
+
+    def iter_pairs(self, indices=None):
+        # type: (Iterable[int]) -> Iterator[tuple[str, str]]
+        indices = range(len(self)) if indices is None else indices
+        for idx in indices:
+            yield self[int(idx)]
+
+    def shuffle(self, seed=None):
+        # type: (int) -> np.ndarray
+        return np.random.default_rng(seed).permutation(len(self))
+
+    def sample(self, sample_size, seed=None):
+        # type: (int, int) -> np.ndarray
+        sample_size = min(sample_size, len(self))
+        return np.sort(np.random.default_rng(seed).choice(len(self), size=sample_size, replace=False))
+
+    # Byte lengths of the source and target lines, usable for vectorized length filters
+    def get_line_lengths(self):
+        # type: () -> tuple[np.ndarray, np.ndarray]
+        return self.src.get_line_lengths(), self.tgt.get_line_lengths()
+
+    def write_pairs(self, indices, src_output, tgt_output):
+        # type: (Iterable[int], str, str) -> int
+        pairs_n = 0
+        with open(src_output, 'wb') as src_f, open(tgt_output, 'wb') as tgt_f:
+            for idx in indices:
+                for index, output_f in [(self.src, src_f), (self.tgt, tgt_f)]:
+                    line = index.get_bytes(int(idx))
+                    output_f.write(line if line.endswith(b'\n') else line + b'\n')
+                pairs_n += 1
+        return pairs_n
+
+    def close(self):
+        # type: () -> None
+        self.src.close()
+        self.tgt.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
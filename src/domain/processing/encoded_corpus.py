@@ -0,0 +1,82 @@
+import re
+import json
+import array
+
+import numpy as np
+
+from src.domain.processing.tokenization import Tokenizer
+
+IDS_SUFFIX = '.ids.npy'
+OFFSETS_SUFFIX = '.offsets.npy'
+OOV_ID = np.iinfo(np.uint32).max # Tokens missing from the vocabulary
+YAML_VOCABULARY_REGEX = re.compile(r'^(".*"):\s*(\d+)$')
+
+def load_vocabulary(vocabulary_path, vocabulary_format='text'):
+    # type: (str, str) -> dict[str, int]
+    vocabulary = {}
+
+    with open(vocabulary_path, 'r', encoding='utf-8') as f:
+        for idx, line in enumerate(f):
+            line = line.rstrip('\n')
+            if vocabulary_format == 'yaml':
+                token, token_id = YAML_VOCABULARY_REGEX.match(line).groups()
+                vocabulary[json.loads(token)] = int(token_id)
+            elif vocabulary_format == 'counts':
+                vocabulary[line.rsplit('\t', 1)[0]] = idx
+            else:
+                vocabulary[line] = idx
+
+    return vocabulary
+
+# A tokenized corpus is stored as a flat uint32 array of token ids and the offsets of every sentence in it,
+# so sentence i is ids[offsets[i]:offsets[i+1]].
+def encode_corpus(input_path, output_prefix, vocabulary, tokenizer, batch_size=1000, processes_n=1):
+    # type: (str, str, dict[str, int], Tokenizer, int, int) -> tuple[int, int]
+    ids = array.array('I')
+    offsets = array.array('Q', [0])
+
+    with open(input_path, 'r', encoding='utf-8') as f:
+        for tokens in tokenizer.tokenize_many(f, batch_size=batch_size, n_process=processes_n):
+            ids.extend(vocabulary.get(token, OOV_ID) for token in tokens)
+            offsets.append(len(ids))
+
+    np.save(output_prefix + IDS_SUFFIX, np.frombuffer(ids, dtype=np.uint32))
+    np.save(output_prefix + OFFSETS_SUFFIX, np.frombuffer(offsets, dtype=np.uint64))
+    return len(offsets) - 1, len(ids)
+
+def load_encoded_corpus(prefix, mmap=True):
+    # type: (str, bool) -> tuple[np.ndarray, np.ndarray]
+    mmap_mode = 'r' if mmap else None
+    ids = np.load(prefix + IDS_SUFFIX, mmap_mode=mmap_mode)
+    offsets = np.load(prefix + OFFSETS_SUFFIX, mmap_mode=mmap_mode)
+    return ids, offsets
+
+def get_sentence_lengths(offsets):
+    # type: (np.ndarray) -> np.ndarray
+    return np.diff(offsets).astype(np.int64)
+
+def get_length_histogram(offsets, bins=10):
+    # type: (np.ndarray, int) -> tuple[np.ndarray, np.ndarray]
+    return np.histogram(get_sentence_lengths(offsets), bins=bins)
+
+def get_oov_rate(ids):
+    # type: (np.ndarray) -> float
+    if len(ids) == 0:
+        return 0.0
+    return float(np.count_nonzero(ids == OOV_ID)) / len(ids)
+
+def get_token_counts(ids, vocabulary_size):
+    # type: (np.ndarray, int) -> np.ndarray
+    return np.bincount(ids[ids != OOV_ID], minlength=vocabulary_size)
+
+# N-grams that cross a sentence boundary are discarded
+def get_ngram_counts(ids, offsets, n=2):
+    # type: (np.ndarray, np.ndarray, int) -> tuple[np.ndarray, np.ndarray]
+    ngrams_n = len(ids) - n + 1
+    if ngrams_n <= 0:
+        return np.empty((0, n), dtype=np.uint32), np.empty(0, dtype=np.int64)
+
+    ngrams = np.stack([ids[i:i + ngrams_n] for i in range(n)], axis=1)
+    sentence_ids = np.searchsorted(offsets, np.arange(len(ids)), side='right') - 1
+    within_sentence = sentence_ids[:ngrams_n] == sentence_ids[n - 1:]
+    return np.unique(ngrams[within_sentence], axis=0, return_counts=True)
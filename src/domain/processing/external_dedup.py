@@ -0,0 +1,152 @@
+import os
+import heapq
+import argparse
+import tempfile
+
+import numpy as np
+
+from src.domain.processing.search_duplicates import hash_pair, read_aligned_pairs
+
+RECORD_DTYPE = np.dtype([('hash', '<u8'), ('line', '<u8')])
+DEFAULT_MEMORY_BUDGET = 512 * (1 << 20)
+
+# Half of the budget holds the records being sorted, the other half is left for np.sort
+def get_run_size(memory_budget):
+    # type: (int) -> int
+    return max(1, memory_budget // (2 * RECORD_DTYPE.itemsize))
+
+def __sort_records(records):
+    # type: (np.ndarray) -> np.ndarray
+    return records[np.lexsort((records['line'], records['hash']))]
+
+def __write_run(records, runs_dir):
+    # type: (np.ndarray, str) -> str
+    run_path = os.path.join(runs_dir, 'run_{}.bin'.format(len(os.listdir(runs_dir))))
+    __sort_records(records).tofile(run_path)
+    return run_path
+
+# Spills the (hash, line) records of a corpus in sorted runs of at most run_size records
+def write_sorted_runs(src_path, tgt_path, runs_dir, run_size, normalize=True):
+    # type: (str, str, str, int, bool) -> tuple[list[str], np.ndarray, int]
+    run_paths = []
+    records = np.empty(run_size, dtype=RECORD_DTYPE)
+    records_n, lines_n = 0, 0
+
+    with open(src_path, 'r', encoding='utf-8') as src_f, \
+         open(tgt_path, 'r', encoding='utf-8') as tgt_f:
+        for line, (src, tgt) in enumerate(read_aligned_pairs(src_f, tgt_f)):
+            records[records_n] = (hash_pair(src, tgt, normalize=normalize), line)
+            records_n += 1
+            lines_n += 1
+
+            if records_n == run_size:
+                run_paths.append(__write_run(records, runs_dir))
+                records_n = 0
+
+    # The last run is kept in memory when nothing was spilled
+    if len(run_paths) == 0:
+        return run_paths, __sort_records(records[:records_n]), lines_n
+
+    if records_n > 0:
+        run_paths.append(__write_run(records[:records_n], runs_dir))
+    return run_paths, None, lines_n
+
+def __read_run(run_path, block_size):
+    # type: (str, int) -> iter
+    with open(run_path, 'rb') as f:
+        while True:
+            block = np.fromfile(f, dtype=RECORD_DTYPE, count=block_size)
+            if len(block) == 0:
+                break
+            yield from zip(block['hash'].tolist(), block['line'].tolist())
+
+# Lines whose hash appeared in an earlier line, from records sorted by (hash, line)
+def get_sorted_duplicate_lines(records):
+    # type: (np.ndarray) -> np.ndarray
+    is_duplicate = np.zeros(len(records), dtype=bool)
+    is_duplicate[1:] = records['hash'][1:] == records['hash'][:-1]
+    return records['line'][is_duplicate]
+
+# k-way merge of the sorted runs, each one read in blocks that share the memory budget
+def merge_duplicate_lines(run_paths, keep_mask, memory_budget):
+    # type: (list[str], np.ndarray, int) -> None
+    block_size = max(1, get_run_size(memory_budget) // max(1, len(run_paths)))
+    previous_hash = None
+    duplicate_lines = []
+
+    for record_hash, line in heapq.merge(*[__read_run(run_path, block_size) for run_path in run_paths]):
+        if record_hash == previous_hash:
+            duplicate_lines.append(line)
+            if len(duplicate_lines) >= block_size:
+                keep_mask[duplicate_lines] = False
+                duplicate_lines = []
+        previous_hash = record_hash
+
+    keep_mask[duplicate_lines] = False
+
+def write_kept_lines(src_path, tgt_path, keep_mask, src_output, tgt_output):
+    # type: (str, str, np.ndarray, str, str) -> int
+    with open(src_path, 'r', encoding='utf-8') as src_f, \
+         open(tgt_path, 'r', encoding='utf-8') as tgt_f, \
+         open(src_output, 'w', encoding='utf-8') as src_output_f, \
+         open(tgt_output, 'w', encoding='utf-8') as tgt_output_f:
+        for keep, (src, tgt) in zip(keep_mask, read_aligned_pairs(src_f, tgt_f)):
+            if keep:
+                src_output_f.write(src.rstrip('\n') + '\n')
+                tgt_output_f.write(tgt.rstrip('\n') + '\n')
+    return int(np.count_nonzero(keep_mask))
+
+# Removes repeated sentence pairs keeping their first occurrence, 
+# only the sorted runs blocks and a byte per line are held in memory
+def deduplicate_corpus(src_path, tgt_path, src_output, tgt_output, 
+                       memory_budget=DEFAULT_MEMORY_BUDGET, 
+                       normalize=True, 
+                       temp_dir=None):
+    # type: (str, str, str, str, int, bool, str) -> tuple[int, int]
+    with tempfile.TemporaryDirectory(dir=temp_dir) as runs_dir:
+        run_paths, records, lines_n = write_sorted_runs(src_path, tgt_path, runs_dir, 
+                                                        get_run_size(memory_budget), 
+                                                        normalize=normalize)
+        keep_mask = np.ones(lines_n, dtype=bool)
+
+        if records is not None:
+            keep_mask[get_sorted_duplicate_lines(records)] = False
+            del records
+        else:
+            merge_duplicate_lines(run_paths, keep_mask, memory_budget)
+
+    kept_n = write_kept_lines(src_path, tgt_path, keep_mask, src_output, tgt_output)
+    return lines_n, kept_n
+
+# Deduplicates a corpus replacing its files
+def deduplicate_corpus_inplace(src_path, tgt_path, 
+                               memory_budget=DEFAULT_MEMORY_BUDGET, 
+                               normalize=True):
+    # type: (str, str, int, bool) -> tuple[int, int]
+    src_output, tgt_output = [path + '.dedup' for path in [src_path, tgt_path]]
+    lines_n, kept_n = deduplicate_corpus(src_path, tgt_path, src_output, tgt_output, 
+                                         memory_budget=memory_budget, 
+                                         normalize=normalize,
+                                         temp_dir=os.path.dirname(os.path.abspath(src_path)))
+    os.replace(src_output, src_path)
+    os.replace(tgt_output, tgt_path)
+    return lines_n, kept_n
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('src_path', type=str, help='Source side of the corpus')
+    parser.add_argument('tgt_path', type=str, help='Target side of the corpus')
+    parser.add_argument('src_output', type=str, help='Deduplicated source output')
+    parser.add_argument('tgt_output', type=str, help='Deduplicated target output')
+    parser.add_argument('--memory-mb', type=int, default=DEFAULT_MEMORY_BUDGET // (1 << 20), help='Memory budget of the sorted runs in MB')
+    parser.add_argument('--no-normalize', action='store_true', default=False, help='Compare raw sentences instead of normalized ones')
+    return vars(parser.parse_args())
+
+# Example: python -m src.domain.processing.external_dedup crawl.gn crawl.es crawl.dedup.gn crawl.dedup.es --memory-mb 512
+if __name__ == '__main__':
+    args = parse_args()
+    lines_n, kept_n = deduplicate_corpus(args['src_path'], args['tgt_path'], 
+                                         args['src_output'], args['tgt_output'], 
+                                         memory_budget=args['memory_mb'] * (1 << 20), 
+                                         normalize=not args['no_normalize'])
+    print('{} pairs, {} duplicates removed, {} pairs written'.format(lines_n, lines_n - kept_n, kept_n))
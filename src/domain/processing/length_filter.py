@@ -0,0 +1,138 @@
+import os
+import json
+import argparse
+
+import numpy as np
+
+from src.domain.processing.corpus_index import LineIndex, ParallelCorpusIndex
+
+WHITESPACE_BYTES = np.array([ord(' '), ord('\t'), ord('\n'), ord('\r')], dtype=np.uint8)
+LINE_BREAK_BYTES = np.array([ord('\n'), ord('\r')], dtype=np.uint8)
+
+# Character (UTF-8 code points) and whitespace token counts of every line, 
+# computed on the memory-mapped file in blocks of whole lines
+def get_line_statistics(line_index, block_size=1 << 24):
+    # type: (LineIndex, int) -> tuple[np.ndarray, np.ndarray]
+    offsets = np.asarray(line_index.offsets, dtype=np.int64)
+    char_lengths = np.zeros(len(line_index), dtype=np.int64)
+    token_lengths = np.zeros(len(line_index), dtype=np.int64)
+    start_line = 0
+
+    while start_line < len(line_index):
+        end_line = int(np.searchsorted(offsets, offsets[start_line] + block_size, side='right')) - 1
+        end_line = min(max(end_line, start_line + 1), len(line_index))
+        start, end = int(offsets[start_line]), int(offsets[end_line])
+
+        block = np.frombuffer(line_index.data, dtype=np.uint8, count=end - start, offset=start)
+        is_space = np.isin(block, WHITESPACE_BYTES)
+        is_char = ((block & 0xC0) != 0x80) & ~np.isin(block, LINE_BREAK_BYTES)
+        is_token_start = ~is_space
+        is_token_start[1:] &= is_space[:-1]
+
+        line_starts = offsets[start_line:end_line] - start
+        char_lengths[start_line:end_line] = np.add.reduceat(is_char, line_starts)
+        token_lengths[start_line:end_line] = np.add.reduceat(is_token_start, line_starts)
+        start_line = end_line
+
+    return char_lengths, token_lengths
+
+# Boolean masks of the pairs removed by each filter, a None limit disables its filter
+def get_length_masks(src_lengths, tgt_lengths, min_length=None, max_length=None, max_ratio=None):
+    # type: (np.ndarray, np.ndarray, int, int, float) -> dict[str, np.ndarray]
+    masks = {}
+    if min_length is not None:
+        masks['too_short'] = np.minimum(src_lengths, tgt_lengths) < min_length
+    if max_length is not None:
+        masks['too_long'] = np.maximum(src_lengths, tgt_lengths) > max_length
+    if max_ratio is not None:
+        ratios = np.maximum(src_lengths, tgt_lengths) / np.maximum(np.minimum(src_lengths, tgt_lengths), 1)
+        masks['ratio'] = ratios > max_ratio
+    return masks
+
+def get_keep_mask(masks, pairs_n):
+    # type: (dict[str, np.ndarray], int) -> np.ndarray
+    keep_mask = np.ones(pairs_n, dtype=bool)
+    for mask in masks.values():
+        keep_mask &= ~mask
+    return keep_mask
+
+def get_length_summary(lengths):
+    # type: (np.ndarray) -> dict
+    if len(lengths) == 0:
+        return {}
+    percentiles = np.percentile(lengths, [50, 90, 99])
+    return {'mean': float(lengths.mean()), 'max': int(lengths.max()), 
+            'p50': float(percentiles[0]), 'p90': float(percentiles[1]), 'p99': float(percentiles[2])}
+
+# Filters the pairs of a corpus by token length and src/tgt token ratio, 
+# max_chars also removes pairs with overlong lines (e.g. concatenated sentences)
+def filter_corpus(src_path, tgt_path, src_output, tgt_output, 
+                  min_length=None, 
+                  max_length=None, 
+                  max_ratio=None, 
+                  max_chars=None,
+                  save_index=True):
+    # type: (str, str, str, str, int, int, float, int, bool) -> dict
+    with ParallelCorpusIndex(src_path, tgt_path, save_index=save_index) as corpus_index:
+        src_chars, src_tokens = get_line_statistics(corpus_index.src)
+        tgt_chars, tgt_tokens = get_line_statistics(corpus_index.tgt)
+
+        masks = get_length_masks(src_tokens, tgt_tokens, 
+                                 min_length=min_length, 
+                                 max_length=max_length, 
+                                 max_ratio=max_ratio)
+        if max_chars is not None:
+            masks['too_many_chars'] = np.maximum(src_chars, tgt_chars) > max_chars
+
+        keep_mask = get_keep_mask(masks, len(corpus_index))
+        kept_n = corpus_index.write_pairs(np.flatnonzero(keep_mask), src_output, tgt_output)
+
+    return {'src_path': src_path,
+            'tgt_path': tgt_path,
+            'filters': {'min_length': min_length, 'max_length': max_length, 
+                        'max_ratio': max_ratio, 'max_chars': max_chars},
+            'pairs': len(keep_mask),
+            'kept': kept_n,
+            'removed': {name: int(np.count_nonzero(mask)) for name, mask in masks.items()},
+            'src_tokens': get_length_summary(src_tokens),
+            'tgt_tokens': get_length_summary(tgt_tokens)}
+
+# Filters a corpus replacing its files, line indexes are not saved since the files change
+def filter_corpus_inplace(src_path, tgt_path, **filters):
+    # type: (str, str, ...) -> dict
+    src_output, tgt_output = [path + '.filtered' for path in [src_path, tgt_path]]
+    report = filter_corpus(src_path, tgt_path, src_output, tgt_output, save_index=False, **filters)
+    os.replace(src_output, src_path)
+    os.replace(tgt_output, tgt_path)
+    return report
+
+def save_report(report, report_path):
+    # type: (dict | list[dict], str) -> None
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4)
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('src_path', type=str, help='Source side of the corpus')
+    parser.add_argument('tgt_path', type=str, help='Target side of the corpus')
+    parser.add_argument('src_output', type=str, help='Filtered source output')
+    parser.add_argument('tgt_output', type=str, help='Filtered target output')
+    parser.add_argument('--min-length', type=int, default=None, help='Minimum number of tokens of both sentences')
+    parser.add_argument('--max-length', type=int, default=None, help='Maximum number of tokens of both sentences')
+    parser.add_argument('--max-ratio', type=float, default=None, help='Maximum ratio between the longest and the shortest sentence')
+    parser.add_argument('--max-chars', type=int, default=None, help='Maximum number of characters of both sentences')
+    parser.add_argument('--report', type=str, default=None, help='Writes the filtering report to this json file')
+    return vars(parser.parse_args())
+
+# Example: python -m src.domain.processing.length_filter train.gn train.es train.filtered.gn train.filtered.es --max-length 200 --max-ratio 3
+if __name__ == '__main__':
+    args = parse_args()
+    report = filter_corpus(args['src_path'], args['tgt_path'], 
+                           args['src_output'], args['tgt_output'], 
+                           min_length=args['min_length'], 
+                           max_length=args['max_length'], 
+                           max_ratio=args['max_ratio'], 
+                           max_chars=args['max_chars'])
+    if args['report'] is not None:
+        save_report(report, args['report'])
+    print(json.dumps(report, indent=4))
@@ -0,0 +1,174 @@
+import os
+import itertools
+import argparse
+
+import numpy as np
+
+from src.domain.processing.search_duplicates import normalize_sentence, read_aligned_pairs, write_deduplicated_corpus, parse_corpora
+
+MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+SHINGLE_BASE = np.uint64(1000003)
+MAX_CHUNK_SHINGLES = 1 << 17
+
+# Hashes of the character k-grams of a normalized sentence pair
+def get_shingles(src, tgt, shingle_size=5):
+    # type: (str, str, int) -> np.ndarray
+    text = normalize_sentence(src) + '\t' + normalize_sentence(tgt)
+    codepoints = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+
+    if len(codepoints) < shingle_size:
+        codepoints = np.pad(codepoints, (0, shingle_size - len(codepoints)))
+
+    windows = np.lib.stride_tricks.sliding_window_view(codepoints, shingle_size)
+    powers = SHINGLE_BASE ** np.arange(shingle_size - 1, -1, -1, dtype=np.uint64) # Wraps around 2^64
+    shingles = (windows * powers).sum(axis=1) % MERSENNE_PRIME
+    return np.unique(shingles)
+
+def get_permutations(num_perm=128, seed=1234):
+    # type: (int, int) -> tuple[np.ndarray, np.ndarray]
+    random_generator = np.random.default_rng(seed)
+    a = random_generator.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+    b = random_generator.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+    return a, b
+
+# MinHash signatures of all the sentences at once, shingles are processed in chunks to bound memory
+def get_minhash_signatures(shingles_list, num_perm=128, seed=1234):
+    # type: (list[np.ndarray], int, int) -> np.ndarray
+    a, b = get_permutations(num_perm, seed)
+    signatures = np.empty((len(shingles_list), num_perm), dtype=np.uint64)
+    start = 0
+
+    while start < len(shingles_list):
+        end, chunk_size = start, 0
+        while end < len(shingles_list) and (end == start or chunk_size + len(shingles_list[end]) <= MAX_CHUNK_SHINGLES):
+            chunk_size += len(shingles_list[end])
+            end += 1
+
+        chunk_shingles = np.concatenate(shingles_list[start:end])
+        chunk_offsets = np.cumsum([0] + [len(shingles) for shingles in shingles_list[start:end - 1]])
+        hashes = (a[:, None] * chunk_shingles[None, :] + b[:, None]) % MERSENNE_PRIME
+        signatures[start:end] = np.minimum.reduceat(hashes, chunk_offsets, axis=1).T
+        start = end
+
+    return signatures
+
+LSH_INTEGRATION_POINTS = 1001
+
+# Probability of two sentences with Jaccard similarity s falling in the same bucket of at least one band
+def get_candidate_probability(similarity, bands, rows):
+    # type: (np.ndarray, int, int) -> np.ndarray
+    return 1 - (1 - np.asarray(similarity, dtype=np.float64) ** rows) ** bands
+
+def __integrate(values, points):
+    # type: (np.ndarray, np.ndarray) -> float
+    return float(((values[1:] + values[:-1]) / 2 * np.diff(points)).sum())
+
+# Bands and rows per band (bands * rows <= num_perm) minimizing the weighted probability of false positives
+# (similarity below the threshold) and false negatives (similarity above it), as datasketch's _optimal_param
+def get_lsh_parameters(num_perm, threshold, false_positive_weight=0.5, false_negative_weight=0.5):
+    # type: (int, float, float, float) -> tuple[int, int]
+    below_threshold = np.linspace(0, threshold, LSH_INTEGRATION_POINTS)
+    above_threshold = np.linspace(threshold, 1, LSH_INTEGRATION_POINTS)
+    best_parameters, min_error = None, None
+
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            false_positives = __integrate(get_candidate_probability(below_threshold, bands, rows), below_threshold)
+            false_negatives = __integrate(1 - get_candidate_probability(above_threshold, bands, rows), above_threshold)
+            error = false_positive_weight * false_positives + false_negative_weight * false_negatives
+            if min_error is None or error < min_error:
+                best_parameters, min_error = (bands, rows), error
+    return best_parameters
+
+def get_candidate_pairs(signatures, bands, rows):
+    # type: (np.ndarray, int, int) -> np.ndarray
+    candidate_pairs = set()
+    multipliers = np.random.default_rng(0).integers(1, np.iinfo(np.int64).max, size=rows, dtype=np.uint64)
+
+    for band in range(bands):
+        band_keys = (signatures[:, band * rows:(band + 1) * rows] * multipliers).sum(axis=1)
+        order = np.argsort(band_keys, kind='stable')
+        sorted_keys = band_keys[order]
+        bucket_starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        bucket_ends = np.r_[bucket_starts[1:], len(sorted_keys)]
+
+        for bucket_start, bucket_end in zip(bucket_starts, bucket_ends):
+            if bucket_end - bucket_start > 1:
+                bucket = np.sort(order[bucket_start:bucket_end])
+                candidate_pairs.update(itertools.combinations(bucket.tolist(), 2))
+
+    return np.array(sorted(candidate_pairs), dtype=np.int64).reshape(-1, 2)
+
+# Sentences with identical signatures, each one is represented by the first sentence of its group
+def get_signature_representatives(signatures):
+    # type: (np.ndarray) -> np.ndarray
+    _, first_indices, groups = np.unique(signatures, axis=0, return_index=True, return_inverse=True)
+    return first_indices[groups.reshape(-1)]
+
+# Returns the (i, j, estimated Jaccard similarity) of every near duplicate pair, with i < j.
+# Identical signatures (exact duplicates, blank lines, boilerplate) are collapsed before bucketing: each one is
+# paired with its representative only, instead of every pair of the group falling in the same bucket of every band.
+def search_near_duplicates(signatures, threshold=0.8):
+    # type: (np.ndarray, float) -> tuple[np.ndarray, np.ndarray]
+    bands, rows = get_lsh_parameters(signatures.shape[1], threshold)
+    representatives = get_signature_representatives(signatures)
+    is_duplicate = representatives != np.arange(len(signatures))
+    duplicate_pairs = np.stack([representatives[is_duplicate], np.flatnonzero(is_duplicate)], axis=1)
+
+    unique_indices = np.flatnonzero(~is_duplicate)
+    candidate_pairs = unique_indices[get_candidate_pairs(signatures[unique_indices], bands, rows)].reshape(-1, 2)
+    similarities = (signatures[candidate_pairs[:, 0]] == signatures[candidate_pairs[:, 1]]).mean(axis=1)
+    is_near_duplicate = similarities >= threshold
+
+    near_duplicate_pairs = np.vstack([duplicate_pairs, candidate_pairs[is_near_duplicate]])
+    similarities = np.r_[np.ones(len(duplicate_pairs)), similarities[is_near_duplicate]]
+    order = np.lexsort((near_duplicate_pairs[:, 1], near_duplicate_pairs[:, 0]))
+    return near_duplicate_pairs[order], similarities[order]
+
+# A pair is removed if it is a near duplicate of an earlier pair that was kept. A pair with the same signature
+# (similarity 1) as an earlier one is always removed, it is a near duplicate of whatever removed the earlier one.
+def get_near_duplicate_keep_mask(near_duplicate_pairs, pairs_n, similarities=None):
+    # type: (np.ndarray, int, np.ndarray) -> np.ndarray
+    similarities = np.zeros(len(near_duplicate_pairs)) if similarities is None else similarities
+    keep_mask = np.ones(pairs_n, dtype=bool)
+    order = np.argsort(near_duplicate_pairs[:, 1], kind='stable')
+    for (i, j), similarity in zip(near_duplicate_pairs[order].tolist(), similarities[order].tolist()):
+        if keep_mask[i] or similarity == 1:
+            keep_mask[j] = False
+    return keep_mask
+
+def get_corpus_signatures(src_path, tgt_path, shingle_size=5, num_perm=128, seed=1234):
+    # type: (str, str, int, int, int) -> np.ndarray
+    with open(src_path, 'r', encoding='utf-8') as src_f, \
+         open(tgt_path, 'r', encoding='utf-8') as tgt_f:
+        shingles_list = [get_shingles(src, tgt, shingle_size) for src, tgt in read_aligned_pairs(src_f, tgt_f)]
+    return get_minhash_signatures(shingles_list, num_perm=num_perm, seed=seed)
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--corpus', type=str, required=True, help='Corpus as name=path_prefix (e.g. bible=artifacts/data/train/bible)')
+    parser.add_argument('--languages', type=str, nargs=2, default=['gn', 'es'], help='Extensions of the source and target files')
+    parser.add_argument('--threshold', type=float, default=0.8, help='Minimum estimated Jaccard similarity of near duplicates')
+    parser.add_argument('--num-perm', type=int, default=128, help='Number of MinHash permutations')
+    parser.add_argument('--shingle-size', type=int, default=5, help='Length of the character shingles')
+    parser.add_argument('--output-dir', type=str, default=None, help='Writes the corpus without near duplicates to this directory')
+    return vars(parser.parse_args())
+
+# Example: python -m src.domain.processing.near_duplicates --corpus bible=artifacts/data/train/bible --threshold 0.8 --output-dir artifacts/data/train/near_dedup
+if __name__ == '__main__':
+    args = parse_args()
+    name, (src_path, tgt_path) = list(parse_corpora([args['corpus']], args['languages']).items())[0]
+    signatures = get_corpus_signatures(src_path, tgt_path, 
+                                       shingle_size=args['shingle_size'], 
+                                       num_perm=args['num_perm'])
+    near_duplicate_pairs, similarities = search_near_duplicates(signatures, threshold=args['threshold'])
+    keep_mask = get_near_duplicate_keep_mask(near_duplicate_pairs, len(signatures), similarities)
+    print('{}: {} pairs, {} near duplicate candidates, {} pairs to remove'.format(
+        name, len(signatures), len(near_duplicate_pairs), len(signatures) - int(keep_mask.sum())))
+
+    if args['output_dir'] is not None:
+        os.makedirs(args['output_dir'], exist_ok=True)
+        src_output, tgt_output = [os.path.join(args['output_dir'], os.path.basename(path)) 
+                                  for path in [src_path, tgt_path]]
+        kept_n = write_deduplicated_corpus(src_path, tgt_path, keep_mask, src_output, tgt_output)
+        print('{}: {} pairs written to {} and {}'.format(name, kept_n, src_output, tgt_output))
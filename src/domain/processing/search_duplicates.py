@@ -1,4 +1,13 @@
+import os
 import sys
+import array
+import hashlib
+import itertools
+import argparse
+
+import numpy as np
+
+from src.domain.processing.cleaning import normalize_text
 
 def search_duplicates(file_dir, verbose=False):
     # type: (str, bool) -> (tuple[dict, dict])
@@ -23,12 +32,142 @@ def search_duplicates(file_dir, verbose=False):
 
     return words, duplicate_indexes
 
+def normalize_sentence(sentence):
+    # type: (str) -> str
+    return ' '.join(normalize_text(sentence, lowercase=True).split())
+
+# 64-bit digest of a normalized sentence pair
+def hash_pair(src, tgt, normalize=True):
+    # type: (str, str, bool) -> int
+    if normalize:
+        src, tgt = normalize_sentence(src), normalize_sentence(tgt)
+    digest = hashlib.blake2b((src + '\t' + tgt).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+MISSING_LINE = object()
+
+# Sentence pairs of the corpus, raising on the first line without counterpart instead of truncating it
+def read_aligned_pairs(src_f, tgt_f):
+    # type: (iter, iter) -> iter
+    for line, (src, tgt) in enumerate(itertools.zip_longest(src_f, tgt_f, fillvalue=MISSING_LINE)):
+        if src is MISSING_LINE or tgt is MISSING_LINE:
+            longer_f = src_f if tgt is MISSING_LINE else tgt_f
+            raise ValueError('Misaligned corpora: line {} of {} has no counterpart'.format(line + 1, longer_f.name))
+        yield src, tgt
+
+def get_pair_digests(src_path, tgt_path, normalize=True):
+    # type: (str, str, bool) -> np.ndarray
+    digests = array.array('Q')
+
+    with open(src_path, 'r', encoding='utf-8') as src_f, \
+         open(tgt_path, 'r', encoding='utf-8') as tgt_f:
+        for src, tgt in read_aligned_pairs(src_f, tgt_f):
+            digests.append(hash_pair(src, tgt, normalize=normalize))
+
+    return np.frombuffer(digests, dtype=np.uint64)
+
+# Pairs that appeared before in the same digests array
+def get_duplicate_mask(digests):
+    # type: (np.ndarray) -> np.ndarray
+    _, first_indices = np.unique(digests, return_index=True)
+    duplicate_mask = np.ones(len(digests), dtype=bool)
+    duplicate_mask[first_indices] = False
+    return duplicate_mask
+
+# corpora and eval_corpora map a name to its (src_path, tgt_path) pair.
+# Training corpora are checked for duplicate pairs (within and across them) and for pairs leaked into evaluation corpora.
+def search_duplicate_pairs(corpora, eval_corpora, normalize=True):
+    # type: (dict[str, tuple[str, str]], dict[str, tuple[str, str]], bool) -> tuple[dict, dict]
+    digests = {name: get_pair_digests(*paths, normalize=normalize) 
+               for name, paths in {**corpora, **eval_corpora}.items()}
+    report = {'pairs': {}, 'duplicates': {}, 'leakage': {}}
+
+    for name, corpus_digests in digests.items():
+        report['pairs'][name] = len(corpus_digests)
+        report['duplicates'][name] = int(np.count_nonzero(get_duplicate_mask(corpus_digests)))
+
+    train_digests = np.concatenate([digests[name] for name in corpora]) \
+                    if len(corpora) > 0 else np.empty(0, dtype=np.uint64)
+    report['duplicates']['all_train'] = int(np.count_nonzero(get_duplicate_mask(train_digests)))
+
+    for eval_name in eval_corpora:
+        for train_name in corpora:
+            leaked = np.isin(digests[train_name], digests[eval_name])
+            report['leakage'][(train_name, eval_name)] = int(np.count_nonzero(leaked))
+
+    return report, digests
+
+# Keeps the first occurrence of every training pair that is not in an evaluation corpus
+def get_deduplicated_masks(corpora, eval_corpora, digests):
+    # type: (dict, dict, dict[str, np.ndarray]) -> dict[str, np.ndarray]
+    train_names = list(corpora)
+    eval_digests = np.concatenate([digests[name] for name in eval_corpora]) \
+                   if len(eval_corpora) > 0 else np.empty(0, dtype=np.uint64)
+    train_digests = np.concatenate([digests[name] for name in train_names])
+    keep_mask = ~get_duplicate_mask(train_digests) & ~np.isin(train_digests, eval_digests)
+    split_indices = np.cumsum([len(digests[name]) for name in train_names])[:-1]
+    return dict(zip(train_names, np.split(keep_mask, split_indices)))
+
+def write_deduplicated_corpus(src_path, tgt_path, keep_mask, src_output, tgt_output):
+    # type: (str, str, np.ndarray, str, str) -> int
+    with open(src_path, 'r', encoding='utf-8') as src_f, \
+         open(tgt_path, 'r', encoding='utf-8') as tgt_f, \
+         open(src_output, 'w', encoding='utf-8') as src_output_f, \
+         open(tgt_output, 'w', encoding='utf-8') as tgt_output_f:
+        for keep, (src, tgt) in zip(keep_mask, read_aligned_pairs(src_f, tgt_f)):
+            if keep:
+                src_output_f.write(src.rstrip('\n') + '\n')
+                tgt_output_f.write(tgt.rstrip('\n') + '\n')
+    return int(np.count_nonzero(keep_mask))
+
+def parse_corpora(corpora, languages):
+    # type: (list[str], list[str]) -> dict[str, tuple[str, str]]
+    parsed_corpora = {}
+    for corpus in corpora:
+        name, prefix = corpus.split('=', 1)
+        parsed_corpora[name] = tuple(prefix + '.' + language for language in languages)
+    return parsed_corpora
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('file_dir', type=str, nargs='?', default=None, help='File to search for duplicate words')
+    parser.add_argument('--corpora', type=str, nargs='*', default=[], help='Training corpora as name=path_prefix (e.g. bible=artifacts/data/train/bible)')
+    parser.add_argument('--eval-corpora', type=str, nargs='*', default=[], help='Evaluation corpora as name=path_prefix (e.g. test=artifacts/data/test/test)')
+    parser.add_argument('--languages', type=str, nargs=2, default=['gn', 'es'], help='Extensions of the source and target files')
+    parser.add_argument('--output-dir', type=str, default=None, help='Writes the deduplicated training corpora to this directory')
+    parser.add_argument('--no-normalize', action='store_true', default=False, help='Compare raw sentences instead of normalized ones')
+    return vars(parser.parse_args())
+
+# Example: python -m src.domain.processing.search_duplicates --corpora train=artifacts/data/train/train bible=artifacts/data/train/bible ancora=artifacts/data/train/ancora --eval-corpora dev=artifacts/data/validation/valid test=artifacts/data/test/test
 if __name__ == '__main__':
-    file_dir = sys.argv[1]
-    words, duplicate_indexes = search_duplicates(file_dir)
-    print('Duplicate indexes: {duplicate_indexes}'.format(
-        duplicate_indexes=list(duplicate_indexes.keys())))
-    with open(file_dir + '.nodup', 'w', encoding='utf-8') as f:
-        for idx, word in enumerate(words.keys()):
-            if duplicate_indexes.get(word, None) is None:
-                f.write(word + '\n')
\ No newline at end of file
+    args = parse_args()
+
+    if args['file_dir'] is not None:
+        file_dir = args['file_dir']
+        words, duplicate_indexes = search_duplicates(file_dir)
+        print('Duplicate indexes: {duplicate_indexes}'.format(
+            duplicate_indexes=list(duplicate_indexes.keys())))
+        with open(file_dir + '.nodup', 'w', encoding='utf-8') as f:
+            for idx, word in enumerate(words.keys()):
+                if duplicate_indexes.get(word, None) is None:
+                    f.write(word + '\n')
+        sys.exit(0)
+
+    corpora = parse_corpora(args['corpora'], args['languages'])
+    eval_corpora = parse_corpora(args['eval_corpora'], args['languages'])
+    report, digests = search_duplicate_pairs(corpora, eval_corpora, normalize=not args['no_normalize'])
+
+    for name, pairs_n in report['pairs'].items():
+        print('{}: {} pairs, {} duplicates'.format(name, pairs_n, report['duplicates'][name]))
+    print('Duplicates across training corpora: {}'.format(report['duplicates']['all_train']))
+    for (train_name, eval_name), leaked_n in report['leakage'].items():
+        print('Pairs of {} leaked into {}: {}'.format(train_name, eval_name, leaked_n))
+
+    if args['output_dir'] is not None and len(corpora) > 0:
+        os.makedirs(args['output_dir'], exist_ok=True)
+        keep_masks = get_deduplicated_masks(corpora, eval_corpora, digests)
+        for name, (src_path, tgt_path) in corpora.items():
+            src_output, tgt_output = [os.path.join(args['output_dir'], os.path.basename(path)) 
+                                      for path in [src_path, tgt_path]]
+            kept_n = write_deduplicated_corpus(src_path, tgt_path, keep_masks[name], src_output, tgt_output)
+            print('{}: {} pairs written to {} and {}'.format(name, kept_n, src_output, tgt_output))
@@ -0,0 +1,240 @@
+import os
+import heapq
+import shutil
+import struct
+import argparse
+import tempfile
+import itertools
+import collections
+
+from src.utils import file_manager
+
+try:
+    import sentencepiece
+except ImportError:
+    sentencepiece = None
+
+WORD_BOUNDARY = '▁'
+EOS_PIECE, UNK_PIECE = '</s>', '<unk>'
+DEFAULT_MAX_LINES = 2000000
+
+# Same special ids as the vocabularies Marian trains itself: </s> is 0, <unk> is 1 and there is no <s>
+MARIAN_TRAINER_OPTIONS = {'bos_id': -1, 'eos_id': 0, 'unk_id': 1, 'pad_id': -1}
+
+# Enum values of sentencepiece_model.proto
+BPE_MODEL_TYPE = 2
+NORMAL_PIECE, UNKNOWN_PIECE, CONTROL_PIECE = 1, 2, 3
+
+# Marian's --sentencepiece-options are trainer flags like "--character_coverage=1.0 --model_type=bpe"
+def parse_sentencepiece_options(options):
+    # type: (str) -> dict[str, str]
+    parsed_options = {}
+    for option in (options or '').split():
+        name, _, value = option.lstrip('-').partition('=')
+        parsed_options[name] = value if value != '' else 'true'
+    return parsed_options
+
+def read_lines(input_paths, max_lines=DEFAULT_MAX_LINES):
+    # type: (list[str], int) -> iter
+    lines = (line.rstrip('\n') for input_path in input_paths \
+                               for line in __read_file_lines(input_path))
+    return itertools.islice(lines, max_lines)
+
+def __read_file_lines(input_path):
+    # type: (str) -> iter
+    with file_manager.open_file(input_path, 'r') as f:
+        yield from f
+
+def train_sentencepiece(input_paths, model_path, vocab_size, max_lines=DEFAULT_MAX_LINES, options=None):
+    # type: (list[str], str, int, int, str) -> str
+    trainer_options = {
+        **MARIAN_TRAINER_OPTIONS,
+        'input_sentence_size': max_lines,
+        'shuffle_input_sentence': True,
+        **parse_sentencepiece_options(options),
+    }
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        model_prefix = os.path.join(temp_dir, 'vocabulary')
+        sentencepiece.SentencePieceTrainer.train(
+            sentence_iterator=read_lines(input_paths, max_lines=None),
+            model_prefix=model_prefix,
+            vocab_size=vocab_size,
+            **trainer_options)
+        shutil.move(model_prefix + '.model', model_path)
+    return model_path
+
+def get_word_counts(input_paths, max_lines=DEFAULT_MAX_LINES):
+    # type: (list[str], int) -> collections.Counter
+    word_counts = collections.Counter()
+    for line in read_lines(input_paths, max_lines=max_lines):
+        word_counts.update(line.split())
+    return word_counts
+
+def __get_pairs(symbols):
+    # type: (list[str]) -> list[tuple[str, str]]
+    return list(zip(symbols[:-1], symbols[1:]))
+
+def __merge_symbols(symbols, pair):
+    # type: (list[str], tuple[str, str]) -> list[str]
+    merged_symbols = []
+    i = 0
+    while i < len(symbols):
+        if i < len(symbols) - 1 and (symbols[i], symbols[i+1]) == pair:
+            merged_symbols.append(symbols[i] + symbols[i+1])
+            i += 2
+        else:
+            merged_symbols.append(symbols[i])
+            i += 1
+    return merged_symbols
+
+# Byte pair encoding over the word counts, words start with the SentencePiece whitespace symbol.
+# Pair counts are updated only for the words that contain the merged pair, and the most frequent
+# pair is found with a heap whose outdated entries are skipped when popped.
+def learn_bpe(word_counts, pieces_n):
+    # type: (dict[str, int], int) -> list[str]
+    words = [list(WORD_BOUNDARY + word) for word in word_counts]
+    counts = list(word_counts.values())
+    pair_counts = collections.defaultdict(int)
+    pair_words = collections.defaultdict(set)
+
+    for word_idx, (symbols, count) in enumerate(zip(words, counts)):
+        for pair in __get_pairs(symbols):
+            pair_counts[pair] += count
+            pair_words[pair].add(word_idx)
+
+    heap = [(-count, pair) for pair, count in pair_counts.items()]
+    heapq.heapify(heap)
+    pieces, known_pieces = [], {EOS_PIECE, UNK_PIECE}
+
+    while heap and len(pieces) < pieces_n:
+        count, pair = heapq.heappop(heap)
+        if pair_counts.get(pair, 0) != -count or count == 0:
+            continue
+
+        piece = ''.join(pair)
+        pair_deltas = collections.defaultdict(int)
+        for word_idx in pair_words.pop(pair):
+            symbols = words[word_idx]
+            old_pairs = __get_pairs(symbols)
+            if pair not in old_pairs:
+                continue
+
+            new_symbols = __merge_symbols(symbols, pair)
+            word_deltas = collections.Counter(__get_pairs(new_symbols))
+            word_deltas.subtract(old_pairs)
+            for changed_pair, delta in word_deltas.items():
+                if delta != 0:
+                    pair_deltas[changed_pair] += delta * counts[word_idx]
+                if delta > 0:
+                    pair_words[changed_pair].add(word_idx)
+            words[word_idx] = new_symbols
+
+        del pair_counts[pair]
+        pair_deltas.pop(pair, None)
+        for changed_pair, delta in pair_deltas.items():
+            if delta == 0:
+                continue
+            pair_counts[changed_pair] += delta
+            if pair_counts[changed_pair] > 0:
+                heapq.heappush(heap, (-pair_counts[changed_pair], changed_pair))
+            else:
+                del pair_counts[changed_pair]
+
+        # Different merges may build the same string, it is only added once
+        if piece not in known_pieces:
+            known_pieces.add(piece)
+            pieces.append(piece)
+    return pieces
+
+def get_characters(word_counts):
+    # type: (dict[str, int]) -> list[str]
+    character_counts = collections.Counter({WORD_BOUNDARY: sum(word_counts.values())})
+    for word, count in word_counts.items():
+        for character in word:
+            character_counts[character] += count
+    return [character for character, _ in character_counts.most_common()]
+
+def __encode_varint(value):
+    # type: (int) -> bytes
+    value &= (1 << 64) - 1 # Negative int32 values are encoded in ten bytes
+    encoded = bytearray()
+    while value > 0x7f:
+        encoded.append((value & 0x7f) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+def __encode_field(field_number, value):
+    # type: (int, int | float | str | bytes) -> bytes
+    if isinstance(value, float):
+        return __encode_varint(field_number << 3 | 5) + struct.pack('<f', value)
+    if isinstance(value, (bool, int)):
+        return __encode_varint(field_number << 3) + __encode_varint(int(value))
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    return __encode_varint(field_number << 3 | 2) + __encode_varint(len(value)) + value
+
+# Serialized ModelProto of a BPE model with identity normalization, loadable by SentencePiece and Marian
+def get_sentencepiece_model(pieces, characters, vocab_size):
+    # type: (list[str], list[str], int) -> bytes
+    model_pieces = [(EOS_PIECE, 0.0, CONTROL_PIECE), (UNK_PIECE, 0.0, UNKNOWN_PIECE)]
+    model_pieces += [(piece, -float(i), NORMAL_PIECE) for i, piece in enumerate(pieces)]
+    model_pieces += [(character, -float(len(pieces) + i), NORMAL_PIECE) \
+                     for i, character in enumerate(characters)]
+
+    trainer_spec = __encode_field(3, BPE_MODEL_TYPE) + __encode_field(4, vocab_size) + \
+                   b''.join(__encode_field(field_number, MARIAN_TRAINER_OPTIONS[option]) \
+                            for field_number, option in [(40, 'unk_id'), (41, 'bos_id'),
+                                                         (42, 'eos_id'), (43, 'pad_id')])
+    normalizer_spec = __encode_field(1, 'identity') + __encode_field(3, True) + \
+                      __encode_field(4, True) + __encode_field(5, True)
+
+    model = b''.join(__encode_field(1, __encode_field(1, piece) + __encode_field(2, score) + \
+                                       __encode_field(3, piece_type)) \
+                     for piece, score, piece_type in model_pieces)
+    return model + __encode_field(2, trainer_spec) + __encode_field(3, normalizer_spec)
+
+def train_bpe(input_paths, model_path, vocab_size, max_lines=DEFAULT_MAX_LINES):
+    # type: (list[str], str, int, int) -> str
+    word_counts = get_word_counts(input_paths, max_lines=max_lines)
+    characters = get_characters(word_counts)[:max(0, vocab_size - 2)]
+    pieces = learn_bpe(word_counts, vocab_size - 2 - len(characters))
+
+    # As sentencepiece's hard vocabulary limit, dim-vocabs must match the real size of the vocabulary
+    pieces_n = 2 + len(characters) + len(pieces)
+    if pieces_n < vocab_size:
+        raise ValueError('Vocabulary size too high ({}), the corpora only give {} pieces.'.format(vocab_size, pieces_n))
+
+    with open(model_path, 'wb') as f:
+        f.write(get_sentencepiece_model(pieces, characters, vocab_size))
+    return model_path
+
+# Writes the subword model Marian expects in a .spm vocabulary path, without a Marian training run
+def train_subword_vocabulary(input_paths, model_path, vocab_size, max_lines=DEFAULT_MAX_LINES, options=None, use_sentencepiece=True):
+    # type: (list[str], str, int, int, str, bool) -> str
+    model_dir = os.path.dirname(model_path)
+    if model_dir != '':
+        os.makedirs(model_dir, exist_ok=True)
+
+    if use_sentencepiece and sentencepiece is not None:
+        return train_sentencepiece(input_paths, model_path, vocab_size, max_lines=max_lines, options=options)
+    return train_bpe(input_paths, model_path, vocab_size, max_lines=max_lines)
+
+def main():
+    parser = argparse.ArgumentParser(description='Train a SentencePiece vocabulary for Marian')
+    parser.add_argument('--inputs', nargs='+', required=True, help='Training corpora')
+    parser.add_argument('--model', required=True, help='Output vocabulary path (e.g. vocab.V8000.spm)')
+    parser.add_argument('--vocab-size', type=int, required=True, help='Number of pieces')
+    parser.add_argument('--max-lines', type=int, default=DEFAULT_MAX_LINES, help='Maximum number of training lines')
+    parser.add_argument('--sentencepiece-options', default=None, help='Extra SentencePiece trainer flags')
+    parser.add_argument('--bpe', action='store_true', help='Use the pure Python BPE trainer')
+    args = parser.parse_args()
+
+    train_subword_vocabulary(args.inputs, args.model, args.vocab_size,
+                             max_lines=args.max_lines,
+                             options=args.sentencepiece_options,
+                             use_sentencepiece=not args.bpe)
+
+if __name__ == '__main__':
+    main()
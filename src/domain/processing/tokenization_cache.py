@@ -0,0 +1,176 @@
+import os
+import json
+import sqlite3
+import hashlib
+import itertools
+import collections
+from typing import Iterable, Iterator
+
+from src.domain.processing.tokenization import Tokenizer
+
+TOKENIZATION_CACHE_VERSION = 1
+TOKEN_SEPARATOR = '\x1f' # Cleaned tokens never contain control characters
+SQLITE_MAX_VARIABLES = 900
+MAX_PENDING_SENTENCES = 100000 # Sentences waiting for earlier misses before the wrapped tokenizer is drained
+
+# Options of clean_text and clean_token applied by the tokenizers, part of the cache key
+CLEANING_OPTIONS = {'reduce_vocab': True, 'normalize': False, 'clean_punctuation': True, 'clean_spaces': True}
+
+def get_sentence_hash(sentence):
+    # type: (str) -> bytes
+    return hashlib.blake2b(sentence.encode('utf-8'), digest_size=16).digest()
+
+# Upgrading the tokenizer libraries or models (e.g. spaCy or es_core_news_md) starts a new namespace
+def get_namespace(tokenizer_name, cleaning_options=CLEANING_OPTIONS, versions={}):
+    # type: (str, dict, dict) -> str
+    return json.dumps({'version': TOKENIZATION_CACHE_VERSION, 
+                       'tokenizer': tokenizer_name, 
+                       'cleaning': cleaning_options,
+                       'versions': versions}, sort_keys=True)
+
+# Tokenizations are stored in a SQLite file keyed by (tokenizer name and versions, cleaning options, sentence hash),
+# the most recent ones are also kept in an in-process LRU
+class CachedTokenizer(Tokenizer):
+    def __init__(self, tokenizer, cache_path, lru_size=100000, cleaning_options=CLEANING_OPTIONS):
+        # type: (Tokenizer, str, int, dict) -> None
+        super().__init__(tokenizer)
+        self.cache_path = cache_path
+        self.lru_size = lru_size
+        self.lru = collections.OrderedDict()
+        self.namespace = get_namespace(tokenizer.get_name(), cleaning_options, tokenizer.get_versions())
+        self.hits = 0
+        self.misses = 0
+
+        cache_dir = os.path.dirname(os.path.abspath(cache_path))
+        os.makedirs(cache_dir, exist_ok=True)
+        self.connection = sqlite3.connect(cache_path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS tokenizations '
+                                '(namespace TEXT, sentence_hash BLOB, tokens TEXT, '
+                                'PRIMARY KEY (namespace, sentence_hash))')
+
+    def get_name(self):
+        # type: () -> str
+        return self.tokenizer.get_name()
+
+    def get_versions(self):
+        # type: () -> dict
+        return self.tokenizer.get_versions()
+
+    def __get_lru(self, sentence_hash):
+        # type: (bytes) -> list
+        tokens = self.lru.get(sentence_hash)
+        if tokens is not None:
+            self.lru.move_to_end(sentence_hash)
+        return tokens
+
+    def __set_lru(self, sentence_hash, tokens):
+        # type: (bytes, list) -> None
+        self.lru[sentence_hash] = tokens
+        self.lru.move_to_end(sentence_hash)
+        if len(self.lru) > self.lru_size:
+            self.lru.popitem(last=False)
+
+    def __load(self, sentence_hashes):
+        # type: (list[bytes]) -> dict[bytes, list]
+        stored_tokens = {}
+        for start in range(0, len(sentence_hashes), SQLITE_MAX_VARIABLES):
+            hashes = sentence_hashes[start:start + SQLITE_MAX_VARIABLES]
+            rows = self.connection.execute('SELECT sentence_hash, tokens FROM tokenizations '
+                                           'WHERE namespace = ? AND sentence_hash IN ({})'.format(','.join('?' * len(hashes))),
+                                           [self.namespace, *hashes])
+            for sentence_hash, tokens in rows:
+                stored_tokens[sentence_hash] = tokens.split(TOKEN_SEPARATOR) if tokens != '' else []
+        return stored_tokens
+
+    def __store(self, tokenizations):
+        # type: (dict[bytes, list]) -> None
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO tokenizations VALUES (?, ?, ?)',
+                                        [(self.namespace, sentence_hash, TOKEN_SEPARATOR.join(tokens)) 
+                                         for sentence_hash, tokens in tokenizations.items()])
+
+    def tokenize(self, text):
+        # type: (str) -> list
+        return list(self.tokenize_many([text]))[0]
+
+    # Stored tokens of the sentences that are not already resolved or waiting for the wrapped tokenizer
+    def __lookup(self, sentence_hashes, resolved, queued_hashes):
+        # type: (list[bytes], dict[bytes, list], collections.OrderedDict) -> None
+        missing_hashes = []
+        for sentence_hash in dict.fromkeys(sentence_hashes):
+            if sentence_hash in resolved or sentence_hash in queued_hashes:
+                continue
+            tokens = self.__get_lru(sentence_hash)
+            if tokens is not None:
+                resolved[sentence_hash] = tokens
+            else:
+                missing_hashes.append(sentence_hash)
+        resolved.update(self.__load(missing_hashes))
+
+    # Reads the texts in batches looked up at once, queuing every sentence in order and yielding the misses.
+    # It stops early after max_pending sentences, so a long run of hits never waits for a later miss.
+    def __get_missing_texts(self, texts, batch_size, pending, pending_counts, resolved, queued_hashes, max_pending):
+        # type: (Iterator[str], int, collections.deque, collections.Counter, dict[bytes, list], collections.OrderedDict, int) -> Iterator[str]
+        for batch in iter(lambda: list(itertools.islice(texts, batch_size)), []):
+            sentence_hashes = [get_sentence_hash(text) for text in batch]
+            self.__lookup(sentence_hashes, resolved, queued_hashes)
+
+            for sentence_hash, text in zip(sentence_hashes, batch):
+                pending.append(sentence_hash)
+                pending_counts[sentence_hash] += 1
+                if sentence_hash in resolved or sentence_hash in queued_hashes:
+                    self.hits += 1
+                    continue
+                self.misses += 1
+                queued_hashes[sentence_hash] = None
+                yield text
+
+            if len(pending) >= max_pending:
+                return
+
+    # Misses are streamed through a single tokenize_many of the wrapped tokenizer (a single spaCy process pool),
+    # their tokens are stored and the sentences are yielded in order as the tokenizations arrive
+    def tokenize_many(self, texts, batch_size=1000, n_process=1, max_pending=MAX_PENDING_SENTENCES):
+        # type: (Iterable[str], int, int, int) -> Iterator[list]
+        source_texts = iter(texts)
+        pending = collections.deque() # Hashes of the read sentences in order
+        pending_counts = collections.Counter()
+        resolved = {} # Tokens of the hashes in pending
+        queued_hashes = collections.OrderedDict() # Misses sent to the wrapped tokenizer, in order
+        tokenizations = {}
+
+        def pop_resolved():
+            while len(pending) > 0 and pending[0] in resolved:
+                sentence_hash = pending.popleft()
+                tokens = resolved[sentence_hash]
+                pending_counts[sentence_hash] -= 1
+                if pending_counts[sentence_hash] == 0: # Repeated sentences share their tokens
+                    del pending_counts[sentence_hash], resolved[sentence_hash]
+                self.__set_lru(sentence_hash, tokens)
+                yield list(tokens)
+
+        try:
+            for text in source_texts:
+                texts = itertools.chain([text], source_texts)
+                missing_texts = self.__get_missing_texts(texts, batch_size, pending, pending_counts, 
+                                                         resolved, queued_hashes, max_pending)
+                first_text = next(missing_texts, None)
+
+                if first_text is not None: # The wrapped tokenizer (and its processes) only starts if there are misses
+                    missing_texts = itertools.chain([first_text], missing_texts)
+                    for tokens in self.tokenizer.tokenize_many(missing_texts, batch_size=batch_size, n_process=n_process):
+                        sentence_hash, _ = queued_hashes.popitem(last=False)
+                        resolved[sentence_hash] = tokens
+                        tokenizations[sentence_hash] = tokens
+                        if len(tokenizations) >= batch_size:
+                            self.__store(tokenizations)
+                            tokenizations = {}
+                        yield from pop_resolved()
+                yield from pop_resolved()
+        finally:
+            self.__store(tokenizations)
+
+    def close(self):
+        # type: () -> None
+        self.connection.close()
@@ -0,0 +1,84 @@
+import time
+import argparse
+import collections
+
+from src.domain.processing.tokenization import Tokenizer, get_tokenizer, NLTKTokenizer
+
+# Tokens of every sentence and the time a single run of the tokenizer takes over them
+def time_tokenizer(tokenizer, sentences):
+    # type: (Tokenizer, list[str]) -> tuple[list[list], float]
+    start = time.perf_counter()
+    tokens = [tokenizer.tokenize(sentence) for sentence in sentences]
+    return tokens, time.perf_counter() - start
+
+# Sentence and token agreement of a candidate tokenizer with a reference one, 
+# token agreement is the Dice coefficient of the token multisets of each sentence.
+# The runs of both tokenizers alternate and each one keeps its best time out of repeats runs,
+# so a single slow run does not decide the speedup.
+def compare_tokenizers(reference, candidate, sentences, max_differences=20, repeats=1):
+    # type: (Tokenizer, Tokenizer, list[str], int, int) -> dict
+    reference_time, candidate_time = float('inf'), float('inf')
+    for _ in range(max(repeats, 1)):
+        reference_tokens, run_time = time_tokenizer(reference, sentences)
+        reference_time = min(reference_time, run_time)
+        candidate_tokens, run_time = time_tokenizer(candidate, sentences)
+        candidate_time = min(candidate_time, run_time)
+
+    equal_sentences, common_tokens, total_tokens = 0, 0, 0
+    differences = collections.Counter()
+
+    for tokens, other_tokens in zip(reference_tokens, candidate_tokens):
+        total_tokens += len(tokens) + len(other_tokens)
+        if tokens == other_tokens:
+            equal_sentences += 1
+            common_tokens += 2 * len(tokens)
+            continue
+
+        token_counts, other_token_counts = collections.Counter(tokens), collections.Counter(other_tokens)
+        common_tokens += 2 * sum((token_counts & other_token_counts).values())
+        differences.update(('reference', token) for token in token_counts - other_token_counts)
+        differences.update(('candidate', token) for token in other_token_counts - token_counts)
+
+    sentences_n = max(len(sentences), 1)
+    return {'sentences': len(sentences),
+            'sentence_agreement': equal_sentences / sentences_n,
+            'token_agreement': common_tokens / total_tokens if total_tokens > 0 else 1.0,
+            'reference_time': reference_time,
+            'candidate_time': candidate_time,
+            'speedup': reference_time / candidate_time if candidate_time > 0 else float('inf'),
+            'differences': differences.most_common(max_differences)}
+
+def read_sentences(file_path, max_sentences=None):
+    # type: (str, int) -> list[str]
+    sentences = []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if max_sentences is not None and len(sentences) >= max_sentences:
+                break
+            sentences.append(line.rstrip('\n'))
+    return sentences
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('corpora', type=str, nargs='+', help='Corpus files with a sentence per line')
+    parser.add_argument('--reference', type=str, default='nltk', help='Reference tokenizer')
+    parser.add_argument('--candidate', type=str, default='fast', help='Tokenizer compared with the reference')
+    parser.add_argument('--preserve-line', action='store_true', default=False, help='Skip the NLTK sentence splitting')
+    parser.add_argument('--max-sentences', type=int, default=None, help='Sentences read from each corpus')
+    parser.add_argument('--repeats', type=int, default=3, help='Timed runs of each tokenizer, the best one is kept')
+    return vars(parser.parse_args())
+
+# Example: python -m src.domain.processing.tokenizer_parity artifacts/data/train/train.gn artifacts/data/train/train.es
+if __name__ == '__main__':
+    args = parse_args()
+    reference = NLTKTokenizer(preserve_line=args['preserve_line']) if args['reference'] == 'nltk' \
+                else get_tokenizer(args['reference'])
+    candidate = get_tokenizer(args['candidate'])
+
+    for corpus in args['corpora']:
+        report = compare_tokenizers(reference, candidate, read_sentences(corpus, args['max_sentences']), 
+                                    repeats=args['repeats'])
+        print('{}: {} sentences, sentence agreement {:.4f}, token agreement {:.4f}, {:.1f}x faster'.format(
+            corpus, report['sentences'], report['sentence_agreement'], report['token_agreement'], report['speedup']))
+        for (tokenizer, token), count in report['differences']:
+            print('    {} {!r}: {}'.format(tokenizer, token, count))
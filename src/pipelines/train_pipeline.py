@@ -51,12 +51,16 @@ def handle_finetuning(command_config, finetuning_config):
                                         finetuned_model_vocab_trg) \
         and not parsing.already_exists_vocabulary(finetuned_model_vocab_src, 
                                         finetuned_model_vocab_trg):
-        finetuning_vocabulary_command_config = \
-            finetuning.create_finetuning_vocabulary_train_config(
-                                                command_config)
-        logging.info("Creating finetuning vocabulary with config " + \
-                     str(finetuning_vocabulary_command_config))
-        model_trainer.train(finetuning_vocabulary_command_config)
+        if finetuning.can_create_finetuning_vocabularies(command_config):
+            vocabularies = finetuning.create_finetuning_vocabularies(command_config)
+            logging.info("Created finetuning vocabularies: " + str(vocabularies))
+        else:
+            finetuning_vocabulary_command_config = \
+                finetuning.create_finetuning_vocabulary_train_config(
+                                                    command_config)
+            logging.info("Creating finetuning vocabulary with config " + \
+                         str(finetuning_vocabulary_command_config))
+            model_trainer.train(finetuning_vocabulary_command_config)
 
     if cache_dir_template is not None:
         cached_model_dir, epoch = finetuning.get_cached_pretrained_model_dir(
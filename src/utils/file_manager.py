@@ -1,7 +1,71 @@
+import io
 import os
+import bz2
+import gzip
+import lzma
 import shutil
+import hashlib
 from ..logger import logging
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COPY_BLOCK_SIZE = 1 << 24
+COMPRESSION_EXTENSIONS = ['.gz', '.bz2', '.xz', '.zst']
+
+def get_compression(file_path):
+    # type: (str) -> str
+    extension = os.path.splitext(file_path)[1].lower()
+    return extension if extension in COMPRESSION_EXTENSIONS else None
+
+def is_compressed(file_path):
+    # type: (str) -> bool
+    return get_compression(file_path) is not None
+
+# Opens plain and compressed files alike, the codec is chosen from the file extension
+def open_file(file_path, mode='r', encoding='utf-8', newline=None):
+    # type: (str, str, str, str) -> io.IOBase
+    compression = get_compression(file_path)
+    if 'b' in mode:
+        encoding = None
+    elif 't' not in mode:
+        mode += 't'
+
+    if compression is None:
+        return open(file_path, mode.replace('t', ''), encoding=encoding, newline=newline)
+    if compression == '.gz':
+        return gzip.open(file_path, mode, encoding=encoding, newline=newline)
+    if compression == '.bz2':
+        return bz2.open(file_path, mode, encoding=encoding, newline=newline)
+    if compression == '.xz':
+        return lzma.open(file_path, mode, encoding=encoding, newline=newline)
+    if zstandard is None:
+        raise ImportError("zstandard is required to open {}".format(file_path))
+    return zstandard.open(file_path, mode, encoding=encoding, newline=newline)
+
+# Path of the file or of its compressed version (e.g. train.gn.gz) when only the latter exists
+def find_file(file_path):
+    # type: (str) -> str
+    if os.path.isfile(file_path):
+        return file_path
+    for extension in COMPRESSION_EXTENSIONS:
+        if os.path.isfile(file_path + extension):
+            return file_path + extension
+    return file_path
+
+# Writes a compressed copy of a file (e.g. train.gn -> train.gn.gz) and returns its path
+def compress_file(file_path, compression='.gz', remove=True):
+    # type: (str, str, bool) -> str
+    compressed_path = file_path + compression
+    with open(file_path, 'rb') as input_f, open_file(compressed_path, 'wb') as output_f:
+        shutil.copyfileobj(input_f, output_f, COPY_BLOCK_SIZE)
+
+    if remove:
+        os.remove(file_path)
+    return compressed_path
+
 def move_files(src, dst, copy=True):
     # type: (str, str, bool) -> None
     files_in_src = os.listdir(src)
@@ -27,14 +91,129 @@ def save_copy(src, dst):
     else:
         raise FileExistsError("The source to copy does not exist")
 
+def copy_file_contents(src_f, dst_f):
+    # type: (io.BufferedReader, io.FileIO) -> None
+    src_size = os.fstat(src_f.fileno()).st_size
+    offset = 0
+
+    try:
+        while hasattr(os, 'sendfile') and offset < src_size:
+            sent = os.sendfile(dst_f.fileno(), src_f.fileno(), offset, min(COPY_BLOCK_SIZE, src_size - offset))
+            if sent == 0:
+                break
+            offset += sent
+    except OSError: # Some platforms only support sendfile to sockets
+        pass
+
+    if offset < src_size:
+        src_f.seek(offset)
+        shutil.copyfileobj(src_f, dst_f, COPY_BLOCK_SIZE)
+
+# Copies a decompressed stream in blocks, returns its last byte
+def copy_stream_contents(src_f, dst_f):
+    # type: (io.IOBase, io.IOBase) -> bytes
+    last_byte = b''
+    for block in iter(lambda: src_f.read(COPY_BLOCK_SIZE), b''):
+        dst_f.write(block)
+        last_byte = block[-1:]
+    return last_byte
+
+# Concatenates files in blocks (os.sendfile when available), compressed inputs are decompressed. 
+# A newline is added after a non-empty file that does not end with one, so lines are never merged.
+def concatenate_files(input_paths, output_path):
+    # type: (list[str], str) -> None
+    with open(output_path, 'wb', buffering=0) as output_f:
+        for input_path in input_paths:
+            if is_compressed(input_path):
+                with open_file(input_path, 'rb') as input_f:
+                    last_byte = copy_stream_contents(input_f, output_f)
+                if last_byte not in [b'', b'\n']:
+                    output_f.write(b'\n')
+                continue
+
+            with open(input_path, 'rb') as input_f:
+                copy_file_contents(input_f, output_f)
+                input_size = os.fstat(input_f.fileno()).st_size
+
+                if input_size > 0:
+                    input_f.seek(input_size - 1)
+                    if input_f.read(1) != b'\n':
+                        output_f.write(b'\n')
+
+# Counts lines without decoding, a last line without trailing newline is also counted
+def count_lines(file_path, block_size=COPY_BLOCK_SIZE):
+    # type: (str, int) -> int
+    lines_n = 0
+    last_byte = b'\n'
+
+    with open_file(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            lines_n += block.count(b'\n')
+            last_byte = block[-1:]
+
+    if last_byte != b'\n':
+        lines_n += 1
+    return lines_n
+
 def get_file_lines(file_path):
     # type: (str) -> list[str]
-    with open(file_path, 'r', encoding='utf-8') as f:
+    with open_file(file_path, 'r', encoding='utf-8') as f:
         lines = f.readlines()
         
     lines = [line.strip() for line in lines]
     return lines
 
+# Splits the byte range [start, end of file) into shards_n ranges that end right after a newline.
+# If quotechar is given, newlines inside quoted fields (odd number of quotes before them) are skipped.
+def get_record_boundaries(file_path, shards_n, start=0, quotechar=None, block_size=1 << 20):
+    # type: (str, int, int, bytes, int) -> list[int]
+    file_size = os.path.getsize(file_path)
+    targets = [start + (file_size - start) * i // shards_n for i in range(1, shards_n)]
+    boundaries = [start]
+    quotes_n = 0
+
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        offset = start
+
+        while len(targets) > 0:
+            block = f.read(block_size)
+            if not block:
+                break
+
+            search_from = max(targets[0] - offset, 0)
+            while len(targets) > 0 and search_from < len(block):
+                newline_idx = block.find(b'\n', search_from)
+                if newline_idx == -1:
+                    break
+
+                if quotechar is not None and \
+                   (quotes_n + block.count(quotechar, 0, newline_idx)) % 2 != 0:
+                    search_from = newline_idx + 1
+                    continue
+
+                boundary = offset + newline_idx + 1
+                boundaries.append(boundary)
+                targets = [target for target in targets if target >= boundary]
+                search_from = max(targets[0] - offset, newline_idx + 1) \
+                              if len(targets) > 0 else len(block)
+
+            if quotechar is not None:
+                quotes_n += block.count(quotechar)
+            offset += len(block)
+
+    if boundaries[-1] < file_size:
+        boundaries.append(file_size)
+    return boundaries
+
+def get_file_hash(file_path, block_size=1 << 20):
+    # type: (str, int) -> str
+    file_hash = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
 def delete_files(path):
     # type: (str) -> None
     dirs = os.listdir(path)
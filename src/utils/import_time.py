@@ -0,0 +1,98 @@
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# import time: self [us] | cumulative | imported package (indented by nesting depth)
+IMPORT_TIME_REGEX = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)\s*$')
+
+# Modules imported by each entry point before it does any work
+ENTRY_POINTS = {
+    'main': ['main', 'src.pipelines.train_pipeline'],
+    'score': ['scripts.validate.score', 'src.domain.evaluation.metrics', 'sacrebleu'],
+}
+DEFAULT_BUDGETS_MS = {'main': 500, 'score': 400}
+
+# Rows of (module, self_us, cumulative_us, depth) in the order of -X importtime
+def parse_import_times(output):
+    # type: (str) -> list[tuple[str, int, int, int]]
+    import_times = []
+    for line in output.splitlines():
+        match = IMPORT_TIME_REGEX.match(line)
+        if match:
+            self_us, cumulative_us, indentation, module = match.groups()
+            import_times.append((module, int(self_us), int(cumulative_us), len(indentation) // 2))
+    return import_times
+
+def get_import_times(modules, python=sys.executable, cwd=PROJECT_DIR):
+    # type: (list[str], str, str) -> list[tuple[str, int, int, int]]
+    code = '; '.join('import ' + module for module in modules)
+    process = subprocess.run([python, '-X', 'importtime', '-c', code],
+                             cwd=cwd, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise RuntimeError('Could not import {}: {}'.format(modules, process.stderr[-1000:]))
+    return parse_import_times(process.stderr)
+
+# Time spent importing the given modules, interpreter startup (site, encodings...) excluded
+def get_modules_import_time(import_times, modules):
+    # type: (list[tuple[str, int, int, int]], list[str]) -> int
+    return sum(cumulative_us for module, _, cumulative_us, depth in import_times \
+               if depth == 0 and module in modules)
+
+# The fastest of several runs is kept, as the slower ones are due to cold disk caches and noise
+def get_entry_point_import_time(entry_point, repeats=3, python=sys.executable):
+    # type: (str, int, str) -> tuple[float, list[tuple[str, int, int, int]]]
+    modules = ENTRY_POINTS[entry_point]
+    best_time_us, best_import_times = None, None
+    for _ in range(repeats):
+        import_times = get_import_times(modules, python=python)
+        time_us = get_modules_import_time(import_times, modules)
+        if best_time_us is None or time_us < best_time_us:
+            best_time_us, best_import_times = time_us, import_times
+    return best_time_us / 1000, best_import_times
+
+def get_slowest_imports(import_times, top=10):
+    # type: (list[tuple[str, int, int, int]], int) -> list[tuple[str, int, int, int]]
+    return sorted(import_times, key=lambda import_time: import_time[1], reverse=True)[:top]
+
+def check_budgets(budgets_ms, repeats=3, top=10):
+    # type: (dict[str, float], int, int) -> bool
+    within_budget = True
+    for entry_point, budget_ms in budgets_ms.items():
+        time_ms, import_times = get_entry_point_import_time(entry_point, repeats=repeats)
+        is_within_budget = time_ms <= budget_ms
+        within_budget = within_budget and is_within_budget
+        print('{}: {:.1f} ms (budget {} ms) {}'.format(entry_point, time_ms, budget_ms,
+                                                      'OK' if is_within_budget else 'OVER BUDGET'))
+        if not is_within_budget:
+            for module, self_us, cumulative_us, _ in get_slowest_imports(import_times, top=top):
+                print('    {:>10.1f} ms self {:>10.1f} ms cumulative  {}'.format(self_us / 1000, cumulative_us / 1000, module))
+    return within_budget
+
+def parse_budgets(budgets):
+    # type: (list[str]) -> dict[str, float]
+    parsed_budgets = dict(DEFAULT_BUDGETS_MS)
+    for budget in budgets or []:
+        entry_point, budget_ms = budget.split('=')
+        if entry_point not in ENTRY_POINTS:
+            raise ValueError('Unknown entry point {}, expected one of {}'.format(entry_point, list(ENTRY_POINTS)))
+        parsed_budgets[entry_point] = float(budget_ms)
+    return parsed_budgets
+
+# Example: python -m src.utils.import_time --budget main=500 score=400
+def main():
+    parser = argparse.ArgumentParser(description='Fail when the entry points take longer to import than their budget')
+    parser.add_argument('--budget', nargs='*', default=None, help='Budgets as entry_point=milliseconds')
+    parser.add_argument('--repeats', type=int, default=3, help='Runs per entry point, the fastest one is kept')
+    parser.add_argument('--top', type=int, default=10, help='Slowest imports shown for entry points over budget')
+    args = parser.parse_args()
+
+    budgets_ms = parse_budgets(args.budget)
+    if not check_budgets(budgets_ms, repeats=args.repeats, top=args.top):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
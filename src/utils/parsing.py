@@ -26,6 +26,25 @@ def parse_output_filename(output_filename,
         output_filename = output_filename.replace(key, str(value))
     return output_filename
 
+OUTPUT_FILENAME_PARAMETERS = {'{E}': 'epoch', '{B}': 'batch', '{U}': 'updates', '{T}': 'tokens'}
+
+# Glob matching every file written with the output filename template
+def get_output_filename_glob(output_filename):
+    # type: (str) -> str
+    for key in OUTPUT_FILENAME_PARAMETERS:
+        output_filename = output_filename.replace(key, '*')
+    return output_filename
+
+# Inverse of parse_output_filename: the template parameters found in a filename
+def get_output_filename_parameters(output_filename, filename):
+    # type: (str, str) -> dict[str, str]
+    regex = re.escape(output_filename)
+    for key, parameter in OUTPUT_FILENAME_PARAMETERS.items():
+        regex = regex.replace(re.escape(key), '(?P<{}>\\d+)'.format(parameter), 1)
+        regex = regex.replace(re.escape(key), '\\d+')
+    match = re.fullmatch(regex, filename)
+    return match.groupdict() if match else {}
+
 def handle_finetuning_flags(finetuning_config, flags):
     # type: (Any, dict) -> (Any, dict)
     pretraining_epochs = flags.pop(PRETRAINING_EPOCHS, [None])[0]
@@ -80,6 +99,16 @@ def handle_vocabularies(flags, spm_suffix=SPM_SUFFIX):
             flags['vocabs'] = [src_new_name, trg_new_name]
     return flags
 
+# dim-vocabs may hold one size per vocabulary or a single "src_size trg_size" string
+def get_vocabulary_sizes(flags):
+    # type: (dict[str, list]) -> tuple[int, int]
+    dim_vocabs = ' '.join(flags.get('dim-vocabs', [])).split()
+    if len(dim_vocabs) == 0:
+        raise ValueError('dim-vocabs is required to create sentencepiece vocabularies.')
+    src_dim_vocab = int(dim_vocabs[0])
+    trg_dim_vocab = int(dim_vocabs[1]) if len(dim_vocabs) > 1 else src_dim_vocab
+    return src_dim_vocab, trg_dim_vocab
+
 def rename_model_file(model_name, flags):
     # type: (str, dict[str, list]) -> str
     model_name_without_extension = '.'.join(model_name.split('.')[:-1])
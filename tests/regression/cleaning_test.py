@@ -0,0 +1,50 @@
+import re
+import unittest
+
+from src.domain.processing import cleaning
+
+# reduce_vocabulary before its patterns were precompiled and its passes skipped
+def reduce_vocabulary_reference(text):
+    # type: (str) -> str
+    for regex in [cleaning.DATE_REGEX, cleaning.MAIL_REGEX, cleaning.URL_REGEX, cleaning.NUMBER_REGEX, cleaning.IP_REGEX]:
+        text = re.sub(regex, '', text)
+    return text
+
+class TestCleaning(unittest.TestCase):
+    def setUp(self) -> None:
+        self.texts = ["Mba´´éichapa ndéve ´`ko’ára ʼaño",
+                      "Ver http://x.com el 12/05/2020 a las 10.30, +5a@b.c",
+                      "IP 192.168.1.1 o mail juan@mail.com",
+                      "Che réra Juan"]
+
+    def test_normalize_text(self):
+        self.assertEqual(cleaning.normalize_text(self.texts[0]), "Mba'éichapa ndéve 'ko'ára 'año")
+        self.assertEqual(cleaning.normalize_text(self.texts[0], lowercase=True), "mba'éichapa ndéve 'ko'ára 'año")
+        self.assertEqual(cleaning.normalize_text("Ha´e"), "Ha´e") # A single acute accent is kept
+
+    def test_clean_texts(self):
+        expected_texts = ["Mba´´éichapa ndéve ´`ko’ára ʼaño", 'Ver  el  a las , +', 'IP  o mail ', 'Che réra Juan']
+        self.assertEqual(cleaning.clean_texts(self.texts), expected_texts)
+        self.assertEqual([cleaning.clean_text(text) for text in self.texts], expected_texts)
+        self.assertEqual(cleaning.clean_texts(self.texts[:1], normalize=True), ["Mba'éichapa ndéve 'ko'ára 'año"])
+        self.assertEqual(cleaning.clean_texts(self.texts, reduce_vocab=False), self.texts)
+
+    def test_same_as_reference_reduce_vocabulary(self):
+        texts = self.texts + ["IP ١٢.٣٤.٥٦.٧٨ y １９２.１６８.１.１", "Año ٢٠٢٠, 3.5 y ١٫٥", "Versión 1.2.3.4.5 de ۱۲/۰۵/۲۰۲۰", 
+                              "Sin números. Ni puntos", "", "juan@mail.com http://x.com/١.٢.٣.٤"]
+        for text in texts:
+            self.assertEqual(cleaning.reduce_vocabulary(text), reduce_vocabulary_reference(text))
+        self.assertEqual(cleaning.clean_text(texts[4]), "IP  y ")
+
+    def test_clean_tokens(self):
+        tokens = ['(Ñandejára),', '10%', 'a-b\t', '{x}.', 'Che Ára.', 'ÑE\n']
+        self.assertEqual(cleaning.clean_tokens(tokens), ['Ñandejára', '10', 'ab', 'x', 'CheÁra', 'ÑE'])
+        self.assertEqual(cleaning.clean_tokens(tokens[-2:], lowercase=True, clean_punctuation=False), ['cheára.', 'ñe'])
+        self.assertEqual(cleaning.clean_tokens(tokens, clean_punctuation=False, clean_spaces=False), tokens)
+        self.assertEqual([cleaning.clean_token(token) for token in tokens], cleaning.clean_tokens(tokens))
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
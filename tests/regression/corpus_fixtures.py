@@ -0,0 +1,34 @@
+import unittest
+import os
+import tempfile
+
+LANGUAGES = ['gn', 'es']
+
+# Test case with a temporary directory where the tests write their small corpora
+class CorpusTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def get_path(self, filename):
+        # type: (str) -> str
+        return os.path.join(self.temp_dir.name, filename)
+
+    def get_paths(self, prefix, languages=LANGUAGES):
+        # type: (str, list[str]) -> list[str]
+        return [self.get_path(prefix + '.' + language) for language in languages]
+
+    def write_lines(self, filename, lines, trailing_newline=True):
+        # type: (str, list[str], bool) -> str
+        path = self.get_path(filename)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + ('\n' if trailing_newline else ''))
+        return path
+
+    # Writes the (source, target) pairs to prefix.gn and prefix.es
+    def write_corpus(self, prefix, pairs, languages=LANGUAGES, trailing_newline=True):
+        # type: (str, list[tuple[str, str]], list[str], bool) -> list[str]
+        return [self.write_lines(prefix + '.' + language, [pair[language_idx] for pair in pairs], trailing_newline=trailing_newline) \
+                for language_idx, language in enumerate(languages)]
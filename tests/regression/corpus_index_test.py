@@ -0,0 +1,48 @@
+import unittest
+import os
+
+from src.domain.processing import corpus_index
+from tests.regression.corpus_fixtures import CorpusTestCase
+
+class TestCorpusIndex(CorpusTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.src_lines = ["Mba'éichapa", 'Che réra Juan', '', 'Ko\'ẽ porã']
+        self.tgt_lines = ['¿Cómo estás?', 'Mi nombre es Juan', 'Hola', 'Buenos días']
+        self.src_path = self.write_lines('corpus.gn', self.src_lines)
+        self.tgt_path = self.write_lines('corpus.es', self.tgt_lines, trailing_newline=False)
+
+    def test_random_access(self):
+        with corpus_index.ParallelCorpusIndex(self.src_path, self.tgt_path) as index:
+            self.assertEqual(len(index), len(self.src_lines))
+            for idx in index.shuffle(seed=1234):
+                self.assertEqual(index[idx], (self.src_lines[idx], self.tgt_lines[idx]))
+
+            src_lengths, tgt_lengths = index.get_line_lengths()
+            self.assertEqual(list(src_lengths), [len(line.encode('utf-8')) for line in self.src_lines])
+            self.assertEqual(list(tgt_lengths), [len(line.encode('utf-8')) for line in self.tgt_lines])
+
+        self.assertTrue(os.path.isfile(corpus_index.get_index_path(self.src_path)))
+
+    def test_write_pairs(self):
+        src_output, tgt_output = self.get_paths('sample')
+
+        with corpus_index.ParallelCorpusIndex(self.src_path, self.tgt_path) as index:
+            index.write_pairs([3, 0], src_output, tgt_output)
+
+        with corpus_index.ParallelCorpusIndex(src_output, tgt_output) as sample:
+            self.assertEqual(list(sample.iter_pairs()), 
+                             [(self.src_lines[3], self.tgt_lines[3]), (self.src_lines[0], self.tgt_lines[0])])
+
+    def test_misaligned_corpora(self):
+        with open(self.tgt_path, 'a', encoding='utf-8') as f:
+            f.write('\nOtra línea')
+
+        with self.assertRaises(ValueError):
+            corpus_index.ParallelCorpusIndex(self.src_path, self.tgt_path)
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
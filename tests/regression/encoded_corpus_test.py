@@ -0,0 +1,46 @@
+import unittest
+
+import numpy as np
+
+from src.domain.processing import encoded_corpus
+from src.domain.processing.tokenization import Tokenizer
+from tests.regression.corpus_fixtures import CorpusTestCase
+
+class WhitespaceTokenizer(Tokenizer):
+    def __init__(self):
+        super().__init__(str.split)
+
+    def tokenize(self, text):
+        return self.tokenizer(text)
+
+class TestEncodedCorpus(CorpusTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.sentences = ['che ha nde', '', 'nde ha che ha', 'ñandejára']
+        self.vocabulary = ['<unk>', 'ha', 'che', 'nde']
+        self.corpus_path = self.write_lines('train.gn', self.sentences)
+
+    def test_encode_corpus(self):
+        for vocabulary_format, lines in [('text', self.vocabulary),
+                                         ('yaml', ['"{}": {}'.format(token, idx) for idx, token in enumerate(self.vocabulary)])]:
+            vocabulary_path = self.write_lines('vocab.gn', lines)
+            vocabulary = encoded_corpus.load_vocabulary(vocabulary_path, vocabulary_format=vocabulary_format)
+            encoded_corpus.encode_corpus(self.corpus_path, self.corpus_path, vocabulary, WhitespaceTokenizer())
+            ids, offsets = encoded_corpus.load_encoded_corpus(self.corpus_path)
+
+            self.assertEqual(ids.dtype, np.uint32)
+            self.assertEqual(list(encoded_corpus.get_sentence_lengths(offsets)), [3, 0, 4, 1])
+            self.assertEqual(list(ids[offsets[2]:offsets[3]]), [3, 1, 2, 1])
+            self.assertAlmostEqual(encoded_corpus.get_oov_rate(ids), 1 / 8)
+            self.assertEqual(list(encoded_corpus.get_token_counts(ids, len(vocabulary))), [0, 3, 2, 2])
+
+            bigrams, counts = encoded_corpus.get_ngram_counts(ids, offsets, n=2)
+            bigram_counts = {tuple(bigram): count for bigram, count in zip(bigrams.tolist(), counts)}
+            self.assertEqual(bigram_counts, {(2, 1): 2, (1, 3): 1, (3, 1): 1, (1, 2): 1})
+            del ids, offsets
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import unittest
+import os
+import tempfile
+
+from src.domain.processing import external_dedup
+from tests.regression.corpus_fixtures import CorpusTestCase
+
+class TestExternalDedup(CorpusTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.pairs = [('Jajotopata', 'Nos vemos'), ("Mba'éichapa", '¿Cómo estás?'), 
+                      ('Che réra Juan', 'Mi nombre es Juan'), ('jajotopata ', 'nos  vemos'), 
+                      ("Mba'éichapa", '¿Cómo estás?'), ('Ñandejára', 'El Señor'), 
+                      ('Che réra Juan', 'Mi nombre es Pedro')]
+        self.expected_pairs = [0, 1, 2, 5, 6]
+        self.paths = self.write_corpus('augmented', self.pairs)
+        self.output_paths = self.get_paths('dedup')
+
+    def assert_deduplicated(self, paths):
+        for language_idx, path in enumerate(paths):
+            with open(path, 'r', encoding='utf-8') as f:
+                expected_lines = [self.pairs[idx][language_idx] + '\n' for idx in self.expected_pairs]
+                self.assertEqual(f.readlines(), expected_lines)
+
+    def test_in_memory_dedup(self):
+        lines_n, kept_n = external_dedup.deduplicate_corpus(*self.paths, *self.output_paths)
+        self.assertEqual((lines_n, kept_n), (len(self.pairs), len(self.expected_pairs)))
+        self.assert_deduplicated(self.output_paths)
+
+    def test_external_dedup(self):
+        # Two records per run, so the corpus is spilled in four runs
+        memory_budget = 4 * external_dedup.RECORD_DTYPE.itemsize
+        with tempfile.TemporaryDirectory() as runs_dir:
+            run_paths, records, lines_n = external_dedup.write_sorted_runs(*self.paths, runs_dir, 
+                                                                           external_dedup.get_run_size(memory_budget))
+            self.assertEqual(len(run_paths), 4)
+            self.assertIsNone(records)
+
+        external_dedup.deduplicate_corpus_inplace(*self.paths, memory_budget=memory_budget)
+        self.assert_deduplicated(self.paths)
+        self.assertEqual(sorted(os.listdir(self.temp_dir.name)), ['augmented.es', 'augmented.gn'])
+
+    def test_misaligned_corpus(self):
+        with open(self.paths[1], 'a', encoding='utf-8') as f:
+            f.write('Línea sin traducción\n')
+
+        with self.assertRaisesRegex(ValueError, 'line 8 of .*augmented.es'):
+            external_dedup.deduplicate_corpus(*self.paths, *self.output_paths)
+        memory_budget = 4 * external_dedup.RECORD_DTYPE.itemsize
+        self.assertRaises(ValueError, external_dedup.deduplicate_corpus_inplace, *self.paths, memory_budget=memory_budget)
+        self.assertEqual(sorted(os.listdir(self.temp_dir.name)), ['augmented.es', 'augmented.gn']) # Left untouched
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+import unittest
+
+from src.utils import import_time
+
+class TestImportTime(unittest.TestCase):
+    def setUp(self) -> None:
+        self.output = '\n'.join([
+            'import time: self [us] | cumulative | imported package',
+            'import time:       120 |        120 | site',
+            'import time:        40 |         40 |     numpy._core',
+            'import time:       900 |        940 |   numpy',
+            'import time:        60 |       1000 | src.components.data_ingestion',
+            'Traceback (most recent call last):',
+        ])
+
+    def test_parse_import_times(self):
+        import_times = import_time.parse_import_times(self.output)
+        self.assertEqual(import_times, [('site', 120, 120, 0),
+                                        ('numpy._core', 40, 40, 2),
+                                        ('numpy', 900, 940, 1),
+                                        ('src.components.data_ingestion', 60, 1000, 0)])
+        self.assertEqual(import_time.get_modules_import_time(import_times, ['src.components.data_ingestion', 'numpy']), 1000)
+        self.assertEqual(import_time.get_slowest_imports(import_times, top=1), [('numpy', 900, 940, 1)])
+
+    def test_parse_budgets(self):
+        budgets = import_time.parse_budgets(['score=100'])
+        self.assertEqual(budgets['score'], 100)
+        self.assertEqual(budgets['main'], import_time.DEFAULT_BUDGETS_MS['main'])
+        self.assertRaises(ValueError, import_time.parse_budgets, ['unknown=100'])
+
+    def test_heavy_modules_are_imported_lazily(self):
+        for modules in [import_time.ENTRY_POINTS['main'], ['scripts.validate.score']]:
+            imported_modules = [module for module, _, _, _ in import_time.get_import_times(modules)]
+            self.assertIn(modules[0], imported_modules)
+            self.assertNotIn('scipy.stats', imported_modules)
+            self.assertNotIn('sacrebleu', imported_modules)
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,8 @@
 import unittest
 import os
+import shutil
+import tempfile
+import collections
 
 from src.config.config import load_config_variables, \
     BASE_DIR_ARTIFACTS, \
@@ -11,6 +14,8 @@ from src.config.config import load_config_variables, \
     RAW_DATA_TEST_COLUMN
 
 from src.components import data_ingestion
+from src.utils import file_manager
+from src.config.ingestion_config import get_data_ingestion_config
 from src.domain.processing.search_duplicates import search_duplicates
 
 # TODO: Test if there are empty lines or the default vocabulary is not at the beginning of the file
@@ -33,8 +38,16 @@ class TestIngestion(unittest.TestCase):
         # Create vocabulary
         self.raw_data_train_column = self.config_variables[RAW_DATA_TRAIN_COLUMN]
         self.default_vocabulary = ['<PAD>', '<UNK>', '<S>', '</S>']
+
+        # Local raw dataset
+        self.local_raw_data_filepath = os.path.join(self.test_data_dir, 'raw.ingestion.csv')
+        self.languages = ['gn', 'es']
         pass
 
+    def _read_lines(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.readlines()
+
     def test_ingestion(self):
         try:
             data_ingestion.split_dataset(
@@ -71,6 +84,205 @@ class TestIngestion(unittest.TestCase):
                         self.fail("Ingestion created duplicate word in file {}".format(path))
                 os.remove(path)
 
+    def test_single_pass_split(self):
+        outputs = [os.path.join(self.test_data_dir, split + '.single_pass') 
+                   for split in ['train', 'validation', 'test']]
+        expected_lines = {}
+
+        for language in self.languages:
+            data_ingestion.split_dataset(self.local_raw_data_filepath,
+                                         self.raw_data_columns,
+                                         self.raw_data_split_column,
+                                         language,
+                                         *outputs,
+                                         persist_each=2)
+            for output in outputs:
+                output_path = output + '.' + language
+                expected_lines[output_path] = self._read_lines(output_path)
+                os.remove(output_path)
+
+        data_ingestion.split_dataset_languages(self.local_raw_data_filepath,
+                                               self.raw_data_columns,
+                                               self.raw_data_split_column,
+                                               self.languages,
+                                               *[[output]*len(self.languages) for output in outputs],
+                                               persist_each=2)
+
+        for output_path, lines in expected_lines.items():
+            self.assertEqual(self._read_lines(output_path), lines)
+            os.remove(output_path)
+
+    def test_parallel_split(self):
+        sequential_outputs = [os.path.join(self.test_data_dir, split + '.sequential') 
+                              for split in ['train', 'validation', 'test']]
+        parallel_outputs = [os.path.join(self.test_data_dir, split + '.parallel') 
+                            for split in ['train', 'validation', 'test']]
+
+        data_ingestion.split_dataset_languages(self.local_raw_data_filepath,
+                                               self.raw_data_columns,
+                                               self.raw_data_split_column,
+                                               self.languages,
+                                               *[[output]*len(self.languages) for output in sequential_outputs],
+                                               persist_each=2)
+        data_ingestion.split_dataset_languages_parallel(self.local_raw_data_filepath,
+                                                        self.raw_data_columns,
+                                                        self.raw_data_split_column,
+                                                        self.languages,
+                                                        *[[output]*len(self.languages) for output in parallel_outputs],
+                                                        processes_n=3)
+
+        for sequential_output, parallel_output in zip(sequential_outputs, parallel_outputs):
+            for language in self.languages:
+                sequential_path = sequential_output + '.' + language
+                parallel_path = parallel_output + '.' + language
+                self.assertEqual(self._read_lines(parallel_path), self._read_lines(sequential_path))
+                os.remove(sequential_path)
+                os.remove(parallel_path)
+
+    def test_vocabulary_frequency_order(self):
+        token_counts = collections.Counter({'ha': 5, 'che': 3, 'nde': 3, 'ko': 1, '<S>': 2})
+        vocabulary = data_ingestion.get_vocabulary(token_counts, 
+                                                   default_vocabulary=self.default_vocabulary, 
+                                                   min_count=2, 
+                                                   max_size=len(self.default_vocabulary) + 2)
+        self.assertEqual([token for token, _ in vocabulary], 
+                         self.default_vocabulary + ['ha', 'che'])
+
+        for vocabulary_format, expected_line in [('text', 'ha'), ('counts', 'ha\t5'), ('yaml', '"ha": 4')]:
+            data_ingestion.save_vocabulary(vocabulary, self.vocab_output_dir, vocabulary_format=vocabulary_format)
+            lines = [line.rstrip('\n') for line in self._read_lines(self.vocab_output_dir)]
+            self.assertEqual(len(lines), len(vocabulary))
+            self.assertEqual(lines[len(self.default_vocabulary)], expected_line)
+        os.remove(self.vocab_output_dir)
+
+    def test_ingestion_manifest(self):
+        with tempfile.TemporaryDirectory() as artifacts_dir:
+            config_variables = {**self.config_variables, BASE_DIR_ARTIFACTS: artifacts_dir}
+            data_dir = os.path.join(artifacts_dir, 'data')
+            os.makedirs(os.path.join(data_dir, 'raw'))
+            raw_data_path = os.path.join(data_dir, 'raw', config_variables[RAW_DATA_FILENAME])
+            shutil.copy(self.local_raw_data_filepath, raw_data_path)
+            ingestion_config = get_data_ingestion_config(config_variables,
+                                                         [os.path.join(data_dir, 'train_gn'), os.path.join(data_dir, 'train_es')],
+                                                         [os.path.join(data_dir, 'valid_gn'), os.path.join(data_dir, 'valid_es')],
+                                                         [os.path.join(data_dir, 'vocab_gn'), os.path.join(data_dir, 'vocab_es')],
+                                                         False)
+            manifest = data_ingestion.get_ingestion_manifest(ingestion_config)
+            self.assertFalse(data_ingestion.is_ingestion_up_to_date(manifest, ingestion_config.manifest_path))
+
+            for output in manifest['outputs']:
+                os.makedirs(os.path.dirname(output), exist_ok=True)
+                open(output, 'w').close()
+            data_ingestion.save_ingestion_manifest(manifest, ingestion_config.manifest_path)
+            self.assertTrue(data_ingestion.is_ingestion_up_to_date(manifest, ingestion_config.manifest_path))
+
+            with open(raw_data_path, 'a', encoding='utf-8') as f:
+                f.write('8,Pyhare,Noche,train\n')
+            manifest = data_ingestion.get_ingestion_manifest(ingestion_config)
+            self.assertFalse(data_ingestion.is_ingestion_up_to_date(manifest, ingestion_config.manifest_path))
+
+    def test_append_augmented_data(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            train_files = [os.path.join(data_dir, 'train_gn'), os.path.join(data_dir, 'train_es')]
+            augmented_filename = os.path.join(data_dir, 'augmented')
+            output_filename = os.path.join(data_dir, 'full_augmented')
+            contents = {train_files[0] + '.gn': 'Che\nNde', # No trailing newline
+                        train_files[1] + '.es': 'Yo\nTú\n',
+                        augmented_filename + '.gn': 'Ha\'e\n',
+                        augmented_filename + '.es': 'Él'}
+
+            for path, content in contents.items():
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+
+            data_ingestion.append_augmented_data(augmented_filename, train_files, self.languages, output_filename)
+
+            self.assertEqual(self._read_lines(output_filename + '.gn'), ['Che\n', 'Nde\n', 'Ha\'e\n'])
+            self.assertEqual(self._read_lines(output_filename + '.es'), ['Yo\n', 'Tú\n', 'Él\n'])
+
+    def test_compressed_inputs(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            plain_outputs = [os.path.join(data_dir, split + '.plain') for split in ['train', 'validation', 'test']]
+            data_ingestion.split_dataset_languages(self.local_raw_data_filepath,
+                                                   self.raw_data_columns,
+                                                   self.raw_data_split_column,
+                                                   self.languages,
+                                                   *[[output]*len(self.languages) for output in plain_outputs])
+
+            for compression in ['.gz', '.bz2', '.xz']:
+                raw_data_path = file_manager.compress_file(shutil.copy(self.local_raw_data_filepath, data_dir), 
+                                                           compression)
+                outputs = [os.path.join(data_dir, split + compression) for split in ['train', 'validation', 'test']]
+                data_ingestion.split_dataset_languages_parallel(raw_data_path,
+                                                                self.raw_data_columns,
+                                                                self.raw_data_split_column,
+                                                                self.languages,
+                                                                *[[output]*len(self.languages) for output in outputs],
+                                                                processes_n=2)
+
+                for plain_output, output in zip(plain_outputs, outputs):
+                    for language in self.languages:
+                        self.assertEqual(self._read_lines(output + '.' + language), 
+                                         self._read_lines(plain_output + '.' + language))
+
+            augmented_path = os.path.join(data_dir, 'augmented.tsv.xz')
+            with file_manager.open_file(augmented_path, 'w') as f:
+                f.write('Yo\tChe\nTú\tNde\n')
+            data_ingestion.split_augmented_data(augmented_path, os.path.join(data_dir, 'augmented'), self.languages, 
+                                                persist_each=1)
+            file_manager.compress_file(os.path.join(data_dir, 'augmented.gn'), '.gz')
+
+            train_files = [os.path.join(data_dir, 'train.plain')]*2
+            output_filename = os.path.join(data_dir, 'full_augmented')
+            data_ingestion.append_augmented_data(os.path.join(data_dir, 'augmented'), train_files, self.languages, output_filename)
+            self.assertEqual(self._read_lines(output_filename + '.gn')[-2:], ['Che\n', 'Nde\n'])
+            self.assertEqual(file_manager.get_file_lines(os.path.join(data_dir, 'augmented.gn.gz')), ['Che', 'Nde'])
+            self.assertEqual(file_manager.count_lines(os.path.join(data_dir, 'augmented.gn.gz')), 2)
+
+    def test_compressed_outputs(self):
+        with tempfile.TemporaryDirectory() as artifacts_dir:
+            config_variables = {**self.config_variables, BASE_DIR_ARTIFACTS: artifacts_dir}
+            data_dir = os.path.join(artifacts_dir, 'data')
+            os.makedirs(os.path.join(data_dir, 'raw'))
+            shutil.copy(self.local_raw_data_filepath, os.path.join(data_dir, 'raw', config_variables[RAW_DATA_FILENAME]))
+            train_sets = [os.path.join(data_dir, 'train'), os.path.join(data_dir, 'train')]
+            valid_sets = [os.path.join(data_dir, 'valid'), os.path.join(data_dir, 'valid')]
+            ingestion_config = get_data_ingestion_config(config_variables, train_sets, valid_sets,
+                                                         [os.path.join(data_dir, 'vocab'), os.path.join(data_dir, 'vocab')],
+                                                         False,
+                                                         output_compression='.gz')
+            manifest = data_ingestion.get_ingestion_manifest(ingestion_config)
+            for output in manifest['outputs']:
+                if not output.endswith('.gz'):
+                    os.makedirs(os.path.dirname(output), exist_ok=True)
+                    with open(output, 'w', encoding='utf-8') as f:
+                        f.write('Che\nNde\n')
+
+            data_ingestion.compress_ingestion_corpora(ingestion_config)
+            data_ingestion.save_ingestion_manifest(manifest, ingestion_config.manifest_path)
+            self.assertTrue(data_ingestion.is_ingestion_up_to_date(manifest, ingestion_config.manifest_path))
+
+            # The training and validation sets given to Marian are still readable after the compression
+            for corpus_path in [data_ingestion.rename_file(path, language) for path, language in 
+                                zip(train_sets + valid_sets, 2 * self.languages)]:
+                self.assertEqual(self._read_lines(corpus_path), ['Che\n', 'Nde\n'])
+                self.assertEqual(file_manager.get_file_lines(corpus_path + '.gz'), ['Che', 'Nde'])
+
+    def test_check_alignment(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            src_path = os.path.join(data_dir, 'corpus.gn')
+            tgt_path = os.path.join(data_dir, 'corpus.es')
+
+            with open(src_path, 'w', encoding='utf-8') as f:
+                f.write('Che\nNde\nHa\'e')
+            with open(tgt_path, 'w', encoding='utf-8') as f:
+                f.write('Yo\nTú\nÉl\n')
+            self.assertIsNone(data_ingestion.check_alignment(src_path, tgt_path))
+
+            with open(tgt_path, 'a', encoding='utf-8') as f:
+                f.write('Ella\nNosotros\n')
+            self.assertEqual(data_ingestion.check_alignment(src_path, tgt_path), 4)
+
 def main():
     unittest.main()
 
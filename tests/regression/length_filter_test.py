@@ -0,0 +1,46 @@
+import unittest
+import json
+
+from src.domain.processing import length_filter
+from src.domain.processing.corpus_index import LineIndex
+from tests.regression.corpus_fixtures import CorpusTestCase
+
+class TestLengthFilter(CorpusTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.pairs = [('Che réra Juan', 'Mi nombre es Juan'),
+                      ('Jajotopata', 'Nos vemos pronto en la casa de mi abuela'), # Ratio 9
+                      ('', 'Vacío'),
+                      ('Ñandejára  ohayhu\topavave', 'El Señor ama a todos'),
+                      (' '.join(10 * ['ñe\'ẽ']), ' '.join(10 * ['palabra']))] # Too long
+        self.paths = self.write_corpus('train', self.pairs, trailing_newline=False)
+        self.output_paths = self.get_paths('filtered')
+
+    def test_line_statistics(self):
+        with LineIndex(self.paths[0], save_index=False) as line_index:
+            for block_size in [1, 8, 1 << 20]:
+                char_lengths, token_lengths = length_filter.get_line_statistics(line_index, block_size=block_size)
+                self.assertEqual(list(char_lengths), [len(src) for src, _ in self.pairs])
+                self.assertEqual(list(token_lengths), [len(src.split()) for src, _ in self.pairs])
+
+    def test_filter_corpus(self):
+        report = length_filter.filter_corpus(*self.paths, *self.output_paths, 
+                                             min_length=1, max_length=8, max_ratio=3, 
+                                             save_index=False)
+        self.assertEqual((report['pairs'], report['kept']), (5, 2))
+        self.assertEqual(report['removed'], {'too_short': 1, 'too_long': 2, 'ratio': 1})
+
+        for language_idx, path in enumerate(self.output_paths):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.assertEqual(f.read().splitlines(), [self.pairs[idx][language_idx] for idx in [0, 3]])
+
+        report_path = self.get_path('report.json')
+        length_filter.save_report(report, report_path)
+        with open(report_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['kept'], 2)
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+import unittest
+
+import numpy as np
+
+from src.domain.processing import near_duplicates
+from tests.regression.corpus_fixtures import CorpusTestCase
+
+class TestNearDuplicates(CorpusTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.pairs = [
+            ('Ñandejára ohayhu opavave yvypóra', 'El Señor ama a todos los hombres'),
+            ('Che réra Juan ha aiko Asunción-pe', 'Mi nombre es Juan y vivo en Asunción'),
+            ('Ñandejára ohayhu opavave yvypóra.', 'El Señor ama a todos los hombres.'),
+            ('Jajotopata ko pyharépe', 'Nos vemos esta noche'),
+            ('ñandejára ohayhu opavave yvypóra kuéra', 'el Señor ama a todos los hombres'),
+        ]
+        self.paths = self.write_corpus('train', self.pairs)
+
+    def test_minhash_similarity(self):
+        shingles_list = [near_duplicates.get_shingles(src, tgt) for src, tgt in self.pairs]
+        signatures = near_duplicates.get_minhash_signatures(shingles_list, num_perm=256)
+        jaccard = len(np.intersect1d(shingles_list[0], shingles_list[2])) / len(np.union1d(shingles_list[0], shingles_list[2]))
+        estimate = (signatures[0] == signatures[2]).mean()
+
+        self.assertEqual(signatures.shape, (len(self.pairs), 256))
+        self.assertLess(abs(estimate - jaccard), 0.15)
+        self.assertTrue((signatures[1] != signatures[3]).all())
+
+    def test_search_near_duplicates(self):
+        signatures = near_duplicates.get_corpus_signatures(*self.paths)
+        near_duplicate_pairs, similarities = near_duplicates.search_near_duplicates(signatures, threshold=0.5)
+
+        self.assertIn([0, 2], near_duplicate_pairs.tolist())
+        self.assertTrue((similarities >= 0.5).all())
+        keep_mask = near_duplicates.get_near_duplicate_keep_mask(near_duplicate_pairs, len(self.pairs), similarities)
+        self.assertEqual(list(keep_mask[:4]), [True, True, False, True])
+
+    def test_identical_signatures(self):
+        pairs = self.pairs[2:] + [self.pairs[0]] * 200 + [('', '')] * 200 + self.pairs[:2]
+        shingles_list = [near_duplicates.get_shingles(src, tgt) for src, tgt in pairs]
+        signatures = near_duplicates.get_minhash_signatures(shingles_list)
+        near_duplicate_pairs, similarities = near_duplicates.search_near_duplicates(signatures, threshold=0.5)
+
+        self.assertLess(len(near_duplicate_pairs), 450) # Each copy is only paired with the first one
+        keep_mask = near_duplicates.get_near_duplicate_keep_mask(near_duplicate_pairs, len(pairs), similarities)
+        self.assertEqual(np.flatnonzero(keep_mask).tolist(), [0, 1, 203, 404])
+
+        # Same as comparing every pair of sentences
+        all_similarities = (signatures[:, None, :] == signatures[None, :, :]).mean(axis=2)
+        all_pairs = np.argwhere(np.triu(all_similarities >= 0.5, k=1))
+        self.assertEqual(near_duplicates.get_near_duplicate_keep_mask(all_pairs, len(pairs)).tolist(), keep_mask.tolist())
+
+    def test_lsh_parameters(self):
+        bands, rows = near_duplicates.get_lsh_parameters(128, 0.8)
+        self.assertEqual((bands, rows), (9, 13)) # Same as datasketch's MinHashLSH(threshold=0.8, num_perm=128)
+
+        # Most near duplicates at the threshold and above are candidates
+        above_threshold = np.linspace(0.8, 1, 101)
+        recall = near_duplicates.get_candidate_probability(above_threshold, bands, rows).mean()
+        self.assertGreater(recall, 0.8)
+        self.assertGreater(near_duplicates.get_candidate_probability(0.9, bands, rows), 0.9)
+
+    def test_misaligned_corpus(self):
+        with open(self.paths[1], 'a', encoding='utf-8') as f:
+            f.write('Buenos días\n')
+
+        with self.assertRaisesRegex(ValueError, 'line 6 of .*train.es'):
+            near_duplicates.get_corpus_signatures(*self.paths)
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
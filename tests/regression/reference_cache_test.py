@@ -0,0 +1,55 @@
+import unittest
+import os
+from unittest import mock
+
+from src.domain.evaluation import metrics, reference_cache
+from tests.regression.corpus_fixtures import CorpusTestCase
+
+class TestReferenceCache(CorpusTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.cache_dir = self.get_path('reference_cache')
+        self.references = ["Mi nombre es Juan.", "¿Cómo estás?", "Nos vemos esta noche en la plaza."]
+        self.translations = [["Mi nombre es Juan.", "¿Cómo estás tú?", "Nos vemos esta noche."],
+                             ["Me llamo Juan", "¿Qué tal?", "Nos vemos en la plaza esta noche."]]
+        self.reference_path = self.write_lines('valid.es', self.references)
+
+    def test_same_scores_as_sacrebleu(self):
+        cache = reference_cache.ReferenceStatisticsCache()
+        for translation in self.translations:
+            for score_type in reference_cache.METRIC_CONFIGS:
+                expected_score = metrics.calculate_metric(self.references, translation, bleu_score_type=score_type)
+                self.assertEqual(cache.corpus_score(score_type, self.reference_path, translation), expected_score)
+        self.assertEqual((cache.hits, cache.misses), (3, 3)) # References are only processed for the first checkpoint
+
+    def test_persisted_statistics(self):
+        score = reference_cache.ReferenceStatisticsCache(cache_dir=self.cache_dir) \
+            .corpus_score('sacrebleu_corpus_chrf', self.reference_path, self.translations[1])
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        cache = reference_cache.ReferenceStatisticsCache(cache_dir=self.cache_dir)
+        self.assertEqual(cache.corpus_score('sacrebleu_corpus_chrf', self.reference_path, self.translations[1]), score)
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+    def test_reference_hashed_once(self):
+        cache = reference_cache.ReferenceStatisticsCache()
+        with mock.patch.object(reference_cache.file_manager, 'get_file_hash', 
+                               wraps=reference_cache.file_manager.get_file_hash) as get_file_hash:
+            for translation in self.translations:
+                for score_type in reference_cache.METRIC_CONFIGS:
+                    cache.corpus_score(score_type, self.reference_path, translation)
+        self.assertEqual(get_file_hash.call_count, 1)
+
+    def test_changed_reference(self):
+        cache = reference_cache.ReferenceStatisticsCache()
+        score = cache.corpus_score('sacrebleu_corpus_bleu', self.reference_path, self.translations[0])
+        self.write_lines('valid.es', self.translations[0])
+        self.assertNotEqual(cache.corpus_score('sacrebleu_corpus_bleu', self.reference_path, self.translations[0]), score)
+        self.assertEqual(cache.misses, 2)
+        self.assertRaises(ValueError, cache.corpus_score, 'sacrebleu_corpus_bleu', self.reference_path, self.translations[0][:2])
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
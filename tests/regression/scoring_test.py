@@ -0,0 +1,57 @@
+import unittest
+
+from src.domain.evaluation import metrics, scoring
+from tests.regression.corpus_fixtures import CorpusTestCase
+
+class TestScoring(CorpusTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.references = ["Mi nombre es Juan.", "¿Cómo estás?", "Nos vemos esta noche en la plaza.", ""]
+        self.translations = ["Me llamo Juan", "¿Cómo estás tú?", "Nos vemos en la plaza esta noche.", "Hola"]
+        self.score_types = ['sacrebleu_corpus_bleu', 'sacrebleu_corpus_chrf', 'sacrebleu_corpus_ter', 'sacrebleu_corpus_bleu']
+        self.reference_path = self.write_lines('valid.es', self.references)
+        self.translation_path = self.write_lines('translation.es', self.translations)
+
+    def test_sentence_statistics(self):
+        sentence_statistics = scoring.get_sentence_statistics(self.reference_path, self.translations, self.score_types)
+        self.assertEqual(list(sentence_statistics), self.score_types[:3])
+        self.assertEqual(sentence_statistics['sacrebleu_corpus_bleu'].shape, (len(self.translations), 10))
+        self.assertEqual(sentence_statistics['sacrebleu_corpus_ter'].shape, (len(self.translations), 2))
+        self.assertRaises(ValueError, scoring.get_sentence_statistics, self.reference_path, self.translations[:2], self.score_types)
+
+    def test_same_rows_as_calculate_metric(self):
+        parameters = {'after-epochs': ['3']}
+        score_rows = metrics.get_results_from_translation_output('model', 'valid.gn', 'valid.es',
+                                                                 self.reference_path, self.translation_path,
+                                                                 parameters, metrics=self.score_types)
+
+        self.assertEqual([row[4] for row in score_rows], self.score_types)
+        for score_type, row in zip(self.score_types, score_rows):
+            expected_score = metrics.calculate_metric(self.references, self.translations, bleu_score_type=score_type)
+            self.assertEqual(row[5], expected_score)
+            self.assertEqual(row[1:4] + row[6:], ['model', 'valid.gn', 'valid.es', '3', parameters])
+
+    def test_sentence_scores(self):
+        references = self.references + ["Hola", "Hola", "Che réra Juan"]
+        hypotheses = self.translations + ["", "Hola", "Mba'éichapa"]
+        for metric in ['sacrebleu_sentence_bleu', 'sacrebleu_sentence_chrf']:
+            scores = metrics.sentence_scores(references, hypotheses, metric=metric)
+            self.assertEqual(scores.shape, (len(hypotheses),))
+            for reference, hypothesis, score in zip(references, hypotheses, scores):
+                self.assertAlmostEqual(score, metrics.calculate_sacrebleu_sentence(reference, hypothesis, metric=metric), places=10)
+        self.assertRaises(ValueError, metrics.sentence_scores, references, hypotheses[:2])
+
+    def test_vectorized_corpus_scores(self):
+        sentence_statistics = scoring.get_sentence_statistics(self.reference_path, self.translations, self.score_types[:2])
+        bleu_statistics = sentence_statistics['sacrebleu_corpus_bleu'].sum(axis=0, keepdims=True)
+        chrf_statistics = sentence_statistics['sacrebleu_corpus_chrf'].sum(axis=0, keepdims=True)
+        self.assertAlmostEqual(scoring.get_bleu_scores(bleu_statistics)[0],
+                               metrics.calculate_metric(self.references, self.translations, 'sacrebleu_corpus_bleu'), places=10)
+        self.assertAlmostEqual(scoring.get_chrf_scores(chrf_statistics)[0],
+                               metrics.calculate_metric(self.references, self.translations, 'sacrebleu_corpus_chrf'), places=10)
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
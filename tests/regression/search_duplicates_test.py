@@ -0,0 +1,48 @@
+import unittest
+
+from src.domain.processing import search_duplicates
+from tests.regression.corpus_fixtures import CorpusTestCase
+
+class TestSearchDuplicates(CorpusTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.corpora_lines = {
+            'train': [("Mba'éichapa", '¿Cómo estás?'), ('Che réra Juan', 'Mi nombre es Juan'), 
+                      ('mba’éichapa ', '¿cómo  estás?'), ('Jajotopata', 'Nos vemos')],
+            'bible': [('Ñandejára', 'El Señor'), ('Che réra Juan', 'Mi nombre es Juan')],
+            'test':  [('Jajotopata', 'Nos vemos'), ('Ko\'ẽ porã', 'Buenos días')],
+        }
+        self.corpora = {name: tuple(self.write_corpus(name, pairs)) for name, pairs in self.corpora_lines.items()}
+
+    def test_search_duplicate_pairs(self):
+        train_corpora = {name: self.corpora[name] for name in ['train', 'bible']}
+        eval_corpora = {'test': self.corpora['test']}
+        report, digests = search_duplicates.search_duplicate_pairs(train_corpora, eval_corpora)
+
+        self.assertEqual(report['duplicates']['train'], 1) # Only differs in case, apostrophe and spaces
+        self.assertEqual(report['duplicates']['all_train'], 2)
+        self.assertEqual(report['leakage'][('train', 'test')], 1)
+        self.assertEqual(report['leakage'][('bible', 'test')], 0)
+
+        keep_masks = search_duplicates.get_deduplicated_masks(train_corpora, eval_corpora, digests)
+        self.assertEqual(list(keep_masks['train']), [True, True, False, False])
+        self.assertEqual(list(keep_masks['bible']), [True, False])
+
+        outputs = self.get_paths('dedup')
+        search_duplicates.write_deduplicated_corpus(*self.corpora['train'], keep_masks['train'], *outputs)
+        with open(outputs[0], 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read().splitlines(), ["Mba'éichapa", 'Che réra Juan'])
+
+    def test_misaligned_corpus(self):
+        with open(self.corpora['bible'][0], 'a', encoding='utf-8') as f:
+            f.write('Jajotopata\n')
+
+        with self.assertRaisesRegex(ValueError, 'line 3 of .*bible.gn'):
+            search_duplicates.get_pair_digests(*self.corpora['bible'])
+        self.assertRaises(ValueError, search_duplicates.search_duplicate_pairs, {'bible': self.corpora['bible']}, {})
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
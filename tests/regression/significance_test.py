@@ -0,0 +1,46 @@
+import unittest
+
+import numpy as np
+
+from src.domain.evaluation import metrics, reference_cache, significance
+from tests.regression.corpus_fixtures import CorpusTestCase
+
+class TestSignificance(CorpusTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.references = ["Mi nombre es Juan.", "¿Cómo estás?", "Nos vemos esta noche en la plaza.", "Hola", "Che réra Juan"]
+        self.systems = {'baseline': ["Me llamo Juan", "¿Cómo estás tú?", "Nos vemos en la plaza esta noche.", "", "Che réra Juan"],
+                        'copy': ["Me llamo Juan", "¿Cómo estás tú?", "Nos vemos en la plaza esta noche.", "", "Che réra Juan"],
+                        'reference': list(self.references)}
+        self.score_types = ['sacrebleu_corpus_bleu', 'sacrebleu_corpus_chrf', 'sacrebleu_corpus_ter']
+        self.reference_path = self.write_lines('valid.es', self.references)
+
+    def test_resampled_scores(self):
+        results = significance.paired_bootstrap_test(self.reference_path, self.systems, self.score_types, n_samples=50)
+        indices = significance.get_resample_indices(len(self.references), n_samples=50)
+
+        for score_type in self.score_types:
+            system_statistics = [np.array(reference_cache.create_metric(score_type)._extract_corpus_statistics(self.systems[name], [self.references])) \
+                                 for name in self.systems]
+            resampled_statistics = significance.get_resampled_statistics(system_statistics, indices, chunk_size=7)
+            for statistics, resampled in zip(system_statistics, resampled_statistics):
+                np.testing.assert_allclose(resampled, statistics[indices].sum(axis=1))
+
+            for name in self.systems:
+                expected_score = metrics.calculate_metric(self.references, self.systems[name], bleu_score_type=score_type)
+                self.assertEqual(results[name][score_type]['score'], expected_score)
+            self.assertIsNone(results['baseline'][score_type]['p_value'])
+            self.assertEqual(results['copy'][score_type]['p_value'], 1 / 51) # No resample differs, as in sacrebleu's paired bootstrap
+            self.assertEqual(results['copy'][score_type]['mean'], results['baseline'][score_type]['mean'])
+
+    def test_seed(self):
+        results = significance.paired_bootstrap_test(self.reference_path, self.systems, self.score_types[:1], baseline='reference', n_samples=20, seed=1)
+        self.assertEqual(significance.paired_bootstrap_test(self.reference_path, self.systems, self.score_types[:1], baseline='reference', n_samples=20, seed=1), results)
+        self.assertIsNone(results['reference']['sacrebleu_corpus_bleu']['p_value'])
+        self.assertRaises(ValueError, significance.paired_bootstrap_test, self.reference_path, self.systems, self.score_types, baseline='other')
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
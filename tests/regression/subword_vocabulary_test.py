@@ -0,0 +1,67 @@
+import unittest
+
+from src.config.command_config import CommandConfig
+from src.components import finetuning
+from src.domain.processing import subword_vocabulary
+from src.utils import parsing
+from tests.regression.corpus_fixtures import CorpusTestCase
+
+class TestSubwordVocabulary(CorpusTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.src_train_set, self.trg_train_set = self.write_corpus('train', [("Che réra Juan", "Mi nombre es Juan"),
+                                                                             ("Mba'éichapa nde réra", "¿Cómo es tu nombre?"),
+                                                                             ("Jajotopata ko pyharépe", "Nos vemos esta noche")])
+
+    def test_learn_bpe(self):
+        word_counts = {'low': 5, 'lower': 2, 'newest': 6, 'widest': 3}
+        pieces = subword_vocabulary.learn_bpe(word_counts, 4)
+        self.assertEqual(pieces, ['es', 'est', 'lo', 'low'])
+        self.assertEqual(subword_vocabulary.learn_bpe({'a': 1}, 10), ['▁a'])
+
+    def test_vocabulary_sizes(self):
+        self.assertEqual(parsing.get_vocabulary_sizes({'dim-vocabs': ['8000 4000']}), (8000, 4000))
+        self.assertEqual(parsing.get_vocabulary_sizes({'dim-vocabs': ['8000', '4000']}), (8000, 4000))
+        self.assertEqual(parsing.get_vocabulary_sizes({'dim-vocabs': ['8000']}), (8000, 8000))
+        self.assertRaises(ValueError, parsing.get_vocabulary_sizes, {})
+
+    def test_finetuning_vocabularies(self):
+        flags = {
+            'train-sets': [self.src_train_set, self.trg_train_set],
+            'vocabs': [self.get_path('vocab.gn.spm'), self.get_path('vocab.es.spm')],
+            'dim-vocabs': ['60 50'],
+        }
+        flags = parsing.handle_vocabularies(flags)
+        command_config = CommandConfig(command_name='echo', command_path='', flags=flags, flag_separator=' ')
+
+        vocabularies = finetuning.create_finetuning_vocabularies(command_config, use_sentencepiece=False)
+        self.assertEqual(vocabularies, flags['vocabs'])
+        self.assertTrue(all(vocabulary.endswith('V60_50.spm') for vocabulary in vocabularies))
+        self.assertTrue(parsing.already_exists_vocabulary(*vocabularies))
+
+        with open(vocabularies[0], 'rb') as f:
+            model = f.read()
+        self.assertIn('</s>'.encode('utf-8'), model)
+        self.assertIn('▁réra'.encode('utf-8'), model)
+        self.assertNotIn('▁Mi'.encode('utf-8'), model) # Each side has its own vocabulary
+
+    def test_vocabulary_size_too_high(self):
+        model_path = self.get_path('vocab.V1000.spm')
+        self.assertRaises(ValueError, subword_vocabulary.train_subword_vocabulary,
+                          [self.src_train_set], model_path, 1000, use_sentencepiece=False)
+
+    @unittest.skipIf(subword_vocabulary.sentencepiece is None, 'sentencepiece is not installed')
+    def test_fallback_model_loads_in_sentencepiece(self):
+        model_path = self.get_path('vocab.V40.spm')
+        subword_vocabulary.train_subword_vocabulary([self.src_train_set], model_path, 40, use_sentencepiece=False)
+        processor = subword_vocabulary.sentencepiece.SentencePieceProcessor(model_file=model_path)
+
+        self.assertEqual((processor.eos_id(), processor.unk_id(), processor.bos_id()), (0, 1, -1))
+        self.assertEqual(processor.get_piece_size(), 40)
+        self.assertEqual(processor.decode(processor.encode("Che réra Juan")), "Che réra Juan")
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
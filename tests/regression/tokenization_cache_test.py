@@ -0,0 +1,88 @@
+import unittest
+import os
+
+from src.domain.processing.tokenization import Tokenizer, FastTokenizer
+from src.domain.processing.tokenization_cache import CachedTokenizer
+from tests.regression.corpus_fixtures import CorpusTestCase
+
+class CountingTokenizer(Tokenizer):
+    def __init__(self, version='1'):
+        super().__init__(str.split)
+        self.tokenized = []
+        self.tokenize_many_calls = 0
+        self.version = version
+
+    def tokenize(self, text):
+        # type: (str) -> list
+        self.tokenized.append(text)
+        return self.tokenizer(text)
+
+    def tokenize_many(self, texts, batch_size=1000, n_process=1):
+        self.tokenize_many_calls += 1
+        return super().tokenize_many(texts, batch_size=batch_size, n_process=n_process)
+
+    def get_versions(self):
+        # type: () -> dict
+        return {'counting': self.version}
+
+class TestTokenizationCache(CorpusTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.cache_path = self.get_path(os.path.join('cache', 'tokenization.sqlite'))
+        self.sentences = ["Che réra Juan", "Mba'éichapa", "", "Che réra Juan", "Jajotopata ko pyharépe"]
+
+    def test_persistent_cache(self):
+        tokenizer = CountingTokenizer()
+        with CachedTokenizer(tokenizer, self.cache_path) as cached_tokenizer:
+            tokens = list(cached_tokenizer.tokenize_many(self.sentences, batch_size=2))
+            self.assertEqual(tokens, [sentence.split() for sentence in self.sentences])
+            self.assertEqual(cached_tokenizer.tokenize("Mba'éichapa"), ["Mba'éichapa"])
+        self.assertEqual(len(tokenizer.tokenized), 4) # The repeated sentence is found in the LRU
+
+        tokenizer = CountingTokenizer()
+        with CachedTokenizer(tokenizer, self.cache_path) as cached_tokenizer:
+            tokens = list(cached_tokenizer.tokenize_many(self.sentences))
+            self.assertEqual(tokens, [sentence.split() for sentence in self.sentences])
+            self.assertEqual((cached_tokenizer.hits, cached_tokenizer.misses), (len(self.sentences), 0))
+        self.assertEqual(tokenizer.tokenized, [])
+
+    def test_single_tokenizer_stream(self):
+        sentences = ['oración {}'.format(i % 37) for i in range(500)]
+        with CachedTokenizer(CountingTokenizer(), self.cache_path, lru_size=10) as cached_tokenizer:
+            self.assertEqual(list(cached_tokenizer.tokenize_many(['oración 3', 'oración 5'])), [['oración', '3'], ['oración', '5']])
+
+        tokenizer = CountingTokenizer()
+        with CachedTokenizer(tokenizer, self.cache_path, lru_size=10) as cached_tokenizer:
+            tokens = list(cached_tokenizer.tokenize_many(sentences, batch_size=16, n_process=2))
+            self.assertEqual(tokens, [sentence.split() for sentence in sentences])
+            self.assertEqual(tokenizer.tokenize_many_calls, 1) # Every batch of misses goes through the same stream
+            self.assertEqual(len(tokenizer.tokenized), 35)
+            self.assertEqual((cached_tokenizer.hits, cached_tokenizer.misses), (465, 35))
+
+            tokens = list(cached_tokenizer.tokenize_many(sentences + ['nueva'], batch_size=16, max_pending=100))
+            self.assertEqual(tokens, [sentence.split() for sentence in sentences] + [['nueva']])
+            self.assertEqual(tokenizer.tokenize_many_calls, 2) # Only started again for the new sentence
+
+    def test_versions_in_namespace(self):
+        with CachedTokenizer(CountingTokenizer(), self.cache_path) as cached_tokenizer:
+            cached_tokenizer.tokenize('Che réra Juan')
+
+        with CachedTokenizer(CountingTokenizer(version='2'), self.cache_path) as cached_tokenizer:
+            cached_tokenizer.tokenize('Che réra Juan')
+            self.assertEqual(cached_tokenizer.misses, 1)
+
+    def test_tokenizers_do_not_share_entries(self):
+        with CachedTokenizer(CountingTokenizer(), self.cache_path) as cached_tokenizer:
+            cached_tokenizer.tokenize('Ko’ã mba’e, porã.')
+
+        with CachedTokenizer(FastTokenizer(), self.cache_path, lru_size=1) as cached_tokenizer:
+            self.assertEqual(cached_tokenizer.tokenize('Ko’ã mba’e, porã.'), ['Ko’ã', 'mba’e', 'porã'])
+            self.assertEqual(cached_tokenizer.misses, 1)
+            cached_tokenizer.tokenize('Ha’e')
+            self.assertEqual(len(cached_tokenizer.lru), 1)
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
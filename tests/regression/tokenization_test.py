@@ -0,0 +1,39 @@
+import unittest
+
+from src.domain.processing import tokenization, tokenizer_parity
+
+class TestTokenization(unittest.TestCase):
+    def setUp(self) -> None:
+        self.sentences = ["Upévare David oho Tupã rendápe ha oporandu chupe: —Ikatúpa andyry filistéokuérare?",
+                          "Entonces David consultó a Dios, diciendo: —¿Subiré contra los filisteos?",
+                          'La empresa se llamaría "Phillips De Pury & Luxembourg" (1997).',
+                          "Ome'ẽ Cartes-pe peteî jeporavo porã, ha'e he'i.",
+                          "Ñande ru g̃uarã ohasa 12/05/2020 http://abc.com"]
+
+    def test_fast_tokenizer(self):
+        tokenizer = tokenization.get_tokenizer('fast')
+        self.assertIsInstance(tokenizer, tokenization.FastTokenizer)
+        self.assertEqual(tokenizer.tokenize("Ome'ẽ Cartes-pe peteî jeporavo porã, ha'e he'i."), 
+                         ["Ome'ẽ", 'Cartespe', 'peteî', 'jeporavo', 'porã', "ha'e", "he'i"])
+        self.assertEqual(tokenizer.tokenize('Ñe’ẽ “g̃uarã” ñande ru'), 
+                         ['Ñe’ẽ', '“', 'g̃uarã', '”', 'ñande', 'ru'])
+        self.assertEqual(tokenizer.tokenize('Ohasa 12/05/2020 http://abc.com'), ['Ohasa'])
+
+    def test_parity_with_nltk(self):
+        reference = tokenization.NLTKTokenizer(preserve_line=True)
+        candidate = tokenization.FastTokenizer()
+        report = tokenizer_parity.compare_tokenizers(reference, candidate, self.sentences)
+
+        self.assertEqual(report['sentences'], len(self.sentences))
+        self.assertEqual(report['sentence_agreement'], 1.0)
+        self.assertEqual(report['differences'], [])
+
+        report = tokenizer_parity.compare_tokenizers(reference, candidate, ['Ñe’ẽ porã'])
+        self.assertEqual(report['sentence_agreement'], 0.0) # NLTK splits the glottal stop
+        self.assertIn(('candidate', 'Ñe’ẽ'), dict(report['differences']))
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
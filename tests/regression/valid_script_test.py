@@ -1,7 +1,12 @@
 import unittest
 import os
+import ast
+import csv
+import tempfile
 import subprocess
 
+from src.utils import parsing
+
 SCRIPT_DIR = os.path.join(
     os.path.dirname(os.path.realpath(__file__)),
     '..',
@@ -73,6 +78,44 @@ class TestValidationScript(unittest.TestCase):
             print('Output:', output)
             self.assertAlmostEqual(float(output), self.expected_scores[metric], delta=self.precision_epsilon)
 
+    def test_batch_score_script(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            reference_file = os.path.join(temp_dir, 'reference.txt')
+            translation_template = os.path.join(temp_dir, 'translation_{E}.txt')
+            results_file = os.path.join(temp_dir, 'results.csv')
+
+            with open(reference_file, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(self.example_reference) + '\n')
+            translations = {10: self.example_translation, 2: self.example_reference}
+            for epoch, translation in translations.items():
+                with open(parsing.parse_output_filename(translation_template, epoch=epoch), 'w', encoding='utf-8') as f:
+                    f.write('\n'.join(translation) + '\n')
+
+            process_result = subprocess.run([
+                'python', os.path.join(SCRIPT_DIR, 'batch_score.py'),
+                '--reference_file', reference_file,
+                '--translation_files', translation_template,
+                '--score', ' '.join(self.expected_scores),
+                '--results_file', results_file,
+                '--model_name', 'model.npz',
+                '--processes', '2',
+            ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            self.assertEqual(process_result.returncode, 0, process_result.stderr.decode('utf-8'))
+
+            with open(results_file, 'r') as f:
+                header, *rows = list(csv.reader(f))
+
+        self.assertEqual(header, ['date', 'model_name', 'source', 'target', 'score_type', 'score', 'epoch', 'parameters'])
+        self.assertEqual([(row[4], row[6]) for row in rows], [(metric, epoch) for epoch in ['2', '10'] for metric in self.expected_scores])
+        self.assertTrue(all(row[1:4] == ['model.npz', '', 'reference.txt'] for row in rows))
+        parameters = ast.literal_eval(rows[0][7]) # Same flags as the parameters of save_results
+        self.assertEqual(parameters, {'valid-sets': ['', reference_file],
+                                      'valid-translation-output': [translation_template],
+                                      'after-epochs': ['2']})
+        self.assertAlmostEqual(float(rows[0][5]), 100)
+        for row in rows[len(self.expected_scores):]:
+            self.assertAlmostEqual(round(float(row[5]), 4), self.expected_scores[row[4]], delta=self.precision_epsilon)
+
 def main():
     unittest.main()
 